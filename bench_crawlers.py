@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬虫离线基准测试
+record 模式访问真实网站并把所有响应写入WARC归档；
+replay 模式只从归档返回响应（可注入延迟），按爬虫报告耗时、CPU时间、请求数和字节数
+
+用法:
+    python bench_crawlers.py record --archive crawl.warc.gz
+    python bench_crawlers.py replay --archive crawl.warc.gz --latency 0.05
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+
+CRAWLERS = ['news', 'tech', 'academic', 'manufacturer', 'video']
+
+
+def _create_crawler(name: str):
+    # 延迟导入：Config 中的录制/回放设置需在抓取引擎创建前生效
+    from crawlers.news_crawler import NewsCrawler
+    from crawlers.tech_crawler import TechCrawler
+    from crawlers.academic_crawler import AcademicCrawler
+    from crawlers.manufacturer_crawler import ManufacturerCrawler
+    from crawlers.video_crawler import VideoCrawler
+    return {
+        'news': NewsCrawler,
+        'tech': TechCrawler,
+        'academic': AcademicCrawler,
+        'manufacturer': ManufacturerCrawler,
+        'video': VideoCrawler,
+    }[name]()
+
+
+def _cpu_seconds() -> float:
+    """本进程及已结束子进程（解析进程池）的CPU时间"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _transfer_stats(engine) -> dict:
+    if engine.recorder:
+        stats = engine.recorder.get_stats()
+        return {'requests': stats['responses'], 'bytes': stats['bytes'], 'misses': 0}
+    adapter = engine.session.get_adapter('https://')
+    return adapter.get_stats()
+
+
+def run_benchmark(names):
+    from crawlers.fetch_engine import get_shared_fetch_engine
+    from crawlers.parse_pool import get_parse_pool
+
+    engine = get_shared_fetch_engine()
+    parse_pool = get_parse_pool()
+    rows = []
+    for name in names:
+        before = _transfer_stats(engine)
+        wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+
+        crawler = _create_crawler(name)
+        articles = crawler.crawl(Config.SEARCH_KEYWORDS)
+        # 关闭解析进程，使其CPU时间计入本爬虫
+        parse_pool.shutdown()
+
+        wall, cpu = time.perf_counter() - wall_start, _cpu_seconds() - cpu_start
+        after = _transfer_stats(engine)
+        rows.append({
+            'crawler': name,
+            'articles': len(articles),
+            'wall': wall,
+            'cpu': cpu,
+            'requests': after['requests'] - before['requests'],
+            'bytes': after['bytes'] - before['bytes'],
+            'misses': after['misses'] - before['misses'],
+        })
+    return rows
+
+
+def print_report(rows):
+    print(f"{'爬虫':<14}{'文章':>6}{'耗时(s)':>10}{'CPU(s)':>10}{'请求':>8}{'字节':>12}{'未录制':>8}")
+    for row in rows:
+        print(f"{row['crawler']:<14}{row['articles']:>6}{row['wall']:>10.2f}{row['cpu']:>10.2f}"
+              f"{row['requests']:>8}{row['bytes']:>12}{row['misses']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="爬虫录制/回放基准测试")
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('--archive', default=Config.HTTP_ARCHIVE_PATH, help="WARC归档路径")
+    parser.add_argument('--latency', type=float, default=Config.HTTP_REPLAY_LATENCY, help="回放时每个请求注入的延迟（秒）")
+    parser.add_argument('--crawlers', default=','.join(CRAWLERS), help="要运行的爬虫，逗号分隔")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.crawlers.split(',') if name.strip()]
+    unknown = set(names) - set(CRAWLERS)
+    if unknown:
+        parser.error(f"未知爬虫: {', '.join(sorted(unknown))}")
+    if args.mode == 'replay' and not os.path.exists(args.archive):
+        parser.error(f"归档不存在: {args.archive}，请先运行 record 模式")
+
+    Config.HTTP_ARCHIVE_MODE = args.mode
+    Config.HTTP_ARCHIVE_PATH = args.archive
+    Config.HTTP_REPLAY_LATENCY = args.latency
+
+    print_report(run_benchmark(names))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
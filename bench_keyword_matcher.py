@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词匹配微基准
+对比原有逐个关键词 lower()/in 循环与编译后的单遍匹配器，
+按一篇文章实际经历的检查（相关性、关键词提取、有效性、厂商相关性）计时
+"""
+
+import sys
+import os
+import random
+import timeit
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from crawlers.keyword_matcher import KeywordMatcher
+
+
+def legacy_checks(title: str, content: str):
+    """原实现：各调用点各自循环关键词"""
+    text = title + " " + content
+    # NewsCrawler._contains_keywords
+    text_lower = text.lower()
+    relevant = any(keyword.lower() in text_lower for keyword in Config.SEARCH_KEYWORDS)
+    # BaseCrawler.extract_keywords（每个关键词都重新 lower 全文）
+    keywords = []
+    for keyword in Config.SEARCH_KEYWORDS:
+        if keyword.lower() in text.lower():
+            keywords.append(keyword)
+    keywords = list(set(keywords))
+    # BaseCrawler.is_valid_article
+    valid_text = f"{title} {content}".lower()
+    valid = any(keyword.lower() in valid_text for keyword in Config.SEARCH_KEYWORDS)
+    # ManufacturerCrawler._is_bluetooth_related
+    related = any(keyword in text.lower() for keyword in Config.BLUETOOTH_RELATED_KEYWORDS)
+    return relevant, sorted(keywords), valid, related
+
+
+def matcher_checks(matcher: KeywordMatcher, title: str, content: str):
+    """新实现：同一匹配器，同一文本只扫描一次"""
+    text = title + " " + content
+    relevant = matcher.contains_any(text, Config.SEARCH_KEYWORDS)
+    keywords = matcher.matched_keywords(text, Config.SEARCH_KEYWORDS)
+    valid = matcher.contains_any(f"{title} {content}", Config.SEARCH_KEYWORDS)
+    related = matcher.contains_any(text, Config.BLUETOOTH_RELATED_KEYWORDS)
+    return relevant, sorted(keywords), valid, related
+
+
+def make_articles(count: int, length: int, seed: int = 7):
+    rng = random.Random(seed)
+    filler = ['手机', '芯片', '发布', '性能', '测试', 'the', 'new', 'device', 'with', 'support',
+              'latency', 'audio', '功耗', '版本', 'and', 'for', '，', '。', ' ']
+    keywords = list(Config.SEARCH_KEYWORDS) + list(Config.BLUETOOTH_RELATED_KEYWORDS)
+    articles = []
+    for _ in range(count):
+        words, size = [], 0
+        while size < length:
+            words.append(rng.choice(keywords) if rng.random() < 0.02 else rng.choice(filler))
+            size += len(words[-1]) + 1
+        articles.append(('蓝牙 Bluetooth 新品发布会', ' '.join(words)))
+    return articles
+
+
+def main():
+    matcher = KeywordMatcher(list(Config.SEARCH_KEYWORDS) + list(Config.BLUETOOTH_RELATED_KEYWORDS))
+    print(f"{'正文长度':>8} {'原循环(µs/篇)':>14} {'匹配器(µs/篇)':>14} {'加速比':>8}")
+    for length in (500, 5000, 50000):
+        articles = make_articles(50, length)
+        for title, content in articles:
+            assert legacy_checks(title, content) == matcher_checks(matcher, title, content)
+        number = max(1, 20000 // length)
+        legacy = min(timeit.repeat(lambda: [legacy_checks(t, c) for t, c in articles],
+                                   number=number, repeat=3)) / number / len(articles) * 1e6
+        compiled = min(timeit.repeat(lambda: [matcher_checks(matcher, t, c) for t, c in articles],
+                                     number=number, repeat=3)) / number / len(articles) * 1e6
+        print(f"{length:>8} {legacy:>14.1f} {compiled:>14.1f} {legacy / compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
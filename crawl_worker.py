@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取任务工作进程
+把到了访问时间的来源拆分为任务加入任务队列，并启动多个工作进程领取执行（见 crawlers/task_queue.py）。
+队列默认为本机的 SQLite 文件；TASK_QUEUE_URL（或 --queue）设为 PostgreSQL 连接串时，多台机器上的工作进程共用一个队列
+
+用法:
+    python crawl_worker.py --enqueue               # 规划任务加入队列
+    python crawl_worker.py --workers 4             # 启动4个工作进程，持续处理队列
+    python crawl_worker.py --enqueue --drain       # 规划任务，处理完队列中的任务后退出
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from database import Database
+from crawlers.task_queue import TaskQueue, TaskWorker, enqueue_crawl_tasks
+from scheduler import CrawlerScheduler, load_crawl_state
+
+
+def run_worker(queue_path: str, drain: bool, stop):
+    """工作进程入口：Ctrl+C 由主进程处理，当前任务完成后退出"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    db = Database()
+    load_crawl_state(db)
+    TaskWorker(TaskQueue(queue_path), db, CrawlerScheduler.CRAWLERS).run(stop, drain)
+
+
+def start_workers(count: int, queue_path: str = '', drain: bool = False):
+    """启动 count 个工作进程并等待其结束"""
+    # 主进程已创建抓取引擎等带线程的对象，工作进程用 spawn 启动，不继承这些状态
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    processes = [context.Process(target=run_worker, args=(queue_path, drain, stop), name=f"crawl-worker-{index}")
+                 for index in range(count)]
+    for process in processes:
+        process.start()
+    logging.info(f"已启动 {count} 个工作进程")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        logging.info("正在停止工作进程（等待当前任务完成）...")
+        stop.set()
+        for process in processes:
+            process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="爬取任务工作进程")
+    parser.add_argument('--workers', type=int, default=Config.TASK_WORKERS, help="工作进程数，0 表示不启动")
+    parser.add_argument('--queue', default='', help="任务队列文件或 PostgreSQL 连接串，默认为 TASK_QUEUE_URL 或 TASK_QUEUE_PATH")
+    parser.add_argument('--enqueue', action='store_true', help="先把到了访问时间的来源拆分为任务加入队列")
+    parser.add_argument('--drain', action='store_true', help="队列中没有可执行的任务时退出")
+    args = parser.parse_args()
+
+    queue = TaskQueue(args.queue)
+    if args.enqueue:
+        db = Database()
+        load_crawl_state(db)
+        enqueue_crawl_tasks(queue, db, CrawlerScheduler.CRAWLERS)
+        queue.purge()
+    if args.workers > 0:
+        start_workers(args.workers, args.queue, args.drain)
+    stats = queue.get_stats()
+    print(f"任务队列: 等待 {stats['pending']}，执行中 {stats['leased']}，完成 {stats['done']}，放弃 {stats['failed']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
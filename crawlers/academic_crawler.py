@@ -1,14 +1,26 @@
 import requests
-import arxiv
-from typing import List, Dict
+import feedparser
+import re
+from typing import List, Dict, Optional
+from urllib.parse import urlencode
 from bs4 import BeautifulSoup
 import time
 import json
 from datetime import datetime, timedelta
 from .base_crawler import BaseCrawler
+from .html_parser import parse_html
 from config import Config
 
+# arXiv 查询接口（Atom），经抓取引擎请求以共用限速、录制与回放
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+
 class AcademicCrawler(BaseCrawler):
+    KEYWORD_SOURCES = {
+        'arXiv': ('_crawl_arxiv', 5),
+        'Google Patents': ('_crawl_patents', 3),
+        'IEEE Xplore': ('_crawl_ieee', 3),
+    }
+    
     def __init__(self):
         super().__init__()
         self.source_type = "academic"
@@ -18,40 +30,41 @@ class AcademicCrawler(BaseCrawler):
         print("开始爬取学术论文和专利...")
         
         # 爬取arXiv论文
-        self._crawl_arxiv(keywords)
+        self.visit_source('arXiv', self._crawl_arxiv, keywords)
         
         # 爬取Google Patents
-        self._crawl_patents(keywords)
+        self.visit_source('Google Patents', self._crawl_patents, keywords)
         
         # 爬取IEEE论文
-        self._crawl_ieee(keywords)
+        self.visit_source('IEEE Xplore', self._crawl_ieee, keywords)
         
-        print(f"学术论文和专利爬取完成，共获取 {len(self.articles)} 篇文章")
+        print(f"学术论文和专利爬取完成，共获取 {self.article_count} 篇文章")
         return self.articles
     
     def _crawl_arxiv(self, keywords: List[str]):
         """爬取arXiv论文"""
         try:
+            search_urls = []
             for keyword in keywords[:5]:  # 限制关键词数量
-                # 构建搜索查询
-                search_query = f"all:{keyword}"
-                
-                # 搜索论文
-                search = arxiv.Search(
-                    query=search_query,
-                    max_results=20,
-                    sort_by=arxiv.SortCriterion.SubmittedDate
-                )
-                
-                for result in search.results():
+                params = urlencode({
+                    'search_query': f"all:{keyword}",
+                    'start': 0,
+                    'max_results': 20,
+                    'sortBy': 'submittedDate',
+                    'sortOrder': 'descending'
+                })
+                search_urls.append(f"{ARXIV_API_URL}?{params}")
+            
+            for search_url, feed_xml in self.get_pages(search_urls):
+                for entry in feedparser.parse(feed_xml).entries:
                     try:
                         # 提取论文信息
-                        title = result.title
-                        abstract = result.summary
-                        authors = [author.name for author in result.authors]
-                        published_date = result.published.strftime('%Y-%m-%d') if result.published else ""
-                        pdf_url = result.pdf_url
-                        arxiv_url = result.entry_id
+                        title = re.sub(r'\s+', ' ', entry.get('title', '')).strip()
+                        abstract = entry.get('summary', '')
+                        authors = [author.get('name', '') for author in entry.get('authors', [])]
+                        published = entry.get('published_parsed')
+                        published_date = time.strftime('%Y-%m-%d', published) if published else ""
+                        arxiv_url = entry.get('id', '')
                         
                         # 检查是否包含关键词
                         if self._contains_keywords(title + " " + abstract, keywords):
@@ -68,48 +81,34 @@ class AcademicCrawler(BaseCrawler):
                             
                             self.add_article(article_data)
                         
-                        time.sleep(Config.REQUEST_DELAY)
-                        
                     except Exception as e:
                         print(f"处理arXiv论文失败: {e}")
                         continue
                 
-                time.sleep(Config.REQUEST_DELAY)
-                
         except Exception as e:
             print(f"爬取arXiv失败: {e}")
     
     def _crawl_patents(self, keywords: List[str]):
         """爬取Google Patents"""
         try:
-            for keyword in keywords[:3]:  # 限制关键词数量
+            for keyword in self.pending_keywords('Google Patents', keywords[:3]):  # 限制关键词数量
                 # Google Patents搜索URL
                 search_url = f"https://patents.google.com/?q={keyword}&language=ENGLISH"
                 html = self.get_page(search_url)
                 
                 if html:
-                    soup = BeautifulSoup(html, 'html.parser')
+                    soup = parse_html(html)
                     
                     # 查找专利链接
                     patent_links = soup.select('a[data-result="patent"]')
+                    # 限制专利数量
+                    patent_urls = ["https://patents.google.com" + link.get('href') for link in patent_links[:10]]
                     
-                    for link in patent_links[:10]:  # 限制专利数量
-                        patent_url = "https://patents.google.com" + link.get('href')
-                        
-                        try:
-                            patent_html = self.get_page(patent_url)
-                            if patent_html:
-                                patent_data = self._extract_patent_data(patent_html, patent_url, keyword)
-                                if patent_data:
-                                    self.add_article(patent_data)
-                            
-                            time.sleep(Config.REQUEST_DELAY)
-                            
-                        except Exception as e:
-                            print(f"处理专利失败 {patent_url}: {e}")
-                            continue
-                
-                time.sleep(Config.REQUEST_DELAY)
+                    pages = self.get_pages(self.filter_new_urls(patent_urls, 'Google Patents'))
+                    for patent_url, patent_data in self.parse_pages(pages, self._extract_patent_data, keyword):
+                        if patent_data:
+                            self.add_article(patent_data)
+                    self.finish_keyword('Google Patents', keyword)
                 
         except Exception as e:
             print(f"爬取Google Patents失败: {e}")
@@ -117,41 +116,40 @@ class AcademicCrawler(BaseCrawler):
     def _crawl_ieee(self, keywords: List[str]):
         """爬取IEEE论文"""
         try:
-            for keyword in keywords[:3]:  # 限制关键词数量
+            for keyword in self.pending_keywords('IEEE Xplore', keywords[:3]):  # 限制关键词数量
                 # IEEE Xplore搜索URL
                 search_url = f"https://ieeexplore.ieee.org/search/searchresult.jsp?queryText={keyword}"
                 html = self.get_page(search_url)
                 
                 if html:
-                    soup = BeautifulSoup(html, 'html.parser')
+                    soup = parse_html(html)
                     
                     # 查找论文链接
                     paper_links = soup.select('a[data-testid="title"]')
+                    # 限制论文数量
+                    paper_urls = ["https://ieeexplore.ieee.org" + link.get('href') for link in paper_links[:10]]
                     
-                    for link in paper_links[:10]:  # 限制论文数量
-                        paper_url = "https://ieeexplore.ieee.org" + link.get('href')
-                        
-                        try:
-                            paper_html = self.get_page(paper_url)
-                            if paper_html:
-                                paper_data = self._extract_ieee_paper_data(paper_html, paper_url, keyword)
-                                if paper_data:
-                                    self.add_article(paper_data)
-                            
-                            time.sleep(Config.REQUEST_DELAY)
-                            
-                        except Exception as e:
-                            print(f"处理IEEE论文失败 {paper_url}: {e}")
-                            continue
-                
-                time.sleep(Config.REQUEST_DELAY)
+                    pages = self.get_pages(self.filter_new_urls(paper_urls, 'IEEE Xplore'))
+                    for paper_url, paper_data in self.parse_pages(pages, self._extract_ieee_paper_data, keyword):
+                        if paper_data:
+                            self.add_article(paper_data)
+                    self.finish_keyword('IEEE Xplore', keyword)
                 
         except Exception as e:
             print(f"爬取IEEE失败: {e}")
     
+    def reextract(self, html: str, article: Dict) -> Optional[Dict]:
+        """重新提取专利和IEEE论文；arXiv条目来自API结果，不支持"""
+        source_name = article.get('source_name', '')
+        if source_name == 'Google Patents':
+            return self._extract_patent_data(html, article['url'], '')
+        if source_name == 'IEEE Xplore':
+            return self._extract_ieee_paper_data(html, article['url'], '')
+        return None
+    
     def _extract_patent_data(self, html: str, url: str, keyword: str) -> Dict:
         """提取专利数据"""
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # 提取专利标题
         title_elem = soup.select_one('span[itemprop="title"]')
@@ -190,7 +188,7 @@ class AcademicCrawler(BaseCrawler):
     
     def _extract_ieee_paper_data(self, html: str, url: str, keyword: str) -> Dict:
         """提取IEEE论文数据"""
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # 提取论文标题
         title_elem = soup.select_one('h1[data-testid="title"]')
@@ -221,9 +219,4 @@ class AcademicCrawler(BaseCrawler):
             'publish_date': publish_date,
             'keywords': self.extract_keywords(title + " " + abstract),
             'sentiment': 'neutral'
-        }
-    
-    def _contains_keywords(self, text: str, keywords: List[str]) -> bool:
-        """检查文本是否包含关键词"""
-        text_lower = text.lower()
-        return any(keyword.lower() in text_lower for keyword in keywords) 
\ No newline at end of file
+        }
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+入库流水线
+爬虫交出的文章逐篇经过 校验 → 去重 → 批量写入 → 统计更新，不在内存中累积整次运行的文章；
+每满一批或距上次写入超过间隔即写入数据库，进程中途退出时已提取的文章大多已入库；
+带运行断点时文章先追加写入暂存文件，中断后重放
+"""
+
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from config import Config
+from .url_canonical import canonicalize_url
+
+# 统计表中按来源类型计数的列
+_STAT_COLUMNS = {'news': 'news_count', 'tech': 'tech_count', 'academic': 'academic_count', 'video': 'video_count'}
+
+
+class PipelineMarker:
+    """随文章流传递的回调，流水线处理完之前的文章（写入暂存文件）后执行
+
+    爬虫用它在文章安全之后再记录进度（断点、重访记录），进程中途退出时不会出现进度已记录而文章丢失。
+    """
+
+    def __init__(self, callback: Callable[[], None]):
+        self.callback = callback
+
+
+class ArticlePipeline:
+    """一次运行的入库流水线，可在多个爬虫线程中同时使用
+
+    用作上下文管理器：进入时启动定时写入线程，退出时写入剩余文章。
+    update_statistics 为 True 时每批写入后同时更新当日统计和关键词频率（每日任务）；
+    checkpoint 为运行断点（RunCheckpoint）时接收的文章先写入其暂存文件，并记录已写入数据库的进度。
+    """
+
+    def __init__(self, db, frontier=None, update_statistics: bool = False, checkpoint=None,
+                 batch_size: int = Config.PIPELINE_BATCH_SIZE,
+                 flush_seconds: float = Config.PIPELINE_FLUSH_SECONDS,
+                 summary_limit: int = Config.PIPELINE_SUMMARY_ARTICLES):
+        self.db = db
+        self.frontier = frontier
+        self.update_statistics = update_statistics
+        self.checkpoint = checkpoint
+        self._spool = checkpoint.spool if checkpoint is not None else None
+        # 暂存文件中已写入数据库的记录数（暂存文件与写入批次的顺序一致）
+        self._committed = checkpoint.committed if checkpoint is not None else 0
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.summary_limit = summary_limit
+        self.date = datetime.now().strftime('%Y-%m-%d')
+        # 本次运行已接收的规范URL，只保存URL
+        self._seen = set()
+        self._batch: List[Dict] = []
+        self._source_counts = Counter()
+        # 供生成总结的精简文章记录（正文截断、数量有限）
+        self.summary_articles: List[Dict] = []
+        self.stats = {'received': 0, 'invalid': 0, 'duplicates': 0, 'accepted': 0,
+                      'saved': 0, 'failed': 0, 'batches': 0}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'ArticlePipeline':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        """启动定时写入线程，爬虫产出较慢时文章也能在 flush_seconds 内入库"""
+        if self._flusher is None and self.flush_seconds > 0:
+            self._stopped.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name='article-pipeline', daemon=True)
+            self._flusher.start()
+
+    def close(self):
+        """停止定时写入并写入剩余文章；没有任何文章时同样记录当日统计"""
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        if self.update_statistics and not self.stats['batches']:
+            self.db.update_statistics(self.date, self.get_statistics())
+        if self._spool is not None:
+            self._spool.close()
+
+    def _flush_loop(self):
+        while not self._stopped.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"定时写入文章失败: {e}")
+
+    def consume(self, articles: Iterable[Dict]) -> int:
+        """处理爬虫交出的文章流，返回接收的文章数（不含无效和重复的）"""
+        return sum(1 for article in articles if self.process(article))
+
+    def process(self, article) -> bool:
+        """处理一篇文章：校验、按规范URL去重后（写入暂存文件并）加入待写入批次，批次满时写入
+
+        article 也可以是 PipelineMarker，此时落盘暂存文件后执行其回调。
+        """
+        if isinstance(article, PipelineMarker):
+            self.sync()
+            article.callback()
+            return False
+        return self._accept(article, spool=True, store=True)
+
+    def replay(self, checkpoint) -> int:
+        """重放中断运行暂存的文章，返回重新写入的文章数
+
+        已写入数据库的记录只恢复去重、统计和总结记录，其余的重新批量写入。
+        """
+        replayed = 0
+        for index, article in enumerate(checkpoint.spool.records()):
+            store = index >= checkpoint.committed
+            if self._accept(article, spool=False, store=store) and store:
+                replayed += 1
+        return replayed
+
+    def sync(self):
+        """把暂存文件落盘"""
+        if self._spool is not None:
+            self._spool.sync()
+
+    def _accept(self, article: Dict, spool: bool, store: bool) -> bool:
+        with self._lock:
+            self.stats['received'] += 1
+            if not self._is_valid(article):
+                self.stats['invalid'] += 1
+                return False
+            key = canonicalize_url(article['url'])
+            if key in self._seen:
+                self.stats['duplicates'] += 1
+                return False
+            self._seen.add(key)
+            self.stats['accepted'] += 1
+            if spool and self._spool is not None:
+                self._spool.append(article)
+            if store:
+                self._batch.append(article)
+            self._source_counts[article['source_type']] += 1
+            if len(self.summary_articles) < self.summary_limit:
+                self.summary_articles.append(self._summary_record(article))
+            full = len(self._batch) >= self.batch_size
+        if full:
+            self.flush()
+        return True
+
+    def _is_valid(self, article: Dict) -> bool:
+        """入库必需的字段：http(s) URL、标题和来源类型"""
+        url = article.get('url') or ''
+        return (urlsplit(url).scheme in ('http', 'https') and bool(article.get('title'))
+                and bool(article.get('source_type')))
+
+    @staticmethod
+    def _summary_record(article: Dict) -> Dict:
+        return {
+            'title': article.get('title', ''),
+            'url': article.get('url', ''),
+            'source_type': article.get('source_type', ''),
+            'source_name': article.get('source_name') or article.get('source', ''),
+            'content': (article.get('content') or article.get('description') or '')[:Config.PIPELINE_SUMMARY_CHARS],
+            'keywords': list(article.get('keywords') or []),
+        }
+
+    def flush(self):
+        """写入待写入的文章，批次按接收顺序写入"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._batch = self._batch, []
+            if not batch:
+                return
+            saved = self.db.insert_articles(batch)
+            self._committed += len(batch)
+            if self.checkpoint is not None:
+                self.checkpoint.set_committed(self._committed)
+            if self.frontier is not None:
+                for url in saved:
+                    self.frontier.add(url)
+            if self.update_statistics:
+                self.db.update_statistics(self.date, self.get_statistics())
+                keywords = [keyword for article in batch for keyword in article.get('keywords') or []]
+                if keywords:
+                    self.db.update_keyword_frequency(keywords)
+            with self._lock:
+                self.stats['saved'] += len(saved)
+                self.stats['failed'] += len(batch) - len(saved)
+                self.stats['batches'] += 1
+
+    def get_statistics(self) -> Dict[str, int]:
+        """已接收文章的当日统计（总数和按来源类型计数）"""
+        with self._lock:
+            stats = {'total_articles': sum(self._source_counts.values())}
+            for source_type, column in _STAT_COLUMNS.items():
+                stats[column] = self._source_counts[source_type]
+            return stats
+
+    def get_stats(self) -> Dict[str, int]:
+        """流水线各阶段的计数"""
+        with self._lock:
+            return dict(self.stats, pending=len(self._batch))
@@ -1,48 +1,317 @@
+import queue
 import requests
+import threading
 import time
 import random
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+from typing import Any, Callable, Iterable, List, Dict, Optional, Iterator, Tuple, Union
+from bs4 import BeautifulSoup, Tag
 from urllib.parse import urljoin, urlparse
 import re
 from config import Config
+from .fetch_engine import get_shared_fetch_engine
+from .url_frontier import get_url_frontier
+from .url_canonical import canonicalize_url
+from .keyword_matcher import get_keyword_matcher
+from .html_parser import parse_html, iter_text
+from .parse_pool import get_parse_pool
+from .revisit_planner import get_revisit_planner
+from .crawl_budget import CrawlBudget
+from .focused_frontier import FocusedFrontier, LinkScorer, extract_scored_links
+from .article_pipeline import PipelineMarker
+from .source_watchdog import SourceTimeout, check_abandoned, get_source_watchdog, is_abandoned, source_deadline
+from .task_queue import CrawlTask
 
 class BaseCrawler(ABC):
+    # 按关键词查询的来源，拆分任务时每个关键词一个任务：{来源名称: (爬取方法名, 使用的关键词数上限)}
+    KEYWORD_SOURCES: Dict[str, Tuple[str, Optional[int]]] = {}
+    
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': Config.USER_AGENT
-        })
+        # 所有爬虫实例共用同一个抓取引擎和连接池
+        self.fetch_engine = get_shared_fetch_engine()
+        self.session = self.fetch_engine.session
+        self.politeness = self.fetch_engine.politeness
+        self.frontier = get_url_frontier()
+        self.keyword_matcher = get_keyword_matcher()
+        self.parse_pool = get_parse_pool()
+        self.revisits = get_revisit_planner()
+        self.watchdog = get_source_watchdog()
+        # 默认不限制，由调度器按配置替换为带上限的预算
+        self.budget = CrawlBudget()
         self.articles = []
+        self.article_count = 0
+        # 流式爬取时文章交给消费者，不在 self.articles 中累积
+        self._sink: Optional[Callable[[Dict], None]] = None
+        # 正在访问的来源产出的新文章数（交出时统计，流式入库后无法再区分）
+        self._visit_new_articles: Optional[int] = None
+        self._current_source = ''
+        # 每日任务的运行断点（RunCheckpoint）和本爬虫的死信队列（DeadLetterQueue），由调度器设置
+        self.checkpoint = None
+        self.dead_letters = None
+        # 访问超过期限、被看门狗放弃的来源
+        self.timed_out: List[str] = []
+    
+    # 爬虫实例会随提取方法一起发送到解析进程，网络相关状态不随之序列化
+    _PROCESS_LOCAL_ATTRS = ('fetch_engine', 'session', 'politeness', 'frontier',
+                            'keyword_matcher', 'parse_pool', 'revisits', 'watchdog', 'budget', 'articles',
+                            '_sink', '_visit_new_articles', 'checkpoint', 'dead_letters')
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._PROCESS_LOCAL_ATTRS:
+            state.pop(name, None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.keyword_matcher = get_keyword_matcher()
+        self.articles = []
+        self._sink = None
+        self._visit_new_articles = None
     
     def get_page(self, url: str, retries: int = 3) -> Optional[str]:
         """获取页面内容"""
-        for attempt in range(retries):
+        check_abandoned()
+        return self.fetch_engine.fetch_one(url, retries, budget=self.budget).text
+    
+    def get_pages(self, urls: List[str], retries: int = 3) -> Iterator[Tuple[str, str]]:
+        """批量获取页面内容，按完成顺序返回 (url, html)
+        
+        设置了死信队列时，重试后仍失败的页面记入队列（被跳过的响应和404/410除外）
+        """
+        check_abandoned()
+        for result in self.fetch_engine.fetch_many(urls, retries, budget=self.budget):
+            check_abandoned()
+            self._track_failure(result, self._current_source)
+            if result.ok:
+                yield result.url, result.text
+    
+    def _track_failure(self, result, source: str):
+        """按抓取结果更新死信队列"""
+        if self.dead_letters is None:
+            return
+        if result.ok:
+            self.dead_letters.resolve(result.url)
+        elif result.error and result.skip_reason is None and result.status_code not in (404, 410):
+            self.dead_letters.record_failure(result.url, source, result.error)
+    
+    def parse_pages(self, pages: Iterable[Tuple[str, str]], extractor: Callable, *args) -> Iterator[Tuple[str, Any]]:
+        """把抓取到的页面交给解析进程池，按完成顺序返回 (url, 提取结果)
+        
+        extractor 按 extractor(html, url, *args) 调用，解析失败的页面记录后跳过
+        """
+        tasks = ((url, (html, url) + args) for url, html in pages)
+        for url, result, error in self.parse_pool.map(extractor, tasks):
+            if error is not None:
+                print(f"解析页面失败 {url}: {error}")
+                continue
+            yield url, result
+    
+    def crawl_focused(self, seed_url: str, scorer: LinkScorer, extract: Callable, *args,
+                      seed_html: Optional[str] = None, extract_seed: bool = False,
+                      max_depth: int = Config.FOCUSED_MAX_DEPTH,
+                      max_pages: int = Config.FOCUSED_MAX_PAGES) -> Iterator[Tuple[str, Any]]:
+        """从入口页开始聚焦抓取，按完成顺序返回 (url, 提取结果)
+        
+        每批并发抓取队列中得分最高的链接，页面在解析进程中提取内容并给页面上的链接打分，
+        相关链接加入队列；最多展开 max_depth 层、抓取 max_pages 个页面，预算用尽时停止。
+        extract 按 extract(soup, url, *args) 调用；入口页默认只用于发现链接。
+        """
+        frontier = FocusedFrontier(scorer.min_score)
+        frontier.mark_seen(seed_url)
+        if seed_html is None:
+            seed_html = self.get_page(seed_url)
+        pages = [(seed_url, seed_html, 0)] if seed_html else []
+        try:
+            while pages:
+                depths = {url: depth for url, _, depth in pages}
+                tasks = ((url, (html, url, scorer, depth < max_depth,
+                                extract if depth or extract_seed else None) + args)
+                         for url, html, depth in pages)
+                for url, result, error in self.parse_pool.map(self._parse_focused_page, tasks):
+                    if error is not None:
+                        print(f"解析页面失败 {url}: {error}")
+                        continue
+                    data, links = result
+                    frontier.add_links(links, depths[url] + 1)
+                    if depths[url] or extract_seed:
+                        yield url, data
+                
+                pages = []
+                while not pages and frontier and frontier.stats['fetched'] < max_pages and not self.budget.exhausted():
+                    size = min(Config.MAX_CONCURRENT_REQUESTS, max_pages - frontier.stats['fetched'])
+                    batch = {link.url: depth for link, depth in frontier.pop_batch(size)}
+                    urls = self.filter_new_urls(list(batch), seed_url)
+                    frontier.stats['fetched'] += len(urls)
+                    pages = [(url, html, batch[url]) for url, html in self.get_pages(urls)]
+        finally:
+            stats = frontier.get_stats()
+            print(f"聚焦抓取 {seed_url}: 抓取 {stats['fetched']} 页，链接 {stats['links']} 个，"
+                  f"不相关 {stats['irrelevant']} 个，未抓取 {stats['pending']} 个")
+    
+    def _parse_focused_page(self, html: str, url: str, scorer: LinkScorer, expand: bool,
+                            extract: Optional[Callable], *args) -> Tuple[Any, list]:
+        """在解析进程中执行：页面只解析一次，先给链接打分再提取内容"""
+        soup = parse_html(html)
+        links = extract_scored_links(soup, url, scorer) if expand else []
+        return (extract(soup, url, *args) if extract is not None else None), links
+    
+    def watch_source(self, source: str, crawl: Callable, *args) -> Any:
+        """在看门狗期限（按爬虫类配置，见 Config.SOURCE_DEADLINES）内执行 crawl(*args)，超时时记录来源并抛出 SourceTimeout"""
+        try:
+            return self.watchdog.run(source, source_deadline(type(self)), crawl, *args, crawler=type(self).__name__)
+        except SourceTimeout:
+            if not is_abandoned():
+                self.timed_out.append(source)
+            raise
+    
+    def visit_source(self, source: str, crawl: Callable, *args) -> bool:
+        """按重访计划访问一个来源：未到访问时间或预算已用尽时跳过，访问后记录产出的新文章数
+        
+        访问超过看门狗期限时放弃该来源，不记录访问结果，下次运行时重新访问。
+        """
+        check_abandoned()
+        if not self.revisits.is_due(source) or self.budget.exhausted() or self.is_source_done(source):
+            return False
+        outer, self._visit_new_articles = self._visit_new_articles, 0
+        outer_source, self._current_source = self._current_source, source
+        try:
+            self.watch_source(source, crawl, *args)
+        except SourceTimeout as e:
+            if is_abandoned():
+                raise
+            print(f"{e}，跳过该来源")
+            return True
+        finally:
+            # 被放弃的来源线程恢复后不再改动爬虫状态（此时爬虫可能正在访问其他来源）
+            if not is_abandoned():
+                new_articles, self._visit_new_articles = self._visit_new_articles, outer
+                self._current_source = outer_source
+                if outer is not None:
+                    self._visit_new_articles += new_articles
+        if self.budget.truncated:
+            # 访问中途预算用尽，结果不完整，不计入变化频率估计
+            return True
+        self.finish_source(source, new_articles)
+        return True
+    
+    def is_source_done(self, source: str) -> bool:
+        """从断点恢复的运行中，该来源在中断前是否已访问完成"""
+        return self.checkpoint is not None and self.checkpoint.is_done('source', source)
+    
+    def finish_source(self, source: str, new_articles: int, source_type: Optional[str] = None):
+        """来源访问完成：此前交出的文章写入暂存后，记录重访结果和断点"""
+        source_type = getattr(self, 'source_type', '') if source_type is None else source_type
+        checkpoint = self.checkpoint
+        
+        def record():
+            self.revisits.record_visit(source, source_type, new_articles)
+            if checkpoint is not None:
+                checkpoint.mark_done('source', source)
+        
+        self.after_saved(record)
+    
+    def pending_keywords(self, source: str, keywords: List[str]) -> List[str]:
+        """该来源在本次运行中尚未完成的关键词（从断点恢复时跳过已完成的）"""
+        if self.checkpoint is None:
+            return list(keywords)
+        return [keyword for keyword in keywords if not self.checkpoint.is_done('keyword', f"{source}|{keyword}")]
+    
+    def finish_keyword(self, source: str, keyword: str):
+        """该来源的一个关键词处理完成（预算用尽导致结果不完整时不记录）"""
+        checkpoint = self.checkpoint
+        if checkpoint is not None and not self.budget.truncated:
+            self.after_saved(lambda: checkpoint.mark_done('keyword', f"{source}|{keyword}"))
+    
+    def after_saved(self, callback: Callable[[], None]):
+        """此前交出的文章写入暂存文件后执行 callback；非流式爬取时立即执行"""
+        check_abandoned()
+        if self._sink is not None:
+            self._sink(PipelineMarker(callback))
+        else:
+            callback()
+    
+    def retry_dead_letters(self) -> int:
+        """重新抓取死信队列中到了重试时间的页面，用 reextract 提取文章，返回成功抓取的页面数"""
+        if self.dead_letters is None:
+            return 0
+        sources = {entry['url']: entry['source'] for entry in self.dead_letters.due()}
+        if not sources:
+            return 0
+        fetched = self.refetch_articles(sources)
+        print(f"重试失败页面 {len(sources)} 个，成功 {fetched} 个")
+        return fetched
+    
+    def refetch_articles(self, sources: Dict[str, str]) -> int:
+        """抓取单独的文章页面（{url: 来源}），用 reextract 提取文章，返回成功抓取的页面数"""
+        fetched = 0
+        for result in self.fetch_engine.fetch_many(list(sources), budget=self.budget):
+            self._track_failure(result, sources[result.url])
+            if not result.ok:
+                continue
+            fetched += 1
             try:
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                return response.text
+                article_data = self.reextract(result.text, {'url': result.url, 'source_name': sources[result.url],
+                                                            'source_type': getattr(self, 'source_type', '')})
             except Exception as e:
-                print(f"获取页面失败 {url}: {e}")
-                if attempt < retries - 1:
-                    time.sleep(random.uniform(1, 3))
+                print(f"重新提取失败页面出错 {result.url}: {e}")
                 continue
-        return None
+            if article_data:
+                self.add_article(article_data)
+        return fetched
     
-    def extract_text(self, html: str) -> str:
-        """提取纯文本内容"""
-        if not html:
-            return ""
+    def crawl_with_retries(self, keywords: List[str]) -> List[Dict]:
+        """先重试到期的失败页面，再正常爬取"""
+        self.retry_dead_letters()
+        return self.crawl(keywords)
+    
+    def plan_tasks(self, keywords: List[str]) -> List[CrawlTask]:
+        """把一次爬取拆分为可单独执行的任务（见 crawlers/task_queue.py），只包含到了访问时间的来源
         
-        soup = BeautifulSoup(html, 'html.parser')
+        默认拆分 KEYWORD_SOURCES 中的每个关键词查询和死信队列中到期的页面，子类补充订阅源和入口页任务。
+        """
+        tasks = []
+        for source, (_, limit) in self.KEYWORD_SOURCES.items():
+            for keyword in keywords[:limit]:
+                key = f"{source}|{keyword}"
+                if self.revisits.is_due(key):
+                    tasks.append(CrawlTask('keyword', key, {'source': source, 'keyword': keyword}))
+        if self.dead_letters is not None:
+            tasks.extend(CrawlTask('article', entry['url'], {'source': entry['source']})
+                         for entry in self.dead_letters.due())
+        return tasks
+    
+    def run_task(self, task: CrawlTask, keywords: List[str]):
+        """执行 plan_tasks 拆分出的一个任务，文章照常交出（见 emit_article）"""
+        if task.kind == 'keyword':
+            method = getattr(self, self.KEYWORD_SOURCES[task.payload['source']][0])
+            # 每个关键词查询单独记录重访结果
+            self.visit_source(task.key, method, [task.payload['keyword']])
+        elif task.kind == 'article':
+            self.refetch_articles({task.key: task.payload.get('source', '')})
+        else:
+            raise ValueError(f"未知的任务类型: {task.kind}")
+    
+    def filter_new_urls(self, urls: List[str], source: str = '', limit: Optional[int] = None) -> List[str]:
+        """抓取文章页面前过滤掉已入库（且未到重访周期）的URL
         
-        # 移除脚本和样式标签
-        for script in soup(["script", "style"]):
-            script.decompose()
+        按规范URL判重，返回原始URL用于抓取
+        """
+        originals = {}
+        for url in urls:
+            originals.setdefault(canonicalize_url(url), url)
+        fresh = self.frontier.filter_urls(list(originals), getattr(self, 'source_type', ''), source, limit)
+        return [originals[url] for url in fresh]
+    
+    def extract_text(self, html: Union[str, Tag]) -> str:
+        """提取纯文本内容，可直接传入已解析的节点"""
+        if html is None or (isinstance(html, str) and not html):
+            return ""
+        
+        node = parse_html(html) if isinstance(html, str) else html
         
-        # 获取文本
-        text = soup.get_text()
+        # 获取文本（跳过脚本和样式标签）
+        text = ''.join(iter_text(node))
         
         # 清理文本
         lines = (line.strip() for line in text.splitlines())
@@ -56,24 +325,15 @@ class BaseCrawler(ABC):
         if not text:
             return []
         
-        # 简单的关键词提取（可以后续优化）
-        keywords = []
-        for keyword in Config.SEARCH_KEYWORDS:
-            if keyword.lower() in text.lower():
-                keywords.append(keyword)
-        
-        return list(set(keywords))
+        return self.keyword_matcher.matched_keywords(text, Config.SEARCH_KEYWORDS)
+    
+    def _contains_keywords(self, text: str, keywords: List[str]) -> bool:
+        """检查文本是否包含关键词"""
+        return get_keyword_matcher(keywords).contains_any(text, keywords)
     
     def clean_url(self, url: str) -> str:
         """清理URL"""
-        if not url:
-            return ""
-        
-        # 移除URL参数
-        parsed = urlparse(url)
-        clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-        
-        return clean_url
+        return canonicalize_url(url)
     
     def is_valid_article(self, title: str, content: str) -> bool:
         """检查是否为有效文章"""
@@ -89,19 +349,84 @@ class BaseCrawler(ABC):
             return False
         
         # 检查是否包含关键词
-        text = f"{title} {content}".lower()
-        return any(keyword.lower() in text for keyword in Config.SEARCH_KEYWORDS)
+        return self._contains_keywords(f"{title} {content}", Config.SEARCH_KEYWORDS)
     
     def add_article(self, article_data: Dict):
-        """添加文章到列表"""
+        """验证文章，有效的文章交出（见 emit_article）"""
         if self.is_valid_article(article_data.get('title', ''), article_data.get('content', '')):
+            article_data['url'] = canonicalize_url(article_data.get('url', ''))
+            self.emit_article(article_data)
+    
+    def emit_article(self, article_data: Dict):
+        """交出一篇文章：流式爬取时立即交给消费者，否则保存到 self.articles"""
+        check_abandoned()
+        self.article_count += 1
+        if self._visit_new_articles is not None:
+            # 部分来源（列表页、API结果）不经过URL前沿过滤，按是否已入库统计新文章
+            self._visit_new_articles += self.frontier.count_new([article_data['url']])
+        if self._sink is not None:
+            self._sink(article_data)
+        else:
             self.articles.append(article_data)
     
+    def stream(self, keywords: List[str], crawl: Optional[Callable] = None) -> Iterator[Dict]:
+        """流式爬取，文章提取出来即返回，爬虫本身不累积文章
+        
+        crawl(keywords) 默认为 self.crawl，在后台线程中运行，文章经有界队列交给调用方；
+        调用方处理不过来时爬取线程等待。调用方提前结束迭代时取消本爬虫的预算，爬取随之停止。
+        爬取中抛出的异常在迭代结束时重新抛出。
+        """
+        crawl = crawl or self.crawl
+        articles = queue.Queue(maxsize=Config.STREAM_QUEUE_SIZE)
+        closed = threading.Event()
+        done = object()
+        errors = []
+        
+        def sink(article_data):
+            while not closed.is_set():
+                try:
+                    articles.put(article_data, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        
+        def produce():
+            try:
+                crawl(keywords)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                sink(done)
+        
+        self._sink = sink
+        thread = threading.Thread(target=produce, name=f"{type(self).__name__}-stream", daemon=True)
+        thread.start()
+        try:
+            while True:
+                article_data = articles.get()
+                if article_data is done:
+                    break
+                yield article_data
+            thread.join()
+            if errors:
+                raise errors[0]
+        finally:
+            if thread.is_alive():
+                closed.set()
+                self.budget.cancel('stream_closed')
+    
+    def reextract(self, html: str, article: Dict) -> Optional[Dict]:
+        """用当前的提取逻辑重新处理已保存的文章页面，返回新的文章数据
+        
+        文章不是从单个页面提取的（列表页、订阅源条目等）时返回None
+        """
+        return None
+    
     @abstractmethod
     def crawl(self, keywords: List[str]) -> List[Dict]:
         """爬取文章的具体实现"""
         pass
     
     def get_articles(self) -> List[Dict]:
-        """获取爬取的文章"""
+        """获取爬取的文章（流式爬取时为空）"""
         return self.articles.copy() 
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+抓取预算
+限制一次运行（以及其中每个爬虫）的请求数、下载字节数和耗时，由抓取引擎在发出请求前检查；
+预算用尽后新的请求立即返回，爬虫保留已获取的文章并记录被截断的原因
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from config import Config
+
+
+class CrawlBudget:
+    """可嵌套的抓取预算：爬虫预算的父预算是整次运行的预算，任一层用尽即停止
+
+    各上限为 None 时不限制。
+    """
+
+    def __init__(self, name: str = '', max_requests: Optional[int] = None, max_bytes: Optional[int] = None,
+                 max_seconds: Optional[float] = None, parent: Optional['CrawlBudget'] = None):
+        self.name = name
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.parent = parent
+        self.requests = 0
+        self.bytes = 0
+        self.started_at = time.time()
+        self.truncated: Optional[str] = None
+        self.cancelled: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, name: str, parent: Optional['CrawlBudget'] = None) -> 'CrawlBudget':
+        """按 Config.CRAWLER_BUDGETS 创建爬虫预算"""
+        return cls(name, parent=parent, **Config.CRAWLER_BUDGETS.get(name, {}))
+
+    def elapsed(self) -> float:
+        return time.time() - self.started_at
+
+    def _own_exhausted(self) -> Optional[str]:
+        # 调用方持有 self._lock
+        if self.cancelled:
+            return self.cancelled
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            return 'max_requests'
+        if self.max_bytes is not None and self.bytes >= self.max_bytes:
+            return 'max_bytes'
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            return 'max_seconds'
+        return None
+
+    def exhausted(self) -> Optional[str]:
+        """预算已用尽时返回原因（如 'run.max_seconds'），否则返回None"""
+        with self._lock:
+            reason = self._own_exhausted()
+            if reason:
+                reason = f"{self.name}.{reason}" if self.name else reason
+                self.truncated = self.truncated or reason
+                return reason
+        if self.parent is not None:
+            reason = self.parent.exhausted()
+            if reason:
+                with self._lock:
+                    self.truncated = self.truncated or reason
+                return reason
+        return None
+
+    def try_acquire(self) -> Optional[str]:
+        """为一次请求扣减预算；预算不足时不扣减并返回原因
+
+        先检查整条预算链再统一扣减，并发请求不会超出请求数上限。
+        """
+        chain = []
+        budget = self
+        while budget is not None:
+            chain.append(budget)
+            budget = budget.parent
+        for budget in chain:
+            budget._lock.acquire()
+        try:
+            for budget in chain:
+                reason = budget._own_exhausted()
+                if reason:
+                    reason = f"{budget.name}.{reason}" if budget.name else reason
+                    for owner in chain:
+                        owner.truncated = owner.truncated or reason
+                    return reason
+            for budget in chain:
+                budget.requests += 1
+            return None
+        finally:
+            for budget in reversed(chain):
+                budget._lock.release()
+
+    def cancel(self, reason: str = 'cancelled'):
+        """立即用尽预算（如调用方不再需要结果），之后的请求按 reason 截断"""
+        with self._lock:
+            self.cancelled = self.cancelled or reason
+    
+    def add_bytes(self, size: int):
+        """记录下载的字节数（字节数上限在下一次请求前检查）"""
+        budget = self
+        while budget is not None:
+            with budget._lock:
+                budget.bytes += size
+            budget = budget.parent
+
+    def get_usage(self) -> Dict:
+        """已用的请求数、字节数、耗时，以及是否被截断"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'requests': self.requests,
+                'bytes': self.bytes,
+                'seconds': round(self.elapsed(), 1),
+                'truncated': self.truncated,
+            }
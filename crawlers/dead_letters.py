@@ -0,0 +1,66 @@
+"""
+死信队列
+爬虫抓取失败（重试后仍失败、非404/410）的页面记入数据库，之后的运行按指数退避重试，
+超过次数上限后放弃
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import Config
+
+
+class DeadLetterQueue:
+    """一个爬虫的失败页面"""
+
+    def __init__(self, db, crawler: str):
+        self.db = db
+        self.crawler = crawler
+        # 队列中的URL及其失败次数，抓取成功时据此判断是否需要移除
+        self._attempts = {row['url']: row['attempts'] for row in db.get_dead_letters(crawler)}
+        self._lock = threading.Lock()
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        """第 attempts 次失败后到下次重试的间隔"""
+        minutes = Config.DEAD_LETTER_RETRY_MINUTES * 2 ** (attempts - 1)
+        return timedelta(minutes=min(minutes, Config.DEAD_LETTER_MAX_RETRY_HOURS * 60))
+
+    def record_failure(self, url: str, source: str = '', error: str = '', now: Optional[datetime] = None):
+        """记录一次抓取失败，超过次数上限时放弃该页面"""
+        now = now or datetime.now()
+        with self._lock:
+            attempts = self._attempts.get(url, 0) + 1
+            if attempts > Config.DEAD_LETTER_MAX_ATTEMPTS:
+                self._attempts.pop(url, None)
+            else:
+                self._attempts[url] = attempts
+        if attempts > Config.DEAD_LETTER_MAX_ATTEMPTS:
+            print(f"页面连续失败 {attempts - 1} 次，放弃重试: {url}")
+            self.db.delete_dead_letter(url)
+            return
+        self.db.save_dead_letter({
+            'url': url,
+            'crawler': self.crawler,
+            'source': source,
+            'error': (error or '')[:500],
+            'attempts': attempts,
+            'next_retry': (now + self.retry_delay(attempts)).isoformat(),
+            'first_failed': now.isoformat(),
+            'last_failed': now.isoformat(),
+        })
+
+    def resolve(self, url: str):
+        """页面已抓取成功，从队列中移除"""
+        with self._lock:
+            if self._attempts.pop(url, None) is None:
+                return
+        self.db.delete_dead_letter(url)
+
+    def due(self, limit: int = Config.DEAD_LETTER_RETRY_LIMIT, now: Optional[datetime] = None) -> List[Dict]:
+        """到了重试时间的页面"""
+        return self.db.get_dead_letters(self.crawler, (now or datetime.now()).isoformat(), limit)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._attempts)
@@ -0,0 +1,70 @@
+"""
+订阅源增量状态
+每个订阅源保存已处理条目的ID、最新条目的发布时间（高水位线）和HTTP校验信息，
+下次轮询时发送条件请求，只处理新条目，已处理条目不再抓取全文
+"""
+
+import calendar
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from config import Config
+
+
+class FeedState:
+    """单个订阅源的增量状态"""
+
+    def __init__(self, feed_url: str, etag: str = '', last_modified: str = '',
+                 last_published: Optional[float] = None, entry_ids: Optional[List[str]] = None):
+        self.feed_url = feed_url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.last_published = last_published
+        self.entry_ids = list(entry_ids or [])
+        self._known = set(self.entry_ids)
+
+    @staticmethod
+    def entry_id(entry) -> str:
+        """条目标识：优先使用 guid/id，没有时使用链接"""
+        return entry.get('id') or entry.get('link') or ''
+
+    @staticmethod
+    def entry_timestamp(entry) -> Optional[float]:
+        """条目的发布（或更新）时间戳，订阅源未提供时返回None"""
+        parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        return float(calendar.timegm(parsed)) if parsed else None
+
+    def is_new(self, entry) -> bool:
+        """条目是否未处理过
+
+        ID 列表只保留最近的条目，更早的条目靠高水位线识别；
+        与高水位线同一时刻发布的条目仍按ID判断。
+        """
+        if self.entry_id(entry) in self._known:
+            return False
+        published = self.entry_timestamp(entry)
+        return published is None or self.last_published is None or published >= self.last_published
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """构造条件请求头"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def advance(self, entries: Iterable, headers: Optional[Mapping[str, str]] = None,
+                max_ids: int = Config.FEED_STATE_MAX_ENTRY_IDS):
+        """记录本次已处理的条目和响应的校验信息"""
+        # 截断时保留最新的条目；没有时间的条目只能靠ID识别，排在最前
+        entries = sorted(entries, key=lambda entry: -(self.entry_timestamp(entry) or float('inf')))
+        ids = [self.entry_id(entry) for entry in entries]
+        self.entry_ids = list(dict.fromkeys([i for i in ids if i] + self.entry_ids))[:max_ids]
+        self._known = set(self.entry_ids)
+
+        timestamps = [t for t in (self.entry_timestamp(entry) for entry in entries) if t is not None]
+        if timestamps:
+            self.last_published = max(timestamps + ([self.last_published] if self.last_published else []))
+        if headers:
+            self.etag = headers.get('ETag', '') or self.etag
+            self.last_modified = headers.get('Last-Modified', '') or self.last_modified
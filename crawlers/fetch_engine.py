@@ -0,0 +1,397 @@
+"""
+异步抓取引擎
+所有爬虫通过它批量提交URL，按全局和单主机并发上限并发抓取，结果按完成顺序返回
+"""
+
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO, Any, AsyncIterator, Callable, Dict, Iterator, List, Mapping, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from config import Config
+from .http_cache import CacheEntry, HttpCache, get_http_cache
+from .http_client import create_session, get_shared_session
+from .politeness import PolitenessScheduler, get_politeness_scheduler
+from .retry_policy import CircuitBreaker, RetryPolicy, get_circuit_breaker
+from .http_archive import HttpArchive, WarcWriter, install_replay_adapter
+from .raw_store import RawPageStore, get_raw_page_store
+from .crawl_budget import CrawlBudget
+
+
+class ResponseRejected(Exception):
+    """响应因类型或大小被主动放弃，不重试"""
+
+    def __init__(self, reason: str, detail: str = ''):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+
+
+class _BodyStream(io.RawIOBase):
+    """边下载边读取的响应体（已按 Content-Encoding 解压），超过大小上限时中止"""
+
+    def __init__(self, raw, max_bytes: int):
+        self.raw = raw
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._pending = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._pending or self.raw.read(len(buffer), decode_content=True)
+        # 部分urllib3版本解压后返回的数据可能多于请求的长度
+        data, self._pending = data[:len(buffer)], data[len(buffer):]
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise ResponseRejected('too_large', f"超过 {self.max_bytes} 字节")
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class FetchResult:
+    """单个URL的抓取结果
+
+    流式处理的请求没有 text，data 为处理函数的返回值。
+    """
+
+    def __init__(self, url: str, text: Optional[str] = None, status_code: Optional[int] = None,
+                 error: Optional[str] = None, elapsed: float = 0.0, from_cache: bool = False,
+                 skip_reason: Optional[str] = None, size: int = 0,
+                 headers: Optional[Mapping[str, str]] = None, data: Any = None):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+        self.error = error
+        self.elapsed = elapsed
+        self.from_cache = from_cache
+        self.skip_reason = skip_reason
+        self.size = size
+        self.headers = headers or {}
+        self.data = data
+
+    @property
+    def ok(self) -> bool:
+        return self.text is not None or self.data is not None
+
+
+class AsyncFetchEngine:
+    """基于asyncio的抓取引擎
+
+    事件循环运行在独立的后台线程中，阻塞的HTTP请求交给线程池执行，
+    同步代码通过 fetch_one / fetch_many 提交任务并等待结果。
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None,
+                 max_concurrency: int = Config.MAX_CONCURRENT_REQUESTS,
+                 per_host_concurrency: int = Config.MAX_CONCURRENT_REQUESTS_PER_HOST,
+                 host_concurrency: Optional[Dict[str, int]] = None,
+                 timeout: float = Config.REQUEST_TIMEOUT,
+                 cache: Optional[HttpCache] = None,
+                 politeness: Optional[PolitenessScheduler] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 max_response_bytes: int = Config.MAX_RESPONSE_BYTES,
+                 max_download_seconds: float = Config.MAX_DOWNLOAD_SECONDS,
+                 allowed_content_types: Optional[List[str]] = None,
+                 recorder: Optional[WarcWriter] = None,
+                 raw_store: Optional[RawPageStore] = None,
+                 max_stream_bytes: int = Config.MAX_STREAM_BYTES):
+        self.session = session or create_session()
+        self.recorder = recorder
+        self.raw_store = raw_store
+        self.cache = cache
+        self.politeness = politeness
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.max_response_bytes = max_response_bytes
+        self.max_download_seconds = max_download_seconds
+        self.max_stream_bytes = max_stream_bytes
+        self.allowed_content_types = allowed_content_types or Config.ALLOWED_CONTENT_TYPES
+        self.skip_stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        # 按主机单独设置的并发上限（不含端口）
+        self.host_concurrency = dict(Config.MAX_CONCURRENT_REQUESTS_BY_HOST
+                                     if host_concurrency is None else host_concurrency)
+        self.timeout = timeout
+
+        self._loop = None
+        self._executor = None
+        self._start_lock = threading.Lock()
+        self._global_semaphore = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _ensure_started(self):
+        """按需启动后台事件循环"""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                thread_name_prefix='fetch')
+            self._loop = asyncio.new_event_loop()
+            loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+            loop_thread.start()
+
+    def _submit(self, coro):
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _get_host_semaphore(self, host: str) -> asyncio.Semaphore:
+        # 只在事件循环线程中调用，无需加锁
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            limit = self.host_concurrency.get(host.lower().split(':')[0], self.per_host_concurrency)
+            semaphore = asyncio.Semaphore(limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    def _request(self, url: str, extra_headers: Optional[Dict[str, str]] = None,
+                 consume: Optional[Callable[[IO[bytes]], Any]] = None,
+                 cached: Optional[CacheEntry] = None) -> FetchResult:
+        """在线程池中执行的阻塞请求，cached 为 fetch 查到的缓存记录，用于条件请求"""
+        start = time.time()
+        if consume is not None:
+            return self._request_stream(url, extra_headers, consume, start)
+        headers = cached.conditional_headers() if cached else {}
+        headers.update(extra_headers or {})
+
+        with self.session.get(url, timeout=self.timeout, headers=headers, stream=True) as response:
+            if cached and response.status_code == 304:
+                self.cache.record('revalidated')
+                self.cache.refresh(url, response.headers)
+                if self.recorder:
+                    # 归档中保存完整内容，回放时不依赖本地缓存
+                    self.recorder.write_response(url, 200, 'OK', {'Content-Type': 'text/html; charset=utf-8'},
+                                                 cached.body.encode('utf-8'))
+                if self.raw_store:
+                    self.raw_store.store(url, cached.body)
+                return FetchResult(url, text=cached.body, status_code=304,
+                                   elapsed=time.time() - start, from_cache=True, headers=response.headers)
+
+            if response.status_code == 304:
+                # 调用方自带校验信息（如订阅源状态）而本地没有缓存：内容未变化，没有响应体
+                if self.recorder:
+                    self.recorder.write_response(url, 304, response.reason, response.headers, b'')
+                return FetchResult(url, status_code=304, elapsed=time.time() - start, headers=response.headers)
+
+            try:
+                response.raise_for_status()
+                self._check_headers(response)
+            except (requests.HTTPError, ResponseRejected):
+                # 错误和被拒绝的响应只录制状态和响应头，回放时按同样的规则处理
+                if self.recorder:
+                    self.recorder.write_response(url, response.status_code, response.reason,
+                                                 response.headers, b'')
+                raise
+            text, size = self._read_body(response, start)
+            if self.recorder:
+                self.recorder.write_response(url, response.status_code, response.reason,
+                                             response.headers, response.content)
+
+        if self.cache:
+            self.cache.record('misses')
+            self.cache.store(url, text, response.headers)
+        if self.raw_store:
+            self.raw_store.store(url, text)
+        return FetchResult(url, text=text, status_code=response.status_code,
+                           elapsed=time.time() - start, size=size, headers=response.headers)
+
+    def _request_stream(self, url: str, extra_headers: Optional[Dict[str, str]],
+                        consume: Callable[[IO[bytes]], Any], start: float) -> FetchResult:
+        """把响应体作为文件对象交给 consume 边下载边处理
+
+        内容类型不限（站点地图常以 gzip 文件提供），响应不进入缓存、归档和原始页面存储。
+        """
+        with self.session.get(url, timeout=self.timeout, headers=extra_headers or {}, stream=True) as response:
+            if response.status_code == 304:
+                return FetchResult(url, status_code=304, elapsed=time.time() - start, headers=response.headers)
+            response.raise_for_status()
+            content_length = response.headers.get('Content-Length', '')
+            if content_length.isdigit() and int(content_length) > self.max_stream_bytes:
+                raise ResponseRejected('too_large', f"Content-Length {content_length}")
+            body = _BodyStream(response.raw, self.max_stream_bytes)
+            data = consume(io.BufferedReader(body))
+        return FetchResult(url, status_code=response.status_code, elapsed=time.time() - start,
+                           size=body.size, headers=response.headers, data=data)
+
+    def _check_headers(self, response: requests.Response):
+        """根据响应头提前放弃非HTML/XML内容和超大响应"""
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type and content_type not in self.allowed_content_types:
+            raise ResponseRejected('content_type', content_type)
+
+        content_length = response.headers.get('Content-Length', '')
+        if content_length.isdigit() and int(content_length) > self.max_response_bytes:
+            raise ResponseRejected('too_large', f"Content-Length {content_length}")
+
+    def _read_body(self, response: requests.Response, start: float):
+        """流式读取响应体，超过大小或时间上限时中止"""
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > self.max_response_bytes:
+                raise ResponseRejected('too_large', f"超过 {self.max_response_bytes} 字节")
+            if time.time() - start > self.max_download_seconds:
+                raise ResponseRejected('too_slow', f"下载超过 {self.max_download_seconds} 秒")
+            chunks.append(chunk)
+
+        # 交还给requests按原有规则解码（含编码探测）
+        response._content = b''.join(chunks)
+        return response.text, size
+
+    def _record_skip(self, reason: str):
+        with self._stats_lock:
+            self.skip_stats[reason] = self.skip_stats.get(reason, 0) + 1
+
+    def get_skip_stats(self) -> Dict[str, int]:
+        """获取按原因统计的跳过次数"""
+        with self._stats_lock:
+            return dict(self.skip_stats)
+
+    async def fetch(self, url: str, retries: int = 3, headers: Optional[Dict[str, str]] = None,
+                    budget: Optional[CrawlBudget] = None,
+                    consume: Optional[Callable[[IO[bytes]], Any]] = None,
+                    revalidate: bool = False) -> FetchResult:
+        """抓取单个URL，失败时重试
+
+        headers 为附加请求头（如调用方保存的条件请求校验信息）；
+        budget 为调用方的抓取预算，每次实际发出请求前扣减，用尽后直接返回；
+        consume 用于流式处理大响应：在抓取线程中以响应体文件对象调用，返回值放在结果的 data 中；
+        revalidate 为 True 时不使用未过期的缓存，总是发出（条件）请求，用于轮询间隔短于缓存有效期的订阅源
+        """
+        host = urlparse(url).netloc
+        loop = asyncio.get_running_loop()
+        error = None
+
+        # 每次抓取只查一次缓存：未过期时直接返回，不占用主机的请求配额；否则用于条件请求
+        cached = None
+        if self.cache and consume is None:
+            cached = await loop.run_in_executor(self._executor, self.cache.get, url)
+            if cached and cached.is_fresh() and not revalidate:
+                self.cache.record('hits')
+                return FetchResult(url, text=cached.body, status_code=200, from_cache=True)
+
+        status_code = None
+        for attempt in range(retries):
+            if self.circuit_breaker and not self.circuit_breaker.allow(host):
+                return FetchResult(url, status_code=status_code,
+                                   error=f"主机已熔断: {self.circuit_breaker.get_reason(host)}")
+
+            host_semaphore = self._get_host_semaphore(host)
+            try:
+                # 先在主机令牌桶中排队，等待期间不占用并发名额
+                if self.politeness:
+                    await self.politeness.acquire(host)
+                async with self._global_semaphore:
+                    async with host_semaphore:
+                        # 排队结束时再扣减预算，排队期间耗尽的预算不再发出请求
+                        exhausted = budget.try_acquire() if budget else None
+                        if exhausted:
+                            raise ResponseRejected('budget', exhausted)
+                        result = await loop.run_in_executor(self._executor, self._request, url, headers,
+                                                            consume, cached)
+                if budget:
+                    budget.add_bytes(result.size)
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_success(host)
+                return result
+            except ResponseRejected as e:
+                if self.circuit_breaker and e.reason != 'budget':
+                    self.circuit_breaker.record_success(host)
+                self._record_skip(e.reason)
+                if e.reason != 'budget':
+                    print(f"跳过 {url}: {e}")
+                return FetchResult(url, error=str(e), skip_reason=e.reason)
+            except Exception as e:
+                error = str(e)
+                print(f"获取页面失败 {url}: {e}")
+                response = getattr(e, 'response', None)
+                status_code = response.status_code if response is not None else None
+
+                decision = self.retry_policy.classify(e)
+                if self.circuit_breaker:
+                    if decision.host_failure:
+                        self.circuit_breaker.record_failure(host, error)
+                    elif response is not None:
+                        # 404 等只说明该页面有问题，主机能正常响应，与成功一样中断连续失败
+                        self.circuit_breaker.record_success(host)
+                if decision.retry_after is not None and self.politeness:
+                    self.politeness.defer(host, decision.retry_after)
+                if not decision.retryable or attempt >= retries - 1:
+                    break
+                await asyncio.sleep(self.retry_policy.backoff(attempt, decision.retry_after))
+
+        return FetchResult(url, status_code=status_code, error=error)
+
+    async def fetch_batch(self, urls: List[str], retries: int = 3,
+                          budget: Optional[CrawlBudget] = None) -> AsyncIterator[FetchResult]:
+        """批量抓取（异步接口），按完成顺序产出结果"""
+        tasks = [asyncio.ensure_future(self.fetch(url, retries, budget=budget)) for url in dict.fromkeys(urls)]
+        for task in asyncio.as_completed(tasks):
+            yield await task
+
+    def fetch_one(self, url: str, retries: int = 3, headers: Optional[Dict[str, str]] = None,
+                  budget: Optional[CrawlBudget] = None,
+                  consume: Optional[Callable[[IO[bytes]], Any]] = None,
+                  revalidate: bool = False) -> FetchResult:
+        """同步抓取单个URL"""
+        return self._submit(self.fetch(url, retries, headers, budget, consume, revalidate)).result()
+
+    def fetch_many(self, urls: List[str], retries: int = 3,
+                   budget: Optional[CrawlBudget] = None) -> Iterator[FetchResult]:
+        """同步批量抓取，按完成顺序返回结果"""
+        futures = [self._submit(self.fetch(url, retries, budget=budget)) for url in dict.fromkeys(urls)]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def close(self):
+        """停止事件循环并释放线程池"""
+        with self._start_lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._executor.shutdown(wait=False)
+            self._loop = None
+            self._executor = None
+            self._global_semaphore = None
+            self._host_semaphores = {}
+
+
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_shared_fetch_engine() -> AsyncFetchEngine:
+    """获取进程内共享的抓取引擎，所有爬虫共用连接池、缓存、限速和熔断状态"""
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            _shared_engine = _create_shared_engine()
+        return _shared_engine
+
+
+def _create_shared_engine() -> AsyncFetchEngine:
+    """按 Config.HTTP_ARCHIVE_MODE 创建正常、录制或回放模式的引擎"""
+    mode = Config.HTTP_ARCHIVE_MODE
+    session = get_shared_session()
+    if mode == 'replay':
+        # 回放时不限速、不走HTTP缓存，网络耗时由注入的延迟模拟
+        install_replay_adapter(session, HttpArchive.load(Config.HTTP_ARCHIVE_PATH), Config.HTTP_REPLAY_LATENCY)
+        return AsyncFetchEngine(session, circuit_breaker=get_circuit_breaker())
+    recorder = WarcWriter(Config.HTTP_ARCHIVE_PATH) if mode == 'record' else None
+    return AsyncFetchEngine(session,
+                            cache=get_http_cache(),
+                            politeness=get_politeness_scheduler(),
+                            circuit_breaker=get_circuit_breaker(),
+                            recorder=recorder,
+                            raw_store=get_raw_page_store())
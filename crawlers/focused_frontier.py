@@ -0,0 +1,166 @@
+"""
+聚焦抓取
+按锚文本、URL路径词和链接周围文本给入口页（新闻首页、厂商栏目页）上的链接打相关性分，
+得分最高的链接优先抓取，逐层展开到配置的深度；低于阈值的链接不抓取
+"""
+
+import heapq
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import unquote, urljoin, urlsplit
+
+from bs4 import BeautifulSoup, Tag
+
+from config import Config
+from .html_parser import iter_text
+from .keyword_matcher import get_keyword_matcher
+from .url_canonical import canonicalize_url
+
+# 常见的文章链接位置，命中时加少量分数（只用于相关链接之间排序）
+ARTICLE_LINK_SELECTOR = ', '.join([
+    'a[href*="/article/"]', 'a[href*="/news/"]', 'a[href*="/story/"]', 'a[href*="/post/"]',
+    'h1 a', 'h2 a', 'h3 a', '.article-title a', '.news-title a', '.post-title a'
+])
+
+# 周围文本取自最近的块级祖先，最多向上找几层、取多少字符
+_CONTEXT_TAGS = {'li', 'p', 'article', 'section', 'td', 'dd', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+_CONTEXT_LEVELS = 3
+_CONTEXT_CHARS = 300
+
+_PATH_SEPARATORS = re.compile(r'[/\-_.+=&?]+')
+
+
+class LinkScorer:
+    """链接相关性打分
+
+    各部分按命中的不同关键词数乘以权重相加；周围文本不含锚文本本身，避免重复计分。
+    只保存关键词，匹配器在使用时获取，可随爬虫发送到解析进程。
+    """
+
+    def __init__(self, keywords: Sequence[str], weights: Optional[Dict[str, float]] = None,
+                 min_score: float = Config.FOCUSED_MIN_SCORE):
+        self.keywords = list(keywords)
+        self.weights = dict(Config.FOCUSED_LINK_WEIGHTS, **(weights or {}))
+        self.min_score = min_score
+
+    def _hits(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(get_keyword_matcher(self.keywords).matched_keywords(text, self.keywords))
+
+    def score(self, url: str, anchor: str = '', context: str = '', article_like: bool = False) -> float:
+        """链接的相关性得分"""
+        parts = urlsplit(url)
+        path = unquote(parts.path + ' ' + parts.query)
+        score = (self.weights['anchor'] * self._hits(anchor)
+                 + self.weights['url'] * self._hits(_PATH_SEPARATORS.sub(' ', path))
+                 + self.weights['context'] * self._hits(context))
+        if article_like:
+            score += self.weights['article']
+        return score
+
+
+class ScoredLink:
+    """页面上的一个候选链接"""
+
+    def __init__(self, url: str, score: float, anchor: str = '', context: str = ''):
+        self.url = url
+        self.score = score
+        self.anchor = anchor
+        self.context = context
+
+
+def _context_text(link: Tag, anchor: str) -> str:
+    node = link.parent
+    for _ in range(_CONTEXT_LEVELS):
+        if node is None or node.name in ('body', 'html', '[document]'):
+            return ''
+        if node.name in _CONTEXT_TAGS:
+            break
+        node = node.parent
+    else:
+        return ''
+    # 栏目页的块级容器可能很大，只取开头的一段文本
+    chunks, length = [], 0
+    for text in iter_text(node):
+        chunks.append(text)
+        length += len(text)
+        if length >= _CONTEXT_CHARS + len(anchor):
+            break
+    return ' '.join(''.join(chunks).replace(anchor, ' ', 1).split())[:_CONTEXT_CHARS]
+
+
+def _same_site(host: str, site: str) -> bool:
+    site = site[4:] if site.startswith('www.') else site
+    return host == site or host.endswith('.' + site)
+
+
+def extract_scored_links(soup: BeautifulSoup, base_url: str, scorer: LinkScorer,
+                         same_site: bool = True) -> List[ScoredLink]:
+    """提取页面上所有链接并打分，同一URL取最高分，按得分从高到低返回
+
+    same_site 为 True 时只保留与 base_url 同一站点（含子域名）的链接。
+    """
+    article_links = {id(element) for element in soup.select(ARTICLE_LINK_SELECTOR)}
+    site = (urlsplit(base_url).hostname or '').lower()
+    # 按规范URL去重，保留原始URL用于抓取
+    links: Dict[str, ScoredLink] = {}
+    for element in soup.find_all('a', href=True):
+        url = urljoin(base_url, element['href'])
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or (same_site and not _same_site(parts.hostname or '', site)):
+            continue
+        anchor = ' '.join(element.get_text(' ', strip=True).split())
+        context = _context_text(element, anchor)
+        score = scorer.score(url, anchor, context, id(element) in article_links)
+        key = canonicalize_url(url)
+        if key not in links or score > links[key].score:
+            links[key] = ScoredLink(url, score, anchor, context)
+    return sorted(links.values(), key=lambda link: -link.score)
+
+
+class FocusedFrontier:
+    """单个站点的聚焦抓取队列：相关链接按得分最优优先出队，每个URL只入队一次"""
+
+    def __init__(self, min_score: float = Config.FOCUSED_MIN_SCORE):
+        self.min_score = min_score
+        self._heap: List[Tuple[float, int, int, ScoredLink]] = []
+        self._seen: Set[str] = set()
+        self._counter = 0
+        self.stats = {'links': 0, 'queued': 0, 'irrelevant': 0, 'fetched': 0}
+
+    def mark_seen(self, url: str):
+        """登记已抓取的页面（如入口页），之后不再入队"""
+        self._seen.add(canonicalize_url(url))
+
+    def add_links(self, links: Iterable[ScoredLink], depth: int) -> int:
+        """加入在深度 depth 发现的链接，返回新入队的数量"""
+        queued = 0
+        for link in links:
+            key = canonicalize_url(link.url)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self.stats['links'] += 1
+            if link.score < self.min_score:
+                self.stats['irrelevant'] += 1
+            else:
+                self._counter += 1
+                heapq.heappush(self._heap, (-link.score, self._counter, depth, link))
+                queued += 1
+        self.stats['queued'] += queued
+        return queued
+
+    def pop_batch(self, size: int) -> List[Tuple[ScoredLink, int]]:
+        """取出得分最高的至多 size 个链接及其深度"""
+        batch = []
+        while self._heap and len(batch) < size:
+            _, _, depth, link = heapq.heappop(self._heap)
+            batch.append((link, depth))
+        return batch
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats, pending=len(self._heap))
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+HTML解析
+统一创建 BeautifulSoup 对象，解析后端由 Config.HTML_PARSER 指定（默认 lxml）；
+lxml 未安装时退回标准库 html.parser。CSS选择器由 soupsieve 提供，与后端无关
+"""
+
+import logging
+from typing import Iterator, Optional, Union
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from bs4.builder import builder_registry
+
+from config import Config
+
+SUPPORTED_PARSERS = ('lxml', 'html.parser')
+FALLBACK_PARSER = 'html.parser'
+
+# 不计入正文的标签（内容是脚本/样式源码）
+_SKIP_TAGS = {'script', 'style'}
+
+_warned_parsers = set()
+
+
+def get_parser_backend(name: Optional[str] = None) -> str:
+    """返回实际可用的解析后端名称"""
+    name = name or Config.HTML_PARSER
+    if name not in SUPPORTED_PARSERS:
+        raise ValueError(f"不支持的HTML解析后端: {name}，可选: {', '.join(SUPPORTED_PARSERS)}")
+    if builder_registry.lookup(name) is None:
+        if name not in _warned_parsers:
+            _warned_parsers.add(name)
+            logging.warning(f"HTML解析后端 {name} 未安装，改用 {FALLBACK_PARSER}")
+        return FALLBACK_PARSER
+    return name
+
+
+def parse_html(html: Union[str, bytes, BeautifulSoup], parser: Optional[str] = None) -> BeautifulSoup:
+    """解析HTML，已解析的文档原样返回"""
+    if isinstance(html, BeautifulSoup):
+        return html
+    return BeautifulSoup(html or '', get_parser_backend(parser))
+
+
+def iter_text(node: Union[Tag, NavigableString]) -> Iterator[str]:
+    """按文档顺序返回节点下的文本（跳过脚本、样式和注释），不修改文档树"""
+    if isinstance(node, NavigableString):
+        yield str(node)
+        return
+    for element in node.descendants:
+        # 只取普通文本和CDATA；script/style 内只有文本，判断父节点即可
+        if type(element) in (NavigableString, CData) and element.parent.name not in _SKIP_TAGS:
+            yield element
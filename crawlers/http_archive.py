@@ -0,0 +1,219 @@
+"""
+HTTP录制与回放
+录制模式下抓取引擎把每个请求/响应写入 WARC/1.0 归档（每条记录单独gzip压缩）；
+回放模式下用传输适配器从归档返回响应，可注入固定延迟，用于离线、可重复的抓取基准测试
+"""
+
+import gzip
+import io
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+WARC_VERSION = 'WARC/1.0'
+
+# 响应体已由requests解码，这些头不再适用
+_HOP_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive'}
+
+
+class WarcRecord:
+    """一条WARC记录"""
+
+    def __init__(self, headers: Dict[str, str], payload: bytes):
+        self.headers = headers
+        self.payload = payload
+
+    @property
+    def type(self) -> str:
+        return self.headers.get('WARC-Type', '')
+
+    @property
+    def target_uri(self) -> str:
+        return self.headers.get('WARC-Target-URI', '')
+
+
+def _warc_date() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _record_bytes(headers: Dict[str, str], payload: bytes) -> bytes:
+    lines = [WARC_VERSION] + [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Content-Length: {len(payload)}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8') + payload + b'\r\n\r\n'
+
+
+class WarcWriter:
+    """线程安全的WARC写入器，以追加方式写入"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats = {'responses': 0, 'bytes': 0}
+
+    def write_response(self, url: str, status_code: int, reason: str,
+                       headers: Mapping[str, str], body: bytes):
+        """写入一对 request/response 记录"""
+        response_id = f"<urn:uuid:{uuid.uuid4()}>"
+        date = _warc_date()
+        header_lines = ''.join(f"{name}: {value}\r\n" for name, value in headers.items()
+                               if name.lower() not in _HOP_HEADERS)
+        http_response = (f"HTTP/1.1 {status_code} {reason or ''}\r\n{header_lines}"
+                         f"Content-Length: {len(body)}\r\n\r\n").encode('utf-8') + body
+        http_request = f"GET {url} HTTP/1.1\r\n\r\n".encode('utf-8')
+
+        response_record = _record_bytes({
+            'WARC-Type': 'response',
+            'WARC-Record-ID': response_id,
+            'WARC-Date': date,
+            'WARC-Target-URI': url,
+            'Content-Type': 'application/http; msgtype=response',
+        }, http_response)
+        request_record = _record_bytes({
+            'WARC-Type': 'request',
+            'WARC-Record-ID': f"<urn:uuid:{uuid.uuid4()}>",
+            'WARC-Date': date,
+            'WARC-Target-URI': url,
+            'WARC-Concurrent-To': response_id,
+            'Content-Type': 'application/http; msgtype=request',
+        }, http_request)
+
+        data = gzip.compress(response_record) + gzip.compress(request_record)
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                f.write(data)
+            self._stats['responses'] += 1
+            self._stats['bytes'] += len(body)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+def read_warc(path: str) -> Iterator[WarcRecord]:
+    """依次读取归档中的记录（多个gzip成员连续读取）"""
+    with gzip.open(path, 'rb') as f:
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(b'WARC/'):
+                raise ValueError(f"无效的WARC记录头: {line[:40]!r}")
+            headers = {}
+            for raw in iter(f.readline, b''):
+                raw = raw.rstrip(b'\r\n')
+                if not raw:
+                    break
+                name, _, value = raw.decode('utf-8').partition(':')
+                headers[name.strip()] = value.strip()
+            payload = f.read(int(headers.get('Content-Length', 0)))
+            yield WarcRecord(headers, payload)
+
+
+def parse_http_response(payload: bytes) -> Tuple[int, str, CaseInsensitiveDict, bytes]:
+    """解析 application/http 响应记录"""
+    head, _, body = payload.partition(b'\r\n\r\n')
+    lines = head.decode('iso-8859-1').split('\r\n')
+    _, status, reason = (lines[0].split(' ', 2) + [''])[:3]
+    headers = CaseInsensitiveDict()
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip()] = value.strip()
+    return int(status), reason, headers, body
+
+
+def _archive_key(url: str) -> str:
+    """与requests发送时一致的URL形式（非ASCII字符百分号编码）"""
+    try:
+        return requests.Request('GET', url).prepare().url
+    except requests.RequestException:
+        return url
+
+
+class HttpArchive:
+    """按URL索引的已录制响应，同一URL以最后一次录制为准"""
+
+    def __init__(self):
+        self.responses: Dict[str, Tuple[int, str, CaseInsensitiveDict, bytes]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> 'HttpArchive':
+        archive = cls()
+        for record in read_warc(path):
+            if record.type == 'response':
+                archive.responses[_archive_key(record.target_uri)] = parse_http_response(record.payload)
+        return archive
+
+    def get(self, url: str) -> Optional[Tuple[int, str, CaseInsensitiveDict, bytes]]:
+        return self.responses.get(_archive_key(url))
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+
+class ReplayAdapter(BaseAdapter):
+    """从归档返回响应的传输适配器，归档中没有的URL返回404"""
+
+    def __init__(self, archive: HttpArchive, latency: float = 0.0):
+        super().__init__()
+        self.archive = archive
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'bytes': 0, 'misses': 0}
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.latency > 0:
+            # 模拟网络往返，占用抓取线程的方式与真实请求相同
+            time.sleep(self.latency)
+        recorded = self.archive.get(request.url)
+        if recorded is None:
+            status_code, reason, headers, body = 404, 'Not Archived', CaseInsensitiveDict(), b''
+        else:
+            status_code, reason, headers, body = recorded
+
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['bytes'] += len(body)
+            if recorded is None:
+                self._stats['misses'] += 1
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        if not stream:
+            _ = response.content
+        return response
+
+    def close(self):
+        pass
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {key: 0 for key in self._stats}
+
+
+def install_replay_adapter(session: requests.Session, archive: HttpArchive,
+                           latency: float = 0.0) -> ReplayAdapter:
+    """让会话的所有 http/https 请求改由归档回放"""
+    adapter = ReplayAdapter(archive, latency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return adapter
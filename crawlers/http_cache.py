@@ -0,0 +1,194 @@
+"""
+HTTP条件请求缓存
+在磁盘上保存响应体和校验信息（ETag / Last-Modified），
+再次抓取时发送 If-None-Match / If-Modified-Since，304 视为缓存命中。
+读取缓存不写库：最近访问时间攒成一批再写入，淘汰前先写入，保证按最近访问淘汰
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from config import Config
+
+
+class CacheEntry:
+    """一条缓存记录"""
+
+    def __init__(self, url: str, body: str, etag: str, last_modified: str,
+                 stored_at: float, ttl: float):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.ttl = ttl
+
+    def is_fresh(self) -> bool:
+        """是否仍在有效期内，无需重新验证"""
+        return time.time() - self.stored_at < self.ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """构造条件请求头"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """基于SQLite的HTTP缓存，按最近访问时间淘汰"""
+
+    def __init__(self, db_path: str = Config.HTTP_CACHE_PATH,
+                 max_bytes: int = Config.HTTP_CACHE_MAX_BYTES,
+                 default_ttl: float = Config.HTTP_CACHE_TTL,
+                 access_batch: int = Config.HTTP_CACHE_ACCESS_BATCH):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.access_batch = access_batch
+        self._lock = threading.Lock()
+        # 尚未写库的最近访问时间：url -> 时间戳
+        self._pending_access: Dict[str, float] = {}
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self.init_cache()
+
+    def init_cache(self):
+        """初始化缓存表"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    body TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    size INTEGER DEFAULT 0,
+                    ttl REAL,
+                    stored_at REAL,
+                    last_access REAL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_http_cache_access ON http_cache (last_access)')
+            conn.commit()
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """读取缓存记录，不存在时返回None"""
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            row = conn.execute('''
+                SELECT body, etag, last_modified, stored_at, ttl FROM http_cache WHERE url = ?
+            ''', (url,)).fetchone()
+            if not row:
+                return None
+            self._pending_access[url] = time.time()
+            if len(self._pending_access) >= self.access_batch:
+                self._flush_access(conn)
+                conn.commit()
+        body, etag, last_modified, stored_at, ttl = row
+        return CacheEntry(url, body, etag or '', last_modified or '', stored_at, ttl)
+
+    def store(self, url: str, body: str, headers) -> bool:
+        """保存响应，返回是否写入缓存"""
+        cache_control = headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control:
+            return False
+
+        ttl = self._parse_ttl(cache_control)
+        size = len(body.encode('utf-8'))
+        if size > self.max_bytes:
+            return False
+
+        now = time.time()
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO http_cache
+                (url, body, etag, last_modified, size, ttl, stored_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, body, headers.get('ETag', ''), headers.get('Last-Modified', ''),
+                  size, ttl, now, now))
+            self._pending_access.pop(url, None)
+            self._flush_access(conn)
+            self._evict(conn)
+            conn.commit()
+            self.stats['stores'] += 1
+        return True
+
+    def refresh(self, url: str, headers):
+        """收到304后刷新有效期和校验信息"""
+        cache_control = headers.get('Cache-Control', '').lower()
+        ttl = self._parse_ttl(cache_control)
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                UPDATE http_cache
+                SET stored_at = ?, ttl = ?,
+                    etag = COALESCE(NULLIF(?, ''), etag),
+                    last_modified = COALESCE(NULLIF(?, ''), last_modified)
+                WHERE url = ?
+            ''', (time.time(), ttl, headers.get('ETag', ''), headers.get('Last-Modified', ''), url))
+            conn.commit()
+
+    def record(self, outcome: str):
+        """记录一次命中/未命中"""
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def _parse_ttl(self, cache_control: str) -> float:
+        match = re.search(r'max-age=(\d+)', cache_control)
+        if match:
+            return float(match.group(1))
+        if 'no-cache' in cache_control:
+            return 0.0
+        return self.default_ttl
+
+    def _flush_access(self, conn: sqlite3.Connection):
+        """把内存中的最近访问时间写入数据库（调用方持有 self._lock）"""
+        if self._pending_access:
+            conn.executemany('UPDATE http_cache SET last_access = ? WHERE url = ?',
+                             [(accessed, url) for url, accessed in self._pending_access.items()])
+            self._pending_access.clear()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """总大小超过上限时按最近访问时间淘汰"""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM http_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute('SELECT url, size FROM http_cache ORDER BY last_access ASC').fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM http_cache WHERE url = ?', (url,))
+            total -= size
+            self.stats['evictions'] += 1
+
+    def get_stats(self) -> Dict:
+        """获取命中统计"""
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['revalidated']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute('DELETE FROM http_cache')
+            conn.commit()
+            self._pending_access.clear()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """获取进程内共享的HTTP缓存，未启用时返回None"""
+    global _default_cache
+    if not Config.HTTP_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache()
+        return _default_cache
@@ -0,0 +1,133 @@
+"""
+进程内共享的HTTP连接池
+所有爬虫实例共用一个 requests.Session，复用 keep-alive 连接和TLS会话，并统计连接复用情况
+"""
+
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config import Config
+
+
+class ConnectionStats:
+    """按主机统计请求数与新建连接数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, int]] = {}
+
+    def _host(self, host: str) -> Dict[str, int]:
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = {'requests': 0, 'new_connections': 0}
+            self._hosts[host] = stats
+        return stats
+
+    def record_request(self, host: str):
+        with self._lock:
+            self._host(host)['requests'] += 1
+
+    def record_new_connection(self, host: str):
+        with self._lock:
+            self._host(host)['new_connections'] += 1
+
+    def get_stats(self) -> Dict:
+        """汇总统计，reused 为复用已有连接的请求数"""
+        with self._lock:
+            hosts = {host: dict(stats) for host, stats in self._hosts.items()}
+        total_requests = sum(stats['requests'] for stats in hosts.values())
+        total_connections = sum(stats['new_connections'] for stats in hosts.values())
+        for stats in hosts.values():
+            stats['reused'] = max(0, stats['requests'] - stats['new_connections'])
+        reused = max(0, total_requests - total_connections)
+        return {
+            'requests': total_requests,
+            'new_connections': total_connections,
+            'reused': reused,
+            'reuse_rate': reused / total_requests if total_requests else 0.0,
+            'hosts': hosts
+        }
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+connection_stats = ConnectionStats()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        connection_stats.record_new_connection(self.host)
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        connection_stats.record_new_connection(self.host)
+        return super()._new_conn()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """记录连接复用情况的连接池适配器"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+
+    def send(self, request, *args, **kwargs):
+        connection_stats.record_request(urlparse(request.url).hostname or '')
+        return super().send(request, *args, **kwargs)
+
+
+def create_session(pool_connections: int = Config.HTTP_POOL_CONNECTIONS,
+                   pool_maxsize: int = Config.HTTP_POOL_MAXSIZE,
+                   host_pool_sizes: Optional[Dict[str, int]] = None) -> requests.Session:
+    """创建配置好连接池的会话"""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': Config.USER_AGENT,
+        'Connection': 'keep-alive'
+    })
+
+    # 重试由抓取引擎的重试策略负责，适配器本身不重试
+    adapter = PooledHTTPAdapter(pool_connections=pool_connections,
+                                pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    # 按主机单独设置连接池大小，默认与按主机设置的并发上限一致
+    if host_pool_sizes is None:
+        host_pool_sizes = Config.MAX_CONCURRENT_REQUESTS_BY_HOST
+    for host, size in host_pool_sizes.items():
+        host_adapter = PooledHTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=0)
+        session.mount(f"https://{host}/", host_adapter)
+        session.mount(f"http://{host}/", host_adapter)
+
+    return session
+
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session() -> requests.Session:
+    """获取进程内共享的会话"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
+
+
+def get_connection_stats() -> Dict:
+    """获取连接复用统计"""
+    return connection_stats.get_stats()
@@ -0,0 +1,169 @@
+"""
+多关键词匹配
+所有关键词编译成一个正则（按长度降序的多选分支），对文本只扫描一遍，
+返回每个关键词的全部命中位置；中英文统一大小写（含全角字母）
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import Config
+
+# 全角字母、数字和斜杠；中文标点（，。！？等）不需要折叠
+_FULLWIDTH_PATTERN = re.compile('[\uff0f\uff10-\uff19\uff21-\uff3a\uff41-\uff5a]')
+
+
+def _to_halfwidth(match) -> str:
+    return chr(ord(match.group()) - 0xFEE0)
+
+
+def fold_case(text: str) -> str:
+    """大小写折叠：全角字母数字转半角后转小写，长度不变"""
+    if _FULLWIDTH_PATTERN.search(text):
+        text = _FULLWIDTH_PATTERN.sub(_to_halfwidth, text)
+    return text.lower()
+
+
+class KeywordMatcher:
+    """一次编译、单遍扫描的关键词匹配器"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        # 折叠后的关键词 -> 原始写法（如 Bluetooth / bluetooth）
+        self._originals: Dict[str, List[str]] = {}
+        for keyword in keywords:
+            folded = fold_case(keyword or '')
+            if not folded or keyword in self.keywords:
+                continue
+            self.keywords.append(keyword)
+            self._originals.setdefault(folded, []).append(keyword)
+
+        folded_keywords = sorted(self._originals, key=len, reverse=True)
+        # 同一起点上正则只报告最长的关键词，其余命中由下面的预计算补齐
+        self._prefixes: Dict[str, List[str]] = {}
+        self._inner: Dict[str, List[Tuple[str, int]]] = {}
+        self._overlaps: Dict[str, bool] = {}
+        for keyword in folded_keywords:
+            self._prefixes[keyword] = [other for other in folded_keywords
+                                       if other != keyword and keyword.startswith(other)]
+            self._inner[keyword] = [(other, offset) for other in folded_keywords
+                                    for offset in range(1, len(keyword) - len(other) + 1)
+                                    if keyword.startswith(other, offset)]
+            # 是否存在从关键词内部开始、越过其结尾的其他关键词
+            self._overlaps[keyword] = any(
+                other.startswith(keyword[offset:]) and len(other) > len(keyword) - offset
+                for other in folded_keywords for offset in range(1, len(keyword))
+            )
+
+        self._pattern = re.compile('|'.join(re.escape(k) for k in folded_keywords)) if folded_keywords else None
+        self._subsets: Dict[Tuple[str, ...], frozenset] = {}
+        self._last: Tuple[Optional[str], Dict[str, List[int]]] = (None, {})
+
+    def _fold(self, text: str) -> Tuple[str, Optional[List[int]]]:
+        folded = fold_case(text)
+        if len(folded) == len(text):
+            return folded, None
+        # 个别字符小写后长度变化（如 İ），逐字折叠并记录原文位置
+        chars, positions = [], []
+        for index, char in enumerate(text):
+            for folded_char in fold_case(char):
+                chars.append(folded_char)
+                positions.append(index)
+        return ''.join(chars), positions
+
+    def _scan(self, text: str) -> Dict[str, List[int]]:
+        hits: Dict[str, List[int]] = {}
+        if self._pattern is None or not text:
+            return hits
+        folded, positions = self._fold(text)
+        search = self._pattern.search
+        pos = 0
+        while True:
+            match = search(folded, pos)
+            if match is None:
+                break
+            keyword, start = match.group(), match.start()
+            found = [(keyword, start)]
+            found.extend((prefix, start) for prefix in self._prefixes[keyword])
+            if self._overlaps[keyword]:
+                # 可能有跨越结尾的命中，从下一个字符继续扫描
+                pos = start + 1
+            else:
+                found.extend((inner, start + offset) for inner, offset in self._inner[keyword])
+                pos = match.end()
+            for hit, hit_start in found:
+                hits.setdefault(hit, []).append(positions[hit_start] if positions else hit_start)
+        for starts in hits.values():
+            starts.sort()
+        return hits
+
+    def _matches_folded(self, text: str) -> Dict[str, List[int]]:
+        last_text, last_hits = self._last
+        if last_text is not None and last_text == text:
+            return last_hits
+        hits = self._scan(text)
+        # 同一篇文章通常连续检查多次（相关性、关键词提取、有效性），缓存最近一次结果
+        self._last = (text, hits)
+        return hits
+
+    def _subset(self, keywords: Sequence[str]) -> frozenset:
+        key = tuple(keywords)
+        subset = self._subsets.get(key)
+        if subset is None:
+            subset = frozenset(fold_case(keyword) for keyword in keywords if keyword)
+            self._subsets[key] = subset
+        return subset
+
+    def covers(self, keywords: Sequence[str]) -> bool:
+        """关键词是否都已编译在本匹配器中"""
+        return self._subset(keywords) <= self._originals.keys()
+
+    def matches(self, text: str) -> Dict[str, List[int]]:
+        """返回 {关键词: 命中起始位置列表}，关键词为原始写法"""
+        result = {}
+        for folded, starts in self._matches_folded(text or '').items():
+            for original in self._originals[folded]:
+                result[original] = list(starts)
+        return result
+
+    def counts(self, text: str) -> Dict[str, int]:
+        """返回 {关键词: 命中次数}"""
+        return {keyword: len(starts) for keyword, starts in self.matches(text).items()}
+
+    def contains_any(self, text: str, keywords: Optional[Sequence[str]] = None) -> bool:
+        """文本是否包含任一关键词（可限定为 keywords 中的关键词）"""
+        hits = self._matches_folded(text or '')
+        if keywords is None:
+            return bool(hits)
+        subset = self._subset(keywords)
+        return any(folded in subset for folded in hits)
+
+    def matched_keywords(self, text: str, keywords: Optional[Sequence[str]] = None) -> List[str]:
+        """返回命中的关键词（原始写法），按 keywords 或编译时的顺序"""
+        hits = self._matches_folded(text or '')
+        candidates = self.keywords if keywords is None else keywords
+        return [keyword for keyword in candidates if keyword and fold_case(keyword) in hits]
+
+
+_matchers: Dict[Optional[Tuple[str, ...]], KeywordMatcher] = {}
+_matchers_lock = threading.Lock()
+
+
+def get_keyword_matcher(keywords: Optional[Sequence[str]] = None) -> KeywordMatcher:
+    """获取编译好的匹配器
+
+    默认匹配器包含 SEARCH_KEYWORDS 与 BLUETOOTH_RELATED_KEYWORDS；
+    传入的关键词已被默认匹配器覆盖时直接复用它，否则按关键词组合缓存一个新的。
+    """
+    with _matchers_lock:
+        default = _matchers.get(None)
+        if default is None:
+            default = KeywordMatcher(list(Config.SEARCH_KEYWORDS) + list(Config.BLUETOOTH_RELATED_KEYWORDS))
+            _matchers[None] = default
+        if keywords is None or default.covers(keywords):
+            return default
+        key = tuple(keywords)
+        if key not in _matchers:
+            _matchers[key] = KeywordMatcher(key)
+        return _matchers[key]
@@ -9,36 +9,63 @@ import time
 import logging
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 import re
+import feedparser
 from datetime import datetime
 
 from .base_crawler import BaseCrawler
+from .html_parser import parse_html
+from .fetch_engine import FetchResult
+from .focused_frontier import LinkScorer
+from .source_discovery import get_source_discovery
+from .task_queue import CrawlTask
 from config import Config
 
 class ManufacturerCrawler(BaseCrawler):
     """手机厂商和技术公司爬虫"""
     
+    # 预取的首页、站点发现结果和待保存的处理进度只在主进程中使用
+    _PROCESS_LOCAL_ATTRS = BaseCrawler._PROCESS_LOCAL_ATTRS + ('_prefetched', 'discovery', '_source_progress')
+    
     def __init__(self):
         super().__init__()
         self.logger = logging.getLogger(__name__)
+        self._prefetched: Dict[str, FetchResult] = {}
+        self.discovery = get_source_discovery()
+        # 订阅源和站点地图的处理进度，站点的文章交出后再保存（见 _save_source_progress）
+        self._source_progress: List[Callable[[], None]] = []
+        self.url_scorer = LinkScorer(Config.BLUETOOTH_RELATED_KEYWORDS)
         
+    def crawl(self, keywords: List[str]) -> List[Dict]:
+        """爬取手机厂商和技术公司网站（相关性由各站点的蓝牙关键词判断）"""
+        self.crawl_manufacturer_sites(limit=30)
+        self.crawl_tech_company_sites(limit=50)
+        return self.articles
+    
     def crawl_manufacturer_sites(self, limit: int = 50) -> List[Dict]:
-        """爬取手机厂商网站"""
+        """爬取手机厂商网站，每个站点的文章在访问完成后交出（见 emit_article）"""
         articles = []
         
         self.logger.info("开始爬取手机厂商网站...")
         
-        for source in Config.PHONE_MANUFACTURER_SOURCES[:10]:  # 限制数量以避免过多请求
+        # 只访问到了访问时间的站点，每次最多 10 个，变化慢的站点轮流访问
+        sources = [source for source in Config.PHONE_MANUFACTURER_SOURCES if self.revisits.is_due(source)][:10]
+        self._prefetch(sources)
+        
+        for source in sources:
+            if self.budget.exhausted():
+                break
+            if self.is_source_done(source):
+                continue
             try:
                 self.logger.info(f"正在爬取: {source}")
-                site_articles = self._crawl_single_manufacturer_site(source, limit // 10)
-                articles.extend(site_articles)
+                articles.extend(self.watch_source(source, self._crawl_site, source, limit // 10, 'manufacturer'))
+                if self.budget.truncated:
+                    break
                 
                 if len(articles) >= limit:
                     break
-                    
-                time.sleep(Config.REQUEST_DELAY)
                 
             except Exception as e:
                 self.logger.error(f"爬取 {source} 失败: {e}")
@@ -48,21 +75,28 @@ class ManufacturerCrawler(BaseCrawler):
         return articles
     
     def crawl_tech_company_sites(self, limit: int = 50) -> List[Dict]:
-        """爬取技术公司网站"""
+        """爬取技术公司网站，每个站点的文章在访问完成后交出（见 emit_article）"""
         articles = []
         
         self.logger.info("开始爬取技术公司网站...")
         
-        for source in Config.TECH_COMPANY_SOURCES[:15]:  # 限制数量
+        # 只访问到了访问时间的站点，每次最多 15 个，变化慢的站点轮流访问
+        sources = [source for source in Config.TECH_COMPANY_SOURCES if self.revisits.is_due(source)][:15]
+        self._prefetch(sources)
+        
+        for source in sources:
+            if self.budget.exhausted():
+                break
+            if self.is_source_done(source):
+                continue
             try:
                 self.logger.info(f"正在爬取: {source}")
-                site_articles = self._crawl_single_tech_company_site(source, limit // 15)
-                articles.extend(site_articles)
+                articles.extend(self.watch_source(source, self._crawl_site, source, limit // 15, 'tech_company'))
+                if self.budget.truncated:
+                    break
                 
                 if len(articles) >= limit:
                     break
-                    
-                time.sleep(Config.REQUEST_DELAY)
                 
             except Exception as e:
                 self.logger.error(f"爬取 {source} 失败: {e}")
@@ -71,6 +105,191 @@ class ManufacturerCrawler(BaseCrawler):
         self.logger.info(f"技术公司网站爬取完成，获得 {len(articles)} 篇文章")
         return articles
     
+    def _crawl_site(self, source: str, limit: int, site_type: str) -> List[Dict]:
+        """爬取一个厂商（'manufacturer'）或技术公司（'tech_company'）站点并交出文章，访问完整时记录重访结果"""
+        self._current_source = source
+        self._source_progress = []
+        site_articles = self._crawl_discovered_sources(source, limit, site_type)
+        if site_articles is None:
+            if site_type == 'manufacturer':
+                site_articles = self._crawl_single_manufacturer_site(source, limit)
+            else:
+                site_articles = self._crawl_single_tech_company_site(source, limit)
+        for article in site_articles:
+            article['url'] = self.clean_url(article['url'])
+        # 交出后文章可能很快入库，先统计新文章数
+        new_articles = self.frontier.count_new([article['url'] for article in site_articles])
+        for article in site_articles:
+            self.emit_article(article)
+        self._save_source_progress()
+        if not self.budget.truncated:
+            self.finish_source(source, new_articles, 'manufacturer')
+        return site_articles
+    
+    def _save_source_progress(self):
+        """此前交出的文章写入暂存后保存订阅源和站点地图的处理进度，中途崩溃时下次运行重新处理这些条目"""
+        progress, self._source_progress = self._source_progress, []
+        for save in progress:
+            self.after_saved(save)
+    
+    def plan_tasks(self, keywords: List[str]) -> List[CrawlTask]:
+        """每个厂商和技术公司站点一个任务（每个站点的文章数上限与 crawl 相同）"""
+        tasks = [CrawlTask('hub', source, {'site_type': 'manufacturer', 'limit': 3})
+                 for source in Config.PHONE_MANUFACTURER_SOURCES if self.revisits.is_due(source)]
+        tasks += [CrawlTask('hub', source, {'site_type': 'tech_company', 'limit': 3})
+                  for source in Config.TECH_COMPANY_SOURCES if self.revisits.is_due(source)]
+        return tasks + super().plan_tasks(keywords)
+    
+    def run_task(self, task: CrawlTask, keywords: List[str]):
+        if task.kind == 'hub':
+            if self.revisits.is_due(task.key) and not self.budget.exhausted():
+                self.logger.info(f"正在爬取: {task.key}")
+                self.watch_source(task.key, self._crawl_site, task.key, task.payload['limit'],
+                                  task.payload['site_type'])
+        else:
+            super().run_task(task, keywords)
+    
+    def _prefetch(self, urls: List[str]):
+        """并发预取各站点首页，供后续 _make_request 直接使用"""
+        for result in self.fetch_engine.fetch_many(urls, budget=self.budget):
+            if result.ok:
+                self._prefetched[result.url] = result
+    
+    def _make_request(self, url: str) -> Optional[FetchResult]:
+        """请求页面，成功时返回带 text 属性的抓取结果"""
+        result = self._prefetched.pop(url, None)
+        if result is None:
+            result = self.fetch_engine.fetch_one(url, budget=self.budget)
+        return result if result.ok else None
+    
+    def _crawl_discovered_sources(self, url: str, limit: int, source_type: str) -> Optional[List[Dict]]:
+        """从站点发布的订阅源和站点地图获取新内容，站点两者都没有、或都读不到可用内容时返回None（改用页面解析策略）
+        
+        订阅源只处理新条目；站点地图只抓取 lastmod 晚于上次处理进度、且URL与蓝牙相关的页面。
+        订阅源能正常读取、或站点地图列有与蓝牙相关的页面（包括以前处理过的）时视为可用，本次没有新内容时返回空列表。
+        """
+        prefetched = self._prefetched.get(url)
+        info = self.discovery.discover(url, self.fetch_engine, prefetched.text if prefetched else None, self.budget)
+        if not info.has_sources:
+            return None
+        
+        articles: Dict[str, Dict] = {}
+        usable = False
+        for feed_url in info.feeds:
+            if len(articles) >= limit:
+                break
+            feed_articles = self._crawl_vendor_feed(feed_url, source_type, limit - len(articles))
+            if feed_articles is None:
+                continue
+            usable = True
+            for article in feed_articles:
+                articles.setdefault(article['url'], article)
+        
+        if info.sitemaps and len(articles) < limit:
+            pages, newest, relevant = self.discovery.new_sitemap_pages(info, self.fetch_engine, self._is_relevant_url,
+                                                                       self.budget)
+            usable = usable or relevant or info.sitemap_lastmod is not None or bool(pages)
+            # 有 lastmod 的页面是新增或修改过的，直接重新抓取；没有的按是否已入库过滤
+            changed = [page for page, lastmod in pages if lastmod is not None]
+            unknown = self.filter_new_urls([page for page, lastmod in pages if lastmod is None], url)
+            fetch = [page for page in changed + unknown if page not in articles][:limit - len(articles)]
+            for page in fetch:
+                self.frontier.add(self.clean_url(page))
+            for page, article in self.parse_pages(self.get_pages(fetch), self._extract_page_article, source_type):
+                if article:
+                    articles.setdefault(article['url'], article)
+            if not self.budget.truncated:
+                # 超出数量限制的已修改页面留到下次运行，不随处理进度一起跳过
+                fetched = set(fetch) | set(articles)
+                pending = [(page, lastmod) for page, lastmod in pages if lastmod is not None and page not in fetched]
+                self._source_progress.append(lambda: self.discovery.advance_sitemaps(info, newest, pending))
+        
+        if not articles and not usable:
+            # 站点没有订阅源，猜测的默认位置也没有站点地图；或者订阅源和站点地图都读不到可用内容
+            self.logger.info(f"{url}: 订阅源和站点地图没有可用内容，改用页面解析")
+            return None
+        self.logger.info(f"{url}: 从订阅源和站点地图获得 {len(articles)} 篇文章")
+        return list(articles.values())[:limit]
+    
+    def _crawl_vendor_feed(self, feed_url: str, source_type: str, limit: int) -> Optional[List[Dict]]:
+        """增量读取厂商订阅源，返回最多 limit 个与蓝牙相关的新条目；订阅源无法读取或没有任何条目时返回None
+
+        超出数量限制时先返回较早的条目，其余条目不记为已处理，留到下次运行。
+        """
+        articles = []
+        state = self.frontier.get_feed_state(feed_url)
+        result = self.fetch_engine.fetch_one(feed_url, headers=state.conditional_headers(),
+                                             budget=self.budget, revalidate=True)
+        if result.status_code == 304 and not result.ok:
+            # 订阅源未更新
+            return articles
+        if not result.ok:
+            return None
+        feed = feedparser.parse(result.text)
+        if not feed.entries:
+            return None
+        domain = urlparse(feed_url).netloc
+        
+        new_entries = [entry for entry in feed.entries if state.is_new(entry) and entry.get('link')]
+        relevant = []
+        for entry in new_entries:
+            summary = self.extract_text(entry.get('summary', ''))
+            if self._is_bluetooth_related(f"{entry.get('title', '')} {summary}"):
+                relevant.append((entry, summary))
+        relevant.sort(key=lambda item: state.entry_timestamp(item[0]) or float('inf'))
+        dropped = [entry for entry, _ in relevant[limit:]]
+        dropped_ids = {id(entry) for entry in dropped}
+        
+        for entry, summary in relevant[:limit]:
+            title = entry.get('title', '')
+            articles.append({
+                'title': title,
+                'url': urljoin(feed_url, entry.link),
+                'source': feed.feed.get('title') or domain,
+                'source_type': source_type,
+                'description': summary[:200] + "..." if len(summary) > 200 else summary,
+                'published_date': entry.get('published') or datetime.now().isoformat(),
+                'keywords': self._extract_keywords_from_title(title)
+            })
+        
+        if dropped:
+            # 只推进到留下的最早条目为止，校验信息也不更新，下次请求仍返回完整的订阅源
+            cutoff = min((state.entry_timestamp(entry) for entry in dropped
+                          if state.entry_timestamp(entry) is not None), default=None)
+            state.advance([entry for entry in new_entries if id(entry) not in dropped_ids and
+                           (cutoff is None or (state.entry_timestamp(entry) or 0.0) <= cutoff)])
+        else:
+            state.advance(feed.entries, result.headers)
+        self._source_progress.append(lambda: self.frontier.save_feed_state(state))
+        return articles
+    
+    def _is_relevant_url(self, url: str) -> bool:
+        """站点地图中的URL路径是否与蓝牙相关（页面标题在抓取后再判断）"""
+        return self.url_scorer.score(url) >= self.url_scorer.min_score
+    
+    def _extract_page_article(self, html: str, url: str, source_type: str) -> Optional[Dict]:
+        """在解析进程中执行：从站点地图列出的页面提取标题和描述"""
+        soup = parse_html(html)
+        title_elem = soup.find('meta', property='og:title') or soup.find('meta', attrs={'name': 'title'})
+        title = title_elem.get('content', '').strip() if title_elem else ''
+        if not title:
+            title_elem = soup.find('h1') or soup.find('title')
+            title = title_elem.get_text(strip=True) if title_elem else ''
+        desc_elem = soup.find('meta', attrs={'name': 'description'}) or soup.find('meta', property='og:description')
+        description = desc_elem.get('content', '').strip() if desc_elem else ''
+        
+        if not title or not self._is_bluetooth_related(f"{title} {description}"):
+            return None
+        return {
+            'title': title,
+            'url': url,
+            'source': urlparse(url).netloc,
+            'source_type': source_type,
+            'description': description[:200] + "..." if len(description) > 200 else description,
+            'published_date': datetime.now().isoformat(),
+            'keywords': self._extract_keywords_from_title(title)
+        }
+    
     def _crawl_single_manufacturer_site(self, url: str, limit: int) -> List[Dict]:
         """爬取单个手机厂商网站"""
         articles = []
@@ -136,7 +355,7 @@ class ManufacturerCrawler(BaseCrawler):
             for search_url in search_urls:
                 response = self._make_request(search_url)
                 if response:
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = parse_html(response.text)
                     
                     # 查找文档链接
                     links = soup.find_all('a', href=True)
@@ -175,7 +394,7 @@ class ManufacturerCrawler(BaseCrawler):
         try:
             response = self._make_request(url)
             if response:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text)
                 
                 # 查找新闻和文档链接
                 content_selectors = [
@@ -219,7 +438,7 @@ class ManufacturerCrawler(BaseCrawler):
         try:
             response = self._make_request(url)
             if response:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text)
                 
                 # 查找技术文档和新闻
                 links = soup.find_all('a', href=True)
@@ -255,7 +474,7 @@ class ManufacturerCrawler(BaseCrawler):
         try:
             response = self._make_request(url)
             if response:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text)
                 
                 # 查找博客文章和技术文档
                 content_selectors = [
@@ -306,7 +525,7 @@ class ManufacturerCrawler(BaseCrawler):
             for search_url in bluetooth_urls:
                 response = self._make_request(search_url)
                 if response:
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = parse_html(response.text)
                     
                     # 查找技术文档和白皮书
                     content_selectors = [
@@ -362,7 +581,7 @@ class ManufacturerCrawler(BaseCrawler):
             for page_url in bluetooth_pages:
                 response = self._make_request(page_url)
                 if response:
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = parse_html(response.text)
                     
                     # 查找规范、白皮书和学习资源
                     content_selectors = [
@@ -410,7 +629,7 @@ class ManufacturerCrawler(BaseCrawler):
         try:
             response = self._make_request(url)
             if response:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text)
                 
                 # Nordic专注于低功耗蓝牙
                 content_selectors = [
@@ -455,7 +674,7 @@ class ManufacturerCrawler(BaseCrawler):
         try:
             response = self._make_request(url)
             if response:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text)
                 
                 # 乐鑫的ESP32系列支持蓝牙
                 content_selectors = [
@@ -503,7 +722,7 @@ class ManufacturerCrawler(BaseCrawler):
             response = self._make_request(search_url)
             
             if response:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = parse_html(response.text)
                 
                 # 查找搜索结果中的文章
                 content_selectors = [
@@ -540,57 +759,56 @@ class ManufacturerCrawler(BaseCrawler):
         return articles
     
     def _crawl_generic_site(self, url: str, limit: int) -> List[Dict]:
-        """通用网站爬取策略"""
-        articles = []
+        """通用网站爬取策略：从首页聚焦抓取蓝牙相关的栏目页，收集其中的蓝牙相关链接"""
+        articles = {}
         
         try:
             response = self._make_request(url)
             if response:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 通用选择器，查找包含蓝牙关键词的链接
-                all_links = soup.find_all('a', href=True)
-                
-                for link in all_links[:limit * 3]:  # 检查更多链接
-                    title = link.get_text(strip=True)
-                    href = link.get('href')
-                    
-                    if self._is_bluetooth_related(title) and href:
-                        full_url = urljoin(url, href)
-                        domain = urlparse(url).netloc
-                        
-                        article = {
-                            'title': title,
-                            'url': full_url,
-                            'source': domain,
-                            'source_type': 'general',
-                            'description': self._extract_description(soup, link),
-                            'published_date': datetime.now().isoformat(),
-                            'keywords': self._extract_keywords_from_title(title)
-                        }
-                        articles.append(article)
-                        
-                        if len(articles) >= limit:
-                            break
+                scorer = LinkScorer(Config.BLUETOOTH_RELATED_KEYWORDS)
+                for page_url, page_articles in self.crawl_focused(url, scorer, self._extract_listing_articles, limit,
+                                                                  seed_html=response.text, extract_seed=True):
+                    for article in page_articles:
+                        articles.setdefault(article['url'], article)
+                    if len(articles) >= limit:
+                        break
                 
         except Exception as e:
             self.logger.error(f"通用爬取 {url} 失败: {e}")
             
+        return list(articles.values())[:limit]
+    
+    def _extract_listing_articles(self, soup: BeautifulSoup, url: str, limit: int) -> List[Dict]:
+        """在解析进程中执行：从列表页中提取锚文本与蓝牙相关的链接"""
+        articles = []
+        domain = urlparse(url).netloc
+        
+        for link in soup.find_all('a', href=True)[:limit * 3]:  # 检查更多链接
+            title = link.get_text(strip=True)
+            href = link.get('href')
+            
+            if self._is_bluetooth_related(title) and href:
+                articles.append({
+                    'title': title,
+                    'url': urljoin(url, href),
+                    'source': domain,
+                    'source_type': 'general',
+                    'description': self._extract_description(soup, link),
+                    'published_date': datetime.now().isoformat(),
+                    'keywords': self._extract_keywords_from_title(title)
+                })
+                
+                if len(articles) >= limit:
+                    break
+        
         return articles
     
     def _is_bluetooth_related(self, text: str) -> bool:
         """检查文本是否与蓝牙相关"""
         if not text:
             return False
-            
-        text_lower = text.lower()
-        bluetooth_keywords = [
-            'bluetooth', '蓝牙', 'ble', 'br/edr', 'low energy',
-            'wireless', '无线', 'connectivity', '连接',
-            'pairing', '配对', 'beacon', 'mesh'
-        ]
-        
-        return any(keyword in text_lower for keyword in bluetooth_keywords)
+        
+        return self._contains_keywords(text, Config.BLUETOOTH_RELATED_KEYWORDS)
     
     def _extract_description(self, soup: BeautifulSoup, link) -> str:
         """提取文章描述"""
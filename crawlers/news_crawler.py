@@ -1,15 +1,28 @@
 import feedparser
 import requests
-from typing import List, Dict
+from typing import List, Dict, Optional
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import re
 from datetime import datetime
 from .base_crawler import BaseCrawler
+from .html_parser import parse_html
+from .focused_frontier import LinkScorer
+from .url_canonical import find_canonical_link
+from .task_queue import CrawlTask
 from config import Config
 import time
 
 class NewsCrawler(BaseCrawler):
+    RSS_FEEDS = [
+        "https://www.cnbeta.com.tw/backend.php",
+        "https://www.ithome.com/rss/",
+        "https://feeds.feedburner.com/engadget",
+        "https://www.theverge.com/rss/index.xml",
+        "https://techcrunch.com/feed/",
+        "https://www.wired.com/feed/rss"
+    ]
+    
     def __init__(self):
         super().__init__()
         self.source_type = "news"
@@ -24,113 +37,101 @@ class NewsCrawler(BaseCrawler):
         # 爬取新闻网站
         self._crawl_news_sites(keywords)
         
-        print(f"新闻爬取完成，共获取 {len(self.articles)} 篇文章")
+        print(f"新闻爬取完成，共获取 {self.article_count} 篇文章")
+        return self.articles
+    
+    def poll_feeds(self, keywords: List[str]) -> List[Dict]:
+        """只轮询RSS源的新条目（可高频调用）"""
+        self._crawl_rss_feeds(keywords)
         return self.articles
     
+    def plan_tasks(self, keywords: List[str]) -> List[CrawlTask]:
+        """每个RSS源、每个新闻网站首页各一个任务"""
+        tasks = [CrawlTask('feed', feed_url) for feed_url in self.RSS_FEEDS if self.revisits.is_due(feed_url)]
+        tasks += [CrawlTask('hub', site_url) for site_url in Config.NEWS_SOURCES if self.revisits.is_due(site_url)]
+        return tasks + super().plan_tasks(keywords)
+    
+    def run_task(self, task: CrawlTask, keywords: List[str]):
+        if task.kind == 'feed':
+            self.visit_source(task.key, self._crawl_rss_feed, task.key, keywords)
+        elif task.kind == 'hub':
+            self.visit_source(task.key, self._crawl_news_site, task.key, keywords)
+        else:
+            super().run_task(task, keywords)
+    
     def _crawl_rss_feeds(self, keywords: List[str]):
-        """爬取RSS源"""
-        rss_feeds = [
-            "https://www.cnbeta.com.tw/backend.php",
-            "https://www.ithome.com/rss/",
-            "https://feeds.feedburner.com/engadget",
-            "https://www.theverge.com/rss/index.xml",
-            "https://techcrunch.com/feed/",
-            "https://www.wired.com/feed/rss"
-        ]
-        
-        for feed_url in rss_feeds:
-            try:
-                feed = feedparser.parse(feed_url)
-                
-                for entry in feed.entries[:20]:  # 限制每个源的文章数量
-                    if self._contains_keywords(entry.title + " " + entry.get('summary', ''), keywords):
-                        article_data = {
-                            'title': entry.title,
-                            'content': entry.get('summary', ''),
-                            'url': entry.link,
-                            'source_type': self.source_type,
-                            'source_name': feed.feed.get('title', 'Unknown'),
-                            'publish_date': self._parse_date(entry.get('published', '')),
-                            'keywords': self.extract_keywords(entry.title + " " + entry.get('summary', '')),
-                            'sentiment': 'neutral'
-                        }
-                        
-                        # 获取完整内容
-                        full_content = self._get_full_content(entry.link)
-                        if full_content:
-                            article_data['content'] = full_content
-                        
-                        self.add_article(article_data)
-                
-                time.sleep(Config.REQUEST_DELAY)
-                
-            except Exception as e:
-                print(f"爬取RSS源失败 {feed_url}: {e}")
-                continue
+        """爬取到了访问时间的RSS源"""
+        for feed_url in self.RSS_FEEDS:
+            self.visit_source(feed_url, self._crawl_rss_feed, feed_url, keywords)
+    
+    def _crawl_rss_feed(self, feed_url: str, keywords: List[str]):
+        """增量爬取RSS源：条件请求获取订阅源，只处理上次之后出现的条目"""
+        try:
+            state = self.frontier.get_feed_state(feed_url)
+            result = self.fetch_engine.fetch_one(feed_url, headers=state.conditional_headers(),
+                                                 budget=self.budget, revalidate=True)
+            if result.status_code == 304:
+                print(f"RSS源未更新: {feed_url}")
+                return
+            if not result.ok:
+                return
+            feed = feedparser.parse(result.text)
+            
+            new_entries = [entry for entry in feed.entries if state.is_new(entry)]
+            new_entries = new_entries[:Config.FEED_MAX_NEW_ENTRIES]  # 限制每个源的文章数量
+            
+            pending = {}
+            for entry in new_entries:
+                if self._contains_keywords(entry.title + " " + entry.get('summary', ''), keywords):
+                    pending[entry.link] = {
+                        'title': entry.title,
+                        'content': entry.get('summary', ''),
+                        'url': entry.link,
+                        'source_type': self.source_type,
+                        'source_name': feed.feed.get('title', 'Unknown'),
+                        'publish_date': self._parse_date(entry.get('published', '')),
+                        'keywords': self.extract_keywords(entry.title + " " + entry.get('summary', '')),
+                        'sentiment': 'neutral'
+                    }
+            
+            # 已入库的条目不再处理
+            new_links = self.filter_new_urls(list(pending), feed_url)
+            pending = {link: pending[link] for link in new_links}
+            
+            # 批量获取完整内容，正文提取在解析进程中进行
+            for link, full_content in self.parse_pages(self.get_pages(new_links), self._extract_page_text):
+                if full_content:
+                    pending[link]['content'] = full_content
+            
+            for article_data in pending.values():
+                self.add_article(article_data)
+            
+            # 超出数量限制的条目与以前一样不再处理，同样记为已处理；文章写入暂存后才保存进度，中途崩溃时下次重新处理
+            state.advance(feed.entries, result.headers)
+            self.after_saved(lambda: self.frontier.save_feed_state(state))
+            
+        except Exception as e:
+            print(f"爬取RSS源失败 {feed_url}: {e}")
     
     def _crawl_news_sites(self, keywords: List[str]):
-        """爬取新闻网站"""
+        """爬取到了访问时间的新闻网站"""
         for site_url in Config.NEWS_SOURCES:
-            try:
-                html = self.get_page(site_url)
-                if not html:
-                    continue
-                
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # 查找文章链接
-                article_links = self._find_article_links(soup, site_url)
-                
-                for link in article_links[:10]:  # 限制每个网站的文章数量
-                    try:
-                        article_html = self.get_page(link)
-                        if not article_html:
-                            continue
-                        
-                        article_data = self._extract_article_data(article_html, link, site_url)
-                        if article_data and self._contains_keywords(article_data['title'] + " " + article_data['content'], keywords):
-                            self.add_article(article_data)
-                        
-                        time.sleep(Config.REQUEST_DELAY)
-                        
-                    except Exception as e:
-                        print(f"处理文章失败 {link}: {e}")
-                        continue
-                
-            except Exception as e:
-                print(f"爬取新闻网站失败 {site_url}: {e}")
-                continue
+            self.visit_source(site_url, self._crawl_news_site, site_url, keywords)
     
-    def _find_article_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
-        """查找文章链接"""
-        links = []
-        
-        # 常见的文章链接选择器
-        selectors = [
-            'a[href*="/article/"]',
-            'a[href*="/news/"]',
-            'a[href*="/story/"]',
-            'a[href*="/post/"]',
-            'h1 a', 'h2 a', 'h3 a',
-            '.article-title a',
-            '.news-title a',
-            '.post-title a'
-        ]
-        
-        for selector in selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                href = element.get('href')
-                if href:
-                    full_url = urljoin(base_url, href)
-                    if full_url not in links:
-                        links.append(full_url)
-        
-        return links
+    def _crawl_news_site(self, site_url: str, keywords: List[str]):
+        """从新闻网站首页聚焦抓取：只抓取与关键词相关的链接，相关性高的优先"""
+        try:
+            scorer = LinkScorer(keywords)
+            for link, article_data in self.crawl_focused(site_url, scorer, self._extract_article_data, site_url):
+                if article_data and self._contains_keywords(article_data['title'] + " " + article_data['content'], keywords):
+                    self.add_article(article_data)
+            
+        except Exception as e:
+            print(f"爬取新闻网站失败 {site_url}: {e}")
     
     def _extract_article_data(self, html: str, url: str, source_name: str) -> Dict:
         """提取文章数据"""
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # 提取标题
         title = ""
@@ -150,11 +151,11 @@ class NewsCrawler(BaseCrawler):
         for selector in content_selectors:
             content_elem = soup.select_one(selector)
             if content_elem:
-                content = self.extract_text(str(content_elem))
+                content = self.extract_text(content_elem)
                 break
         
         if not content:
-            content = self.extract_text(html)
+            content = self.extract_text(soup)
         
         # 提取发布日期
         publish_date = ""
@@ -171,7 +172,7 @@ class NewsCrawler(BaseCrawler):
         return {
             'title': title,
             'content': content,
-            'url': url,
+            'url': find_canonical_link(soup, url) or url,
             'source_type': self.source_type,
             'source_name': source_name,
             'publish_date': publish_date,
@@ -179,20 +180,16 @@ class NewsCrawler(BaseCrawler):
             'sentiment': 'neutral'
         }
     
-    def _get_full_content(self, url: str) -> str:
-        """获取完整内容"""
-        try:
-            html = self.get_page(url)
-            if html:
-                return self.extract_text(html)
-        except:
-            pass
-        return ""
+    def _extract_page_text(self, html: str, url: str) -> str:
+        """提取整页正文（RSS条目的完整内容）"""
+        return self.extract_text(html)
     
-    def _contains_keywords(self, text: str, keywords: List[str]) -> bool:
-        """检查文本是否包含关键词"""
-        text_lower = text.lower()
-        return any(keyword.lower() in text_lower for keyword in keywords)
+    def reextract(self, html: str, article: Dict) -> Optional[Dict]:
+        """重新提取新闻网站文章；RSS条目的标题和日期来自订阅源，只更新正文"""
+        source_name = article.get('source_name', '')
+        if source_name.startswith(('http://', 'https://')):
+            return self._extract_article_data(html, article['url'], source_name)
+        return dict(article, content=self._extract_page_text(html, article['url']))
     
     def _parse_date(self, date_str: str) -> str:
         """解析日期字符串"""
@@ -0,0 +1,124 @@
+"""
+解析进程池
+抓取线程只负责网络I/O，页面解析、正文与关键词提取在进程池中完成；
+在途任务数不超过 queue_depth，队列满时暂停从抓取端取新页面（背压）
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+from config import Config
+
+
+class ParsePool:
+    """有界的解析进程池
+
+    workers 为 0 时在调用线程内直接解析，便于调试或在不支持多进程的环境运行。
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_depth: Optional[int] = None):
+        self.workers = max(0, Config.PARSE_WORKERS if workers is None else workers)
+        self.queue_depth = max(1, Config.PARSE_QUEUE_DEPTH if queue_depth is None else queue_depth)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {'parsed': 0, 'failed': 0}
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers == 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                # 抓取引擎有后台线程，fork 子进程可能继承已加锁的锁，统一使用 spawn
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _record(self, error: Optional[BaseException]):
+        with self._lock:
+            self._stats['failed' if error is not None else 'parsed'] += 1
+
+    def map(self, func: Callable, tasks: Iterable[Tuple[Hashable, tuple]]) -> Iterator[Tuple[Hashable, Any, Optional[BaseException]]]:
+        """对每个 (key, args) 执行 func(*args)，按完成顺序返回 (key, 结果, 异常)
+
+        func 及其参数需要可序列化（模块级函数或爬虫实例的方法）。
+        """
+        if self._get_executor() is None:
+            for key, args in tasks:
+                try:
+                    result, error = func(*args), None
+                except Exception as e:
+                    result, error = None, e
+                self._record(error)
+                yield key, result, error
+            return
+
+        pending: Dict[Future, Hashable] = {}
+
+        def drain():
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                try:
+                    result, error = future.result(), None
+                except BrokenProcessPool as e:
+                    self._reset()
+                    result, error = None, e
+                except Exception as e:
+                    result, error = None, e
+                self._record(error)
+                yield key, result, error
+
+        tasks = iter(tasks)
+        while True:
+            # 在途任务已满时先交付已完成的结果，再从抓取端取下一个页面
+            while len(pending) >= self.queue_depth:
+                yield from drain()
+            task = next(tasks, None)
+            if task is None:
+                break
+            key, args = task
+            try:
+                pending[self._get_executor().submit(func, *args)] = key
+            except BrokenProcessPool as e:
+                self._reset()
+                self._record(e)
+                yield key, None, e
+        while pending:
+            yield from drain()
+
+    def _reset(self):
+        """工作进程异常退出后丢弃进程池，下次提交时重建"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            logging.warning("解析进程池异常退出，将在下次提交时重建")
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取解析成功/失败数量"""
+        with self._lock:
+            return dict(self._stats, workers=self.workers)
+
+    def shutdown(self):
+        """关闭工作进程"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ParsePool:
+    """获取进程内共享的解析进程池"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ParsePool()
+        return _shared_pool
@@ -0,0 +1,138 @@
+"""
+按域名的礼貌性调度
+每个主机一个令牌桶，某个主机冷却时只等待该主机的请求，其他主机的请求照常进行
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+from config import Config
+
+
+class TokenBucket:
+    """令牌桶，支持预约：令牌不足时返回需要等待的秒数"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """取走一个令牌，返回在发送请求前需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class PolitenessScheduler:
+    """按主机限速的调度器"""
+
+    def __init__(self, default_rate: Optional[float] = None,
+                 burst: int = Config.POLITENESS_BURST,
+                 domain_rates: Optional[Dict[str, float]] = None):
+        if default_rate is None:
+            default_rate = 1.0 / Config.REQUEST_DELAY if Config.REQUEST_DELAY > 0 else float('inf')
+        self.default_rate = default_rate
+        self.burst = burst
+        self.domain_rates = dict(Config.DOMAIN_RATE_LIMITS if domain_rates is None else domain_rates)
+        # robots.txt 中 Crawl-delay 折算的速率，只会比配置的更慢
+        self.host_rates: Dict[str, float] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        # 不限速的主机被要求等待时只记录截止时间，到期后恢复不限速
+        self._deferred_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get_rate(self, host: str) -> float:
+        """获取主机的请求速率（每秒请求数），支持按上级域名配置"""
+        host = host.lower().split(':')[0]
+        if host in self.host_rates:
+            return self.host_rates[host]
+        parts = host.split('.')
+        for i in range(len(parts) - 1):
+            domain = '.'.join(parts[i:])
+            if domain in self.domain_rates:
+                return self.domain_rates[domain]
+        return self.default_rate
+
+    def reserve(self, host: str) -> float:
+        """为主机预约一次请求，返回需要等待的秒数"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate = self.get_rate(host)
+                if rate == float('inf'):
+                    return self._deferred_delay(host)
+                bucket = TokenBucket(rate, self.burst)
+                self._buckets[host] = bucket
+            return bucket.reserve()
+
+    def _deferred_delay(self, host: str) -> float:
+        """不限速主机距离推迟截止时间的秒数，到期后清除记录"""
+        until = self._deferred_until.get(host)
+        if until is None:
+            return 0.0
+        delay = until - time.monotonic()
+        if delay <= 0:
+            del self._deferred_until[host]
+            return 0.0
+        return delay
+
+    def set_crawl_delay(self, host: str, seconds: float):
+        """按站点 robots.txt 的 Crawl-delay 放慢该主机的请求速率"""
+        if seconds <= 0:
+            return
+        host = host.lower().split(':')[0]
+        with self._lock:
+            self.host_rates.pop(host, None)
+            rate = min(self.get_rate(host), 1.0 / seconds)
+            self.host_rates[host] = rate
+            for key, bucket in self._buckets.items():
+                if key.lower().split(':')[0] == host:
+                    bucket.rate = rate
+
+    def defer(self, host: str, seconds: float):
+        """服务器要求等待（如 Retry-After）时，推迟该主机后续所有请求；只推迟一次，不改变主机的请求速率"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate = self.get_rate(host)
+                if rate == float('inf'):
+                    until = time.monotonic() + seconds
+                    self._deferred_until[host] = max(self._deferred_until.get(host, 0.0), until)
+                    return
+                bucket = TokenBucket(rate, self.burst)
+                self._buckets[host] = bucket
+            bucket.reserve()
+            bucket.tokens = min(bucket.tokens, -seconds * bucket.rate)
+
+    async def acquire(self, host: str):
+        """异步等待，直到可以向该主机发送请求"""
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait(self, host: str):
+        """同步等待，用于不经过抓取引擎的请求（如arxiv客户端）"""
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_politeness_scheduler() -> PolitenessScheduler:
+    """获取进程内共享的礼貌性调度器"""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = PolitenessScheduler()
+        return _default_scheduler
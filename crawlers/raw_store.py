@@ -0,0 +1,189 @@
+"""
+原始页面存储
+抓取到的页面按内容哈希（SHA-256）存成压缩文件，相同内容只存一份；
+SQLite索引记录 URL -> (内容哈希, 抓取时间)，选择器修改后可直接重新提取，无需重新抓取
+"""
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from .url_canonical import canonicalize_url
+
+try:
+    import zstandard
+except ImportError:  # 未安装时退回zlib，两种格式可以共存
+    zstandard = None
+
+
+class BlobStore:
+    """内容寻址的压缩文件存储
+
+    文件路径为 <root>/<哈希前两位>/<哈希>.zst（或 .z），写入先落临时文件再原子改名，
+    读取时内存映射文件后直接解压，不额外复制压缩数据。
+    """
+
+    def __init__(self, root: str, level: int = Config.RAW_STORE_COMPRESSION_LEVEL):
+        self.root = root
+        self.level = level
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str, suffix: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + suffix)
+
+    def _find(self, digest: str) -> Optional[str]:
+        for suffix in ('.zst', '.z'):
+            path = self._path(digest, suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _compress(self, data: bytes) -> Tuple[bytes, str]:
+        if zstandard is not None:
+            # 压缩器对象不能跨线程共享，每次新建（开销很小）
+            return zstandard.ZstdCompressor(level=self.level).compress(data), '.zst'
+        return zlib.compress(data, min(self.level, 9)), '.z'
+
+    def put(self, data: bytes) -> Tuple[str, int]:
+        """保存内容，返回 (哈希, 新写入的压缩字节数)；内容已存在时不重复写入"""
+        digest = hashlib.sha256(data).hexdigest()
+        if self._find(digest):
+            return digest, 0
+
+        compressed, suffix = self._compress(data)
+        path = self._path(digest, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return digest, len(compressed)
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """读取内容，不存在时返回None"""
+        path = self._find(digest)
+        if path is None:
+            return None
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if path.endswith('.zst'):
+                if zstandard is None:
+                    raise RuntimeError(f"读取 {path} 需要安装 zstandard")
+                return zstandard.ZstdDecompressor().decompress(mapped)
+            return zlib.decompress(mapped)
+
+    def __contains__(self, digest: str) -> bool:
+        return self._find(digest) is not None
+
+
+class RawPageStore:
+    """按URL和抓取时间索引的原始页面存储
+
+    URL按规范形式索引，与文章表中的URL一致；同一URL内容未变化时只更新抓取时间。
+    """
+
+    def __init__(self, root: str = Config.RAW_STORE_PATH):
+        self.root = root
+        self.blobs = BlobStore(os.path.join(root, 'blobs'))
+        self.db_path = os.path.join(root, 'index.db')
+        self._lock = threading.Lock()
+        self.stats = {'stored': 0, 'unchanged': 0, 'deduplicated': 0, 'bytes': 0, 'compressed_bytes': 0}
+        self.init_index()
+
+    def init_index(self):
+        """初始化索引表"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS raw_pages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    blob_hash TEXT NOT NULL,
+                    size INTEGER DEFAULT 0,
+                    fetched_at REAL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_raw_pages_url ON raw_pages (url, fetched_at)')
+            conn.commit()
+
+    def store(self, url: str, html: str) -> Optional[str]:
+        """保存一次抓取到的页面，返回内容哈希；写入失败只记录，不影响抓取"""
+        data = html.encode('utf-8')
+        url = canonicalize_url(url)
+        try:
+            digest, written = self.blobs.put(data)
+            with self._lock, sqlite3.connect(self.db_path) as conn:
+                latest = conn.execute('''
+                    SELECT id, blob_hash FROM raw_pages WHERE url = ? ORDER BY fetched_at DESC LIMIT 1
+                ''', (url,)).fetchone()
+                if latest and latest[1] == digest:
+                    conn.execute('UPDATE raw_pages SET fetched_at = ? WHERE id = ?', (time.time(), latest[0]))
+                    self.stats['unchanged'] += 1
+                else:
+                    conn.execute('INSERT INTO raw_pages (url, blob_hash, size, fetched_at) VALUES (?, ?, ?, ?)',
+                                 (url, digest, len(data), time.time()))
+                    self.stats['stored'] += 1
+                    if written:
+                        self.stats['bytes'] += len(data)
+                        self.stats['compressed_bytes'] += written
+                    else:
+                        # 内容与其他URL或旧版本相同，只新增索引
+                        self.stats['deduplicated'] += 1
+                conn.commit()
+            return digest
+        except (OSError, sqlite3.Error) as e:
+            print(f"保存原始页面失败 {url}: {e}")
+            return None
+
+    def latest(self, url: str) -> Optional[Tuple[str, float]]:
+        """返回URL最近一次抓取的 (内容哈希, 抓取时间)"""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute('''
+                SELECT blob_hash, fetched_at FROM raw_pages WHERE url = ? ORDER BY fetched_at DESC LIMIT 1
+            ''', (canonicalize_url(url),)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def history(self, url: str) -> List[Tuple[str, float]]:
+        """返回URL各个版本的 (内容哈希, 抓取时间)，按时间从新到旧"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute('''
+                SELECT blob_hash, fetched_at FROM raw_pages WHERE url = ? ORDER BY fetched_at DESC
+            ''', (canonicalize_url(url),)).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def get_html(self, url: str) -> Optional[str]:
+        """读取URL最近一次抓取的页面"""
+        latest = self.latest(url)
+        if latest is None:
+            return None
+        data = self.blobs.get(latest[0])
+        return data.decode('utf-8') if data is not None else None
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取本进程的写入统计"""
+        with self._lock:
+            return dict(self.stats)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_raw_page_store() -> Optional[RawPageStore]:
+    """获取进程内共享的原始页面存储，未启用时返回None"""
+    global _default_store
+    if not Config.RAW_STORE_ENABLED:
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = RawPageStore()
+        return _default_store
@@ -0,0 +1,168 @@
+"""
+重试策略与主机熔断
+按错误类型决定是否重试，支持 Retry-After 和带抖动的指数退避；
+同一主机连续失败达到阈值后熔断，冷却一段时间后放行一个试探请求（半开），成功则恢复，失败则重新熔断
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+
+from config import Config
+
+# 可重试的HTTP状态码
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# 说明主机整体不可用或在限流的状态码，计入熔断
+HOST_FAILURE_STATUS_CODES = {403, 429, 500, 502, 503, 504}
+
+
+class RetryDecision:
+    """一次失败的处理结论"""
+
+    def __init__(self, retryable: bool, host_failure: bool, retry_after: Optional[float] = None):
+        self.retryable = retryable
+        self.host_failure = host_failure
+        self.retry_after = retry_after
+
+
+class RetryPolicy:
+    """错误分类与退避时间计算"""
+
+    def __init__(self, base_delay: float = Config.RETRY_BASE_DELAY,
+                 max_delay: float = Config.RETRY_MAX_DELAY):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def classify(self, error: Exception) -> RetryDecision:
+        """判断错误是否可重试、是否计入主机熔断"""
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            retry_after = parse_retry_after(error.response.headers.get('Retry-After'))
+            retryable = status in RETRYABLE_STATUS_CODES
+            # 服务器要求等待的时间超过上限，本次不再重试
+            if retry_after is not None and retry_after > self.max_delay:
+                retryable = False
+            return RetryDecision(retryable, status in HOST_FAILURE_STATUS_CODES, retry_after)
+
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return RetryDecision(True, True)
+
+        # URL格式错误、内容解码失败等，重试无意义
+        return RetryDecision(False, False)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """计算第 attempt 次失败后的等待秒数"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(self.base_delay / 2, ceiling)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或HTTP日期）"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """按主机的熔断器
+
+    熔断后经过 cooldown_seconds 进入半开状态，只放行一个试探请求：成功则关闭熔断，失败则重新熔断并重新冷却。
+    每日任务开始时整体重置；长期运行的工作进程和持续抓取模式依靠冷却恢复。
+    """
+
+    def __init__(self, failure_threshold: int = Config.CIRCUIT_BREAKER_THRESHOLD,
+                 cooldown_seconds: float = Config.CIRCUIT_BREAKER_COOLDOWN_MINUTES * 60):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._failures: Dict[str, int] = {}
+        self._open: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host: str, now: Optional[float] = None) -> bool:
+        """是否允许向主机发送请求；冷却结束后放行一个试探请求，试探未返回前其余请求仍被拒绝"""
+        now = time.time() if now is None else now
+        with self._lock:
+            info = self._open.get(host)
+            if info is None:
+                return True
+            # 试探请求未上报结果（如被取消）时，再过一个冷却期放行下一个
+            since = info['trial_at'] if info['trial_at'] is not None else info['opened_ts']
+            if now - since < self.cooldown_seconds:
+                return False
+            info['trial_at'] = now
+            return True
+
+    def record_success(self, host: str):
+        """记录一次主机正常响应（含404等不计入熔断的错误状态），清零连续失败并关闭熔断"""
+        with self._lock:
+            self._failures.pop(host, None)
+            if self._open.pop(host, None) is not None:
+                print(f"主机 {host} 试探请求成功，恢复请求")
+
+    def record_failure(self, host: str, reason: str, now: Optional[float] = None):
+        """记录一次主机级失败，达到阈值时熔断；半开状态下的试探请求失败时重新熔断"""
+        now = time.time() if now is None else now
+        with self._lock:
+            info = self._open.get(host)
+            if info is not None:
+                if info['trial_at'] is not None:
+                    info.update(reason=reason, failures=info['failures'] + 1, opened_ts=now, trial_at=None,
+                                opened_at=datetime.fromtimestamp(now).isoformat())
+                return
+            count = self._failures.get(host, 0) + 1
+            self._failures[host] = count
+            if count >= self.failure_threshold:
+                self._open[host] = {
+                    'reason': reason,
+                    'failures': count,
+                    'opened_at': datetime.fromtimestamp(now).isoformat(),
+                    'opened_ts': now,
+                    'trial_at': None
+                }
+                print(f"主机 {host} 连续失败 {count} 次，{self.cooldown_seconds:g} 秒内停止请求: {reason}")
+
+    def get_reason(self, host: str) -> str:
+        with self._lock:
+            return self._open.get(host, {}).get('reason', '')
+
+    def get_status(self) -> Dict[str, Dict]:
+        """获取已熔断（含半开）的主机及原因"""
+        with self._lock:
+            return {host: {key: info[key] for key in ('reason', 'failures', 'opened_at')}
+                    for host, info in self._open.items()}
+
+    def reset(self):
+        """新一轮运行开始时清空状态"""
+        with self._lock:
+            self._failures.clear()
+            self._open.clear()
+
+
+_default_breaker = None
+_default_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """获取进程内共享的熔断器"""
+    global _default_breaker
+    with _default_breaker_lock:
+        if _default_breaker is None:
+            _default_breaker = CircuitBreaker()
+        return _default_breaker
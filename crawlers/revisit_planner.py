@@ -0,0 +1,162 @@
+"""
+自适应重访计划
+按来源记录每次访问是否产出新的相关文章，把来源的变化看作泊松过程估计变化频率，
+据此安排下次访问：变化快的来源访问更频繁，长期不变的来源少访问；
+所有来源每天的访问次数合计不超过预算，超出时按比例拉长间隔
+"""
+
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import Config
+
+
+class SourceRevisit:
+    """单个来源的访问记录和变化频率估计"""
+
+    def __init__(self, source: str, source_type: str = '', visits: float = 0.0, changes: float = 0.0,
+                 mean_interval: float = Config.REVISIT_DEFAULT_HOURS, last_new_articles: int = 0,
+                 last_visit: Optional[datetime] = None, next_visit: Optional[datetime] = None):
+        self.source = source
+        self.source_type = source_type
+        # 按访问次数衰减的访问数和“有新文章”的访问数
+        self.visits = visits
+        self.changes = changes
+        self.mean_interval = mean_interval
+        self.last_new_articles = last_new_articles
+        self.last_visit = last_visit
+        self.next_visit = next_visit
+
+    @classmethod
+    def new(cls, source: str, source_type: str = '',
+            prior_visits: float = Config.REVISIT_PRIOR_VISITS) -> 'SourceRevisit':
+        """新来源：以“每天变化一次”作为先验，少量访问后不会立即跳到极端间隔"""
+        changes = (prior_visits + 0.5) * (1 - math.exp(-1))
+        return cls(source, source_type, visits=prior_visits, changes=changes)
+
+    @property
+    def change_rate(self) -> float:
+        """每小时变化次数的估计
+
+        访问间隔为 I、n 次访问中 X 次发现变化时，用 Cho & Garcia-Molina 的改进估计
+        r = -ln((n - X + 0.5) / (n + 0.5)) / I，对“每次都有变化”的来源也给出有限值
+        """
+        if self.visits <= 0 or self.mean_interval <= 0:
+            return 1.0 / Config.REVISIT_DEFAULT_HOURS
+        return -math.log((self.visits - self.changes + 0.5) / (self.visits + 0.5)) / self.mean_interval
+
+    def desired_interval(self, min_hours: float, max_hours: float) -> float:
+        """不考虑预算时的访问间隔（小时）"""
+        rate = self.change_rate
+        if rate <= 0:
+            return max_hours
+        return min(max_hours, max(min_hours, 1.0 / rate))
+
+    def to_dict(self) -> Dict:
+        return {
+            'source': self.source,
+            'source_type': self.source_type,
+            'visits': self.visits,
+            'changes': self.changes,
+            'mean_interval': self.mean_interval,
+            'change_rate': self.change_rate,
+            'last_new_articles': self.last_new_articles,
+            'last_visit': self.last_visit.isoformat() if self.last_visit else None,
+            'next_visit': self.next_visit.isoformat() if self.next_visit else None,
+        }
+
+    @classmethod
+    def from_dict(cls, row: Dict) -> 'SourceRevisit':
+        parse = lambda value: datetime.fromisoformat(value) if value else None
+        return cls(row['source'], row.get('source_type') or '', row['visits'], row['changes'],
+                   row['mean_interval'], row.get('last_new_articles') or 0,
+                   parse(row.get('last_visit')), parse(row.get('next_visit')))
+
+
+class RevisitPlanner:
+    """决定来源是否到了访问时间，并根据访问结果安排下次访问"""
+
+    def __init__(self, min_hours: float = Config.REVISIT_MIN_HOURS,
+                 max_hours: float = Config.REVISIT_MAX_HOURS,
+                 daily_budget: int = Config.REVISIT_DAILY_BUDGET,
+                 decay: float = Config.REVISIT_DECAY,
+                 tolerance_minutes: float = Config.REVISIT_CHECK_MINUTES):
+        self.min_hours = min_hours
+        self.max_hours = max_hours
+        self.daily_budget = daily_budget
+        self.decay = decay
+        # 提前量：定时检查有间隔，快到时间的来源在本次检查中一并访问
+        self.tolerance = timedelta(minutes=tolerance_minutes)
+        self.db = None
+        self._sources: Dict[str, SourceRevisit] = {}
+        self._lock = threading.Lock()
+
+    def load_from_database(self, db):
+        """从数据库加载各来源的访问记录，之后的更新同时写回数据库"""
+        sources = {row['source']: SourceRevisit.from_dict(row) for row in db.get_source_revisits()}
+        with self._lock:
+            self.db = db
+            self._sources = sources
+
+    def is_due(self, source: str, now: Optional[datetime] = None) -> bool:
+        """来源是否到了访问时间，从未访问过的来源总是需要访问"""
+        now = now or datetime.now()
+        with self._lock:
+            state = self._sources.get(source)
+        return state is None or state.next_visit is None or now + self.tolerance >= state.next_visit
+
+    def record_visit(self, source: str, source_type: str = '', new_articles: int = 0,
+                     now: Optional[datetime] = None) -> SourceRevisit:
+        """记录一次访问及其产出的新文章数，更新估计并安排下次访问"""
+        now = now or datetime.now()
+        with self._lock:
+            state = self._sources.get(source) or SourceRevisit.new(source, source_type)
+            if state.last_visit is not None:
+                elapsed = max((now - state.last_visit).total_seconds() / 3600, 1e-3)
+                state.mean_interval = self.decay * state.mean_interval + (1 - self.decay) * elapsed
+            state.visits = state.visits * self.decay + 1
+            state.changes = state.changes * self.decay + (1 if new_articles > 0 else 0)
+            state.source_type = source_type or state.source_type
+            state.last_new_articles = new_articles
+            state.last_visit = now
+            self._sources[source] = state
+
+            interval = min(self.max_hours, state.desired_interval(self.min_hours, self.max_hours) * self._budget_scale())
+            state.next_visit = now + timedelta(hours=interval)
+            db = self.db
+        if db is not None:
+            db.save_source_revisit(state.to_dict())
+        return state
+
+    def _budget_scale(self) -> float:
+        """所有来源按期望间隔访问时每天的访问次数超过预算的倍数（至少为1）"""
+        visits_per_day = sum(24.0 / state.desired_interval(self.min_hours, self.max_hours)
+                             for state in self._sources.values())
+        return max(1.0, visits_per_day / self.daily_budget) if self.daily_budget > 0 else 1.0
+
+    def get_status(self) -> List[Dict]:
+        """各来源的变化频率估计和下次访问时间，按下次访问时间排序"""
+        states = []
+        with self._lock:
+            for state in self._sources.values():
+                info = state.to_dict()
+                # 实际安排的间隔（含预算调整）
+                info['interval_hours'] = ((state.next_visit - state.last_visit).total_seconds() / 3600
+                                          if state.next_visit and state.last_visit else None)
+                states.append(info)
+        return sorted(states, key=lambda info: info['next_visit'] or '')
+
+
+_default_planner = None
+_default_planner_lock = threading.Lock()
+
+
+def get_revisit_planner() -> RevisitPlanner:
+    """获取进程内共享的重访计划"""
+    global _default_planner
+    with _default_planner_lock:
+        if _default_planner is None:
+            _default_planner = RevisitPlanner()
+        return _default_planner
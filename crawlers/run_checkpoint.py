@@ -0,0 +1,124 @@
+"""
+运行断点
+每日任务把接收的文章追加写入暂存文件，并在数据库中记录已完成的爬虫、来源和关键词；
+进程中途退出后重新运行时，暂存的文章直接重放入库，已完成的部分不再抓取
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import Config
+
+
+class IngestSpool:
+    """只追加的文章暂存文件，每行一条JSON
+
+    每条记录写入后即交给操作系统，进程退出不会丢失；sync 时再落盘。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def append(self, article: Dict):
+        line = json.dumps(article, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+
+    def sync(self):
+        """把已写入的记录落盘"""
+        with self._lock:
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+
+    def records(self) -> Iterator[Dict]:
+        """按写入顺序读取记录；进程退出时写了一半的最后一行跳过"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as spool:
+            for line in spool:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RunCheckpoint:
+    """一次运行的断点：已完成的项（kind 为 'crawler'、'source' 或 'keyword'）和文章暂存文件"""
+
+    def __init__(self, db, run_id: str, started_at: datetime, committed: int = 0,
+                 spool_dir: str = Config.SPOOL_DIR, resumed: bool = False):
+        self.db = db
+        self.run_id = run_id
+        self.started_at = started_at
+        # 暂存文件中已写入数据库的记录数
+        self.committed = committed
+        self.resumed = resumed
+        self.spool = IngestSpool(os.path.join(spool_dir, f"{run_id}.jsonl"))
+        self._done = {(row['kind'], row['key']) for row in db.get_run_checkpoints(run_id)}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, db, kind: str = 'daily', spool_dir: str = Config.SPOOL_DIR,
+             now: Optional[datetime] = None) -> Tuple['RunCheckpoint', List['RunCheckpoint']]:
+        """返回本次运行的断点，以及需要重放暂存文章后放弃的旧运行
+
+        最近一次未完成的运行在 CHECKPOINT_RESUME_HOURS 内开始时继续该运行，否则开始新的运行。
+        """
+        now = now or datetime.now()
+        unfinished = [cls(db, row['run_id'], datetime.fromisoformat(row['started_at']), row['committed'] or 0,
+                          spool_dir, resumed=True)
+                      for row in db.get_unfinished_crawl_runs(kind)]
+        if unfinished and now - unfinished[-1].started_at < timedelta(hours=Config.CHECKPOINT_RESUME_HOURS):
+            return unfinished[-1], unfinished[:-1]
+        run_id = now.strftime('%Y%m%d-%H%M%S')
+        db.start_crawl_run(run_id, kind, now.isoformat())
+        return cls(db, run_id, now, spool_dir=spool_dir), unfinished
+
+    def is_done(self, kind: str, key: str) -> bool:
+        with self._lock:
+            return (kind, key) in self._done
+
+    def mark_done(self, kind: str, key: str):
+        """记录完成的一项；调用方需保证此前接收的文章已写入暂存文件"""
+        with self._lock:
+            if (kind, key) in self._done:
+                return
+            self._done.add((kind, key))
+        self.db.add_run_checkpoint(self.run_id, kind, key)
+
+    def set_committed(self, committed: int):
+        self.committed = committed
+        self.db.set_crawl_run_committed(self.run_id, committed)
+
+    def get_done_count(self) -> Dict[str, int]:
+        """按类型统计已完成的项数"""
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for kind, _ in self._done:
+                counts[kind] = counts.get(kind, 0) + 1
+        return counts
+
+    def finish(self, status: str = 'finished'):
+        """运行结束（文章均已入库）：删除断点和暂存文件"""
+        self.db.finish_crawl_run(self.run_id, status)
+        self.spool.remove()
@@ -0,0 +1,155 @@
+"""
+运行锁
+main.py、run_crawler.py、quick_start.py 和 scheduler.py 都可能触发爬取，多个进程同时爬取会重复访问各站点，
+同时写入同一个SQLite文件时出现 database is locked。爬取前在数据库中取得运行锁（带租约），
+持有期间由心跳线程定期续约并写入进度；持有进程退出或卡死后租约到期，锁可被其他进程接管。
+整次爬取（每日任务、到期来源抓取、RSS轮询）取得独占锁；任务队列的工作进程（crawl_worker.py、持续抓取模式的工作线程）
+每执行一个任务取得一次共享锁，工作进程之间可以同时执行，但与整次爬取互斥。
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from config import Config
+
+
+class RunLock:
+    """一个名称的跨进程运行锁，shared 为 True 时为共享锁"""
+
+    def __init__(self, db, name: str = 'crawl', owner: Optional[str] = None,
+                 lease_seconds: float = Config.RUN_LOCK_LEASE_SECONDS,
+                 heartbeat_seconds: float = Config.RUN_LOCK_HEARTBEAT_SECONDS, shared: bool = False):
+        self.db = db
+        self.name = name
+        self.shared = shared
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        # 心跳时写入锁记录的进度，供等待的进程和状态接口查看
+        self.progress: Optional[Callable[[], Dict]] = None
+        # 锁被其他进程接管（本进程心跳中断超过租约时长）时调用
+        self.on_lost: Optional[Callable[[], None]] = None
+        self.held = False
+        self.lost = False
+        self._stopped = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def acquire(self, wait: bool = False) -> bool:
+        """尝试取得锁，不等待；取得后启动心跳线程
+
+        wait 为 True 时（独占锁）未取得则登记排队，之后新的共享锁请求让出，直到本请求取得或排队标记过期。
+        """
+        acquired, previous = self.db.acquire_run_lock(self.name, self.owner, self.lease_seconds,
+                                                      shared=self.shared, wait=wait)
+        if not acquired:
+            # 工作进程在整次爬取期间反复尝试，由调用方记录一次
+            log = logging.debug if self.shared else logging.warning
+            log(f"运行锁 {self.name} 正由 {previous['owner']} 持有"
+                f"（{time.time() - previous['heartbeat_at']:.0f} 秒前心跳），{self.owner} 未能取得")
+            return False
+        if not self.shared and previous and previous['owner'] and previous['owner'] != self.owner:
+            logging.warning(f"接管运行锁 {self.name}: 原持有者 {previous['owner']} 已 "
+                            f"{time.time() - previous['heartbeat_at']:.0f} 秒没有心跳")
+        self.held = True
+        self.lost = False
+        self._stopped.clear()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name=f"run-lock-{self.name}", daemon=True)
+        self._heartbeat.start()
+        return True
+
+    def wait_released(self, timeout: float, poll_seconds: Optional[float] = None) -> bool:
+        """等待当前持有者释放锁（或租约到期），期间记录其进度；超时返回 False"""
+        poll_seconds = poll_seconds or Config.RUN_LOCK_POLL_SECONDS
+        deadline = time.time() + timeout
+        last_progress = None
+        while True:
+            status = get_run_lock_status(self.db, self.name)
+            if status['state'] != 'running':
+                return True
+            if status['progress'] != last_progress:
+                last_progress = status['progress']
+                logging.info(f"等待 {status['owner']} 的爬取结束，当前进度: {last_progress or '未知'}")
+            if time.time() >= deadline:
+                return False
+            time.sleep(min(poll_seconds, max(0.0, deadline - time.time())))
+
+    def wait_acquire(self, timeout: float, poll_seconds: Optional[float] = None) -> bool:
+        """排在当前持有者之后：等其结束后取得锁；多个等待者同时尝试时只有一个取得，其余继续等待
+
+        排队期间工作进程不再开始新的任务，执行中的任务完成后即可取得。
+        """
+        poll_seconds = poll_seconds or Config.RUN_LOCK_POLL_SECONDS
+        deadline = time.time() + timeout
+        while not self.acquire(wait=not self.shared):
+            if time.time() >= deadline:
+                return False
+            time.sleep(min(poll_seconds, max(0.0, deadline - time.time())))
+        return True
+
+    def release(self):
+        """停止心跳并释放锁"""
+        if not self.held:
+            return
+        self._stopped.set()
+        if self._heartbeat is not None and self._heartbeat is not threading.current_thread():
+            self._heartbeat.join()
+        self.held = False
+        if not self.lost:
+            self.db.release_run_lock(self.name, self.owner, shared=self.shared)
+
+    def __enter__(self) -> 'RunLock':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(self.heartbeat_seconds):
+            try:
+                progress = self.progress() if self.progress else None
+                renewed = self.db.renew_run_lock(self.name, self.owner, self.lease_seconds, progress,
+                                                 shared=self.shared)
+            except Exception as e:
+                # 数据库暂时不可写时下次再续约，租约时长是心跳间隔的数倍
+                logging.warning(f"运行锁 {self.name} 续约失败: {e}")
+                continue
+            if not renewed:
+                self.lost = True
+                logging.error(f"运行锁 {self.name} 已被其他进程接管，停止本次爬取")
+                if self.on_lost:
+                    self.on_lost()
+                return
+
+
+def get_run_lock_status(db, name: str = 'crawl', now: Optional[float] = None) -> Dict:
+    """运行锁的状态：state 为 'idle'（空闲）、'running'（有独占或共享持有者）或 'stale'（独占租约已过期，可被接管），
+    以及独占持有者、心跳间隔、进度、共享持有者（工作进程）、排队的独占请求和争用/接管次数"""
+    now = time.time() if now is None else now
+    row = db.get_run_lock(name) or {}
+    shares = [share['owner'] for share in row.get('shares', []) if share['expires_at'] > now]
+    if row.get('owner') and row['expires_at'] > now or shares:
+        state = 'running'
+    elif row.get('owner'):
+        state = 'stale'
+    else:
+        state = 'idle'
+    return {
+        'name': name,
+        'state': state,
+        'owner': row.get('owner') or (shares[0] if shares else None),
+        'acquired_at': row.get('acquired_at'),
+        'heartbeat_age': round(now - row['heartbeat_at'], 1) if row.get('owner') else None,
+        'progress': json.loads(row['progress']) if row.get('progress') else None,
+        'released_at': row.get('released_at'),
+        'shared_holders': shares,
+        'waiting': row.get('waiting_owner') if (row.get('waiting_until') or 0) > now else None,
+        'contended': row.get('contended') or 0,
+        'last_contender': row.get('last_contender'),
+        'last_contended_at': row.get('last_contended_at'),
+        'takeovers': row.get('takeovers') or 0,
+    }
@@ -0,0 +1,296 @@
+"""
+站点发现
+读取站点的 robots.txt（Crawl-delay、Sitemap 声明）和首页声明的 RSS/Atom 订阅源，结果保存到数据库并定期刷新；
+站点地图边下载边解析，按 lastmod 只返回上次处理之后新增或修改的页面
+"""
+
+import gzip
+import heapq
+import threading
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from typing import IO, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+from bs4 import BeautifulSoup
+
+from config import Config
+from .html_parser import parse_html
+
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml', 'application/feed+json')
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """解析站点地图的 lastmod（W3C 日期时间），无法解析时返回None；未带时区的按UTC处理"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_sitemap(stream: IO[bytes]) -> Iterator[Tuple[str, str, Optional[float]]]:
+    """流式解析站点地图或站点地图索引，逐条返回 ('url' 或 'sitemap', loc, lastmod)
+
+    每处理完一条即清空已解析的元素，内存占用与文件大小无关；根元素不是 urlset 或 sitemapindex 时抛出 ValueError
+    （如返回200的“页面不存在”HTML页面）。
+    """
+    root = None
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if root is None:
+            if _local_name(element.tag) not in ('urlset', 'sitemapindex'):
+                raise ValueError(f"不是站点地图: <{_local_name(element.tag)}>")
+            root = element
+            continue
+        if event != 'end':
+            continue
+        kind = _local_name(element.tag)
+        if kind not in ('url', 'sitemap'):
+            continue
+        loc = lastmod = None
+        for child in element:
+            name = _local_name(child.tag)
+            if name == 'loc':
+                loc = (child.text or '').strip()
+            elif name == 'lastmod':
+                lastmod = parse_lastmod(child.text)
+        if loc:
+            yield kind, loc, lastmod
+        root.clear()
+
+
+def find_feed_links(soup: BeautifulSoup, base_url: str) -> List[str]:
+    """页面中 <link rel="alternate"> 声明的订阅源"""
+    feeds = []
+    for link in soup.find_all('link', href=True):
+        rel = link.get('rel') or []
+        if 'alternate' in rel and (link.get('type') or '').lower() in FEED_TYPES:
+            feeds.append(urljoin(base_url, link['href']))
+    return list(dict.fromkeys(feeds))
+
+
+class SiteInfo:
+    """一个站点（主机）的发现结果和站点地图处理进度"""
+
+    def __init__(self, site: str, robots_txt: str = '', crawl_delay: Optional[float] = None,
+                 sitemaps: Optional[List[str]] = None, feeds: Optional[List[str]] = None,
+                 sitemap_lastmod: Optional[float] = None, discovered_at: Optional[datetime] = None,
+                 sitemap_pending: Optional[List[Tuple[str, float]]] = None):
+        self.site = site
+        self.robots_txt = robots_txt
+        self.crawl_delay = crawl_delay
+        self.sitemaps = list(sitemaps or [])
+        self.feeds = list(feeds or [])
+        # 已处理的站点地图条目中最新的 lastmod
+        self.sitemap_lastmod = sitemap_lastmod
+        # 已越过处理进度、但因数量限制还未抓取的页面 [(url, lastmod)]，下次运行继续抓取
+        self.sitemap_pending = [(url, lastmod) for url, lastmod in (sitemap_pending or [])]
+        self.discovered_at = discovered_at
+        self._robots: Optional[RobotFileParser] = None
+
+    @property
+    def has_sources(self) -> bool:
+        return bool(self.sitemaps or self.feeds)
+
+    def _robots_parser(self) -> RobotFileParser:
+        if self._robots is None:
+            self._robots = RobotFileParser()
+            self._robots.parse(self.robots_txt.splitlines())
+            self._robots.modified()
+        return self._robots
+
+    def can_fetch(self, url: str) -> bool:
+        """robots.txt 是否允许抓取该URL"""
+        if not self.robots_txt:
+            return True
+        return self._robots_parser().can_fetch(Config.USER_AGENT, url)
+
+    def is_guessed(self, sitemap_url: str) -> bool:
+        """站点地图是否为 robots.txt 没有声明时猜测的默认位置"""
+        return sitemap_url not in (self._robots_parser().site_maps() or [])
+
+    def is_stale(self, refresh_days: float, now: Optional[datetime] = None) -> bool:
+        return self.discovered_at is None or (now or datetime.now()) - self.discovered_at >= timedelta(days=refresh_days)
+
+    def is_new(self, lastmod: Optional[float]) -> bool:
+        """条目是否在上次处理之后新增或修改；没有 lastmod 的条目无法判断，按新条目处理"""
+        return lastmod is None or self.sitemap_lastmod is None or lastmod > self.sitemap_lastmod
+
+    def to_dict(self) -> Dict:
+        return {
+            'site': self.site,
+            'robots_txt': self.robots_txt,
+            'crawl_delay': self.crawl_delay,
+            'sitemaps': self.sitemaps,
+            'feeds': self.feeds,
+            'sitemap_lastmod': self.sitemap_lastmod,
+            'discovered_at': self.discovered_at.isoformat() if self.discovered_at else None,
+            'sitemap_pending': [list(page) for page in self.sitemap_pending],
+        }
+
+    @classmethod
+    def from_dict(cls, row: Dict) -> 'SiteInfo':
+        discovered_at = row.get('discovered_at')
+        return cls(row['site'], row.get('robots_txt') or '', row.get('crawl_delay'),
+                   row.get('sitemaps'), row.get('feeds'), row.get('sitemap_lastmod'),
+                   datetime.fromisoformat(discovered_at) if discovered_at else None,
+                   row.get('sitemap_pending'))
+
+
+class SourceDiscovery:
+    """按主机缓存的站点发现结果"""
+
+    def __init__(self, refresh_days: float = Config.DISCOVERY_REFRESH_DAYS):
+        self.refresh_days = refresh_days
+        self.db = None
+        self._sites: Dict[str, SiteInfo] = {}
+        self._lock = threading.Lock()
+
+    def load_from_database(self, db):
+        """从数据库加载已发现的站点信息，之后的更新同时写回数据库"""
+        sites = {row['site']: SiteInfo.from_dict(row) for row in db.get_site_discoveries()}
+        with self._lock:
+            self.db = db
+            self._sites = sites
+
+    def get(self, site: str) -> Optional[SiteInfo]:
+        with self._lock:
+            return self._sites.get(site)
+
+    def save(self, info: SiteInfo):
+        with self._lock:
+            self._sites[info.site] = info
+            db = self.db
+        if db is not None:
+            db.save_site_discovery(info.to_dict())
+
+    def discover(self, url: str, fetch_engine, homepage_html: Optional[str] = None, budget=None) -> SiteInfo:
+        """返回URL所在站点的发现结果，未发现过或已过期时读取 robots.txt 和页面声明的订阅源
+
+        同一站点的多个入口页声明的订阅源合并保存；robots.txt 的 Crawl-delay 同时应用到限速。
+        """
+        parts = urlsplit(url)
+        site = parts.netloc.lower()
+        info = self.get(site)
+        if info is None or info.is_stale(self.refresh_days):
+            robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+            result = fetch_engine.fetch_one(robots_url, retries=1, budget=budget)
+            robots_txt = result.text or ''
+            robots = RobotFileParser()
+            robots.parse(robots_txt.splitlines())
+            crawl_delay = robots.crawl_delay(Config.USER_AGENT)
+            # 没有声明站点地图时尝试默认位置，不存在时在读取时移除
+            sitemaps = robots.site_maps() or [f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
+            previous = info or SiteInfo(site)
+            info = SiteInfo(site, robots_txt, float(crawl_delay) if crawl_delay is not None else None,
+                            sitemaps, previous.feeds, previous.sitemap_lastmod, datetime.now(),
+                            previous.sitemap_pending)
+            self.save(info)
+
+        if homepage_html:
+            feeds = [feed for feed in find_feed_links(parse_html(homepage_html), url) if feed not in info.feeds]
+            if feeds:
+                info.feeds.extend(feeds)
+                self.save(info)
+
+        if info.crawl_delay and fetch_engine.politeness is not None:
+            fetch_engine.politeness.set_crawl_delay(parts.hostname or site,
+                                                    min(info.crawl_delay, Config.DISCOVERY_MAX_CRAWL_DELAY))
+        return info
+
+    def new_sitemap_pages(self, info: SiteInfo, fetch_engine, accept: Callable[[str], bool],
+                          budget=None) -> Tuple[List[Tuple[str, Optional[float]]], Optional[float], bool]:
+        """读取站点地图，返回上次处理之后新增或修改、且 accept 接受的页面 [(url, lastmod)]（从新到旧，
+        含上次未抓取完的页面）、本次看到的最新 lastmod，以及读到的站点地图中是否列有 accept 接受的页面（不论新旧）
+
+        猜测的默认位置返回错误或不是站点地图时移除；robots.txt 声明的站点地图只在 404/410 时移除。
+
+        站点地图索引中未修改的子站点地图不下载；每个站点最多读取 SITEMAP_MAX_FILES 个文件，
+        保留最新的 SITEMAP_MAX_ENTRIES 个页面。
+        """
+        pending = list(info.sitemaps)
+        visited = set()
+        missing = []
+        pages: Dict[str, Optional[float]] = dict(info.sitemap_pending)
+        newest = info.sitemap_lastmod
+        relevant = False
+
+        def scan(stream) -> Tuple[List[str], List[Tuple[float, str, Optional[float]]], int]:
+            # 在抓取线程中执行；重试时重新调用，结果不依赖外部状态
+            if stream.peek(2)[:2] == b'\x1f\x8b':
+                stream = gzip.GzipFile(fileobj=stream)
+            children, entries, accepted = [], [], 0
+            for kind, loc, lastmod in iter_sitemap(stream):
+                if kind == 'sitemap':
+                    if info.is_new(lastmod):
+                        children.append(loc)
+                    continue
+                if not accept(loc) or not info.can_fetch(loc):
+                    continue
+                accepted += 1
+                if info.is_new(lastmod):
+                    entry = (lastmod or 0.0, loc, lastmod)
+                    if len(entries) < Config.SITEMAP_MAX_ENTRIES:
+                        heapq.heappush(entries, entry)
+                    else:
+                        heapq.heappushpop(entries, entry)
+            return children, entries, accepted
+
+        while pending and len(visited) < Config.SITEMAP_MAX_FILES:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            result = fetch_engine.fetch_one(sitemap_url, retries=1, budget=budget, consume=scan)
+            if sitemap_url in info.sitemaps and (
+                    result.status_code in (404, 410) or
+                    (not result.ok and result.skip_reason != 'budget' and info.is_guessed(sitemap_url))):
+                missing.append(sitemap_url)
+            if not result.ok:
+                continue
+            children, entries, accepted = result.data
+            pending.extend(children)
+            relevant = relevant or accepted > 0
+            for _, loc, lastmod in entries:
+                pages[loc] = lastmod
+                if lastmod is not None and (newest is None or lastmod > newest):
+                    newest = lastmod
+
+        if missing:
+            info.sitemaps = [sitemap for sitemap in info.sitemaps if sitemap not in missing]
+            self.save(info)
+        ordered = sorted(pages.items(), key=lambda item: -(item[1] or 0.0))
+        return ordered[:Config.SITEMAP_MAX_ENTRIES], newest, relevant
+
+    def advance_sitemaps(self, info: SiteInfo, lastmod: Optional[float],
+                         pending: Optional[List[Tuple[str, float]]] = None):
+        """记录站点地图已处理到的 lastmod，以及越过进度但还未抓取的页面（下次运行继续抓取）"""
+        pending = list(pending or [])[:Config.SITEMAP_MAX_ENTRIES]
+        advanced = lastmod is not None and (info.sitemap_lastmod is None or lastmod > info.sitemap_lastmod)
+        if advanced or pending != info.sitemap_pending:
+            if advanced:
+                info.sitemap_lastmod = lastmod
+            info.sitemap_pending = pending
+            self.save(info)
+
+
+_default_discovery = None
+_default_discovery_lock = threading.Lock()
+
+
+def get_source_discovery() -> SourceDiscovery:
+    """获取进程内共享的站点发现结果"""
+    global _default_discovery
+    with _default_discovery_lock:
+        if _default_discovery is None:
+            _default_discovery = SourceDiscovery()
+        return _default_discovery
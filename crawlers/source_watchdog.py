@@ -0,0 +1,117 @@
+"""
+来源看门狗
+feedparser.parse、arxiv 的结果迭代和部分页面解析没有超时，连接卡住时会一直阻塞爬取线程，整次运行无法结束。
+每个来源的访问在单独的线程中执行并设有期限（按爬虫类配置），超时后放弃该线程、把来源记为超时并继续下一个来源。
+Python 无法强行终止线程：被放弃的线程设为守护线程，阻塞解除后在下一次交出文章或发出请求时抛出 SourceTimeout 退出，
+不再交出文章或更新爬虫状态。各来源的超时次数记入数据库。
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+
+_local = threading.local()
+
+
+class SourceTimeout(Exception):
+    """来源访问超过期限"""
+
+    def __init__(self, source: str, deadline: float):
+        super().__init__(f"来源 {source} 超过 {deadline:g} 秒未完成")
+        self.source = source
+        self.deadline = deadline
+
+
+def is_abandoned() -> bool:
+    """当前线程是否为已被看门狗放弃的来源线程"""
+    return any(event.is_set() for event, _, _ in getattr(_local, 'abandoned', ()))
+
+
+def check_abandoned():
+    """当前线程已被放弃时抛出 SourceTimeout，让卡住后恢复的线程尽快退出"""
+    for event, source, deadline in getattr(_local, 'abandoned', ()):
+        if event.is_set():
+            raise SourceTimeout(source, deadline)
+
+
+class SourceWatchdog:
+    """在期限内执行各来源的访问，统计各来源的超时次数"""
+
+    def __init__(self):
+        self.db = None
+        self._trips: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def load_from_database(self, db):
+        """从数据库加载各来源的超时次数，之后的超时同时写回数据库"""
+        trips = {row['source']: row['trips'] for row in db.get_source_timeouts()}
+        with self._lock:
+            self.db = db
+            self._trips = trips
+
+    def run(self, source: str, deadline: Optional[float], crawl: Callable, *args, crawler: str = '') -> Any:
+        """在单独的线程中执行 crawl(*args) 并返回其结果；超过 deadline 秒时放弃该线程并抛出 SourceTimeout
+
+        deadline 为 None 时直接在当前线程中执行；在来源线程中再访问的来源（嵌套访问）也直接执行，受外层来源的期限约束。
+        """
+        if deadline is None or getattr(_local, 'abandoned', None):
+            return crawl(*args)
+        abandoned = threading.Event()
+        result: List[Any] = []
+        errors: List[BaseException] = []
+
+        def target():
+            _local.abandoned = [(abandoned, source, deadline)]
+            try:
+                result.append(crawl(*args))
+            except BaseException as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=target, name=f"source-{source}"[:64], daemon=True)
+        thread.start()
+        thread.join(deadline)
+        if thread.is_alive():
+            abandoned.set()
+            self.record_timeout(source, crawler, deadline)
+            raise SourceTimeout(source, deadline)
+        if errors:
+            raise errors[0]
+        return result[0] if result else None
+
+    def record_timeout(self, source: str, crawler: str = '', deadline: float = 0):
+        """记录一次超时"""
+        with self._lock:
+            trips = self._trips[source] = self._trips.get(source, 0) + 1
+            db = self.db
+        logging.warning(f"来源 {source} 超过 {deadline:g} 秒未完成，已放弃（累计超时 {trips} 次）")
+        if db is not None:
+            try:
+                db.record_source_timeout(source, crawler, deadline, datetime.now().isoformat())
+            except Exception as e:
+                logging.error(f"记录来源超时失败: {e}")
+
+    def get_trips(self) -> Dict[str, int]:
+        """各来源的累计超时次数"""
+        with self._lock:
+            return dict(self._trips)
+
+
+def source_deadline(crawler_class: type) -> Optional[float]:
+    """爬虫类的来源访问期限（秒）：按类名查 SOURCE_DEADLINES，未配置时使用 SOURCE_DEADLINE_SECONDS"""
+    return Config.SOURCE_DEADLINES.get(crawler_class.__name__, Config.SOURCE_DEADLINE_SECONDS)
+
+
+_default_watchdog = None
+_default_watchdog_lock = threading.Lock()
+
+
+def get_source_watchdog() -> SourceWatchdog:
+    """获取进程内共享的来源看门狗"""
+    global _default_watchdog
+    with _default_watchdog_lock:
+        if _default_watchdog is None:
+            _default_watchdog = SourceWatchdog()
+        return _default_watchdog
@@ -0,0 +1,249 @@
+"""
+爬取任务队列
+一次爬取拆分为细粒度任务（一个订阅源、一个入口页、一个关键词查询、一个文章URL）保存在SQLite中，
+由多个工作进程（python crawl_worker.py）领取执行。领取的任务带租约，执行中定期续约；
+工作进程退出后租约到期，任务可被其他进程重新领取。失败的任务按次数退避重试，超过次数上限后放弃。
+任务默认保存在本机的 SQLite 文件中；TASK_QUEUE_URL 设为 PostgreSQL 连接串时保存在共享的数据库中，
+多台机器的工作进程可以共用一个队列（见 task_store.py）。
+"""
+
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import Config
+from .article_pipeline import ArticlePipeline
+from .crawl_budget import CrawlBudget
+from .dead_letters import DeadLetterQueue
+from .revisit_planner import get_revisit_planner
+from .run_lock import RunLock
+from .task_store import TaskStore, create_task_store
+from .url_frontier import get_url_frontier
+
+
+class CrawlTask:
+    """一个爬取任务：crawler 为爬虫名称（如 'news'），kind 为任务类型，key 在同类任务中唯一"""
+
+    def __init__(self, kind: str, key: str, payload: Optional[Dict] = None, crawler: str = '',
+                 priority: Optional[int] = None):
+        self.kind = kind
+        self.key = key
+        self.payload = payload or {}
+        self.crawler = crawler
+        self.priority = Config.TASK_PRIORITIES.get(kind, 0) if priority is None else priority
+        # 以下字段在领取任务时由队列填写
+        self.id: Optional[int] = None
+        self.attempts = 0
+
+    @classmethod
+    def from_row(cls, row) -> 'CrawlTask':
+        task = cls(row['kind'], row['key'], json.loads(row['payload'] or '{}'), row['crawler'], row['priority'])
+        task.id = row['id']
+        task.attempts = row['attempts']
+        return task
+
+    def __repr__(self) -> str:
+        return f"CrawlTask({self.crawler}:{self.kind}:{self.key})"
+
+
+class TaskQueue:
+    """持久任务队列，可被多个进程同时使用；任务状态保存在 TaskStore 中（见 task_store.py）"""
+
+    def __init__(self, location: Optional[str] = None, lease_seconds: float = Config.TASK_LEASE_SECONDS,
+                 max_attempts: int = Config.TASK_MAX_ATTEMPTS, store: Optional[TaskStore] = None):
+        """location 为 SQLite 文件路径或 PostgreSQL 连接串，默认为 TASK_QUEUE_URL，未配置时为 TASK_QUEUE_PATH"""
+        self.location = location or Config.TASK_QUEUE_URL or Config.TASK_QUEUE_PATH
+        self.store = store or create_task_store(self.location)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def enqueue(self, tasks: Iterable[CrawlTask], available_at: Optional[float] = None, jitter: float = 0) -> int:
+        """加入任务，返回新加入的任务数（已在等待或执行中的任务忽略）
+
+        各任务的可执行时间在 available_at（默认当前时间）之后随机延后 0~jitter 秒，错开请求。
+        """
+        now = time.time()
+        return self.store.enqueue([{
+            'crawler': task.crawler,
+            'kind': task.kind,
+            'key': task.key,
+            'payload': json.dumps(task.payload, ensure_ascii=False),
+            'priority': task.priority,
+            'available_at': (available_at or now) + random.uniform(0, jitter),
+            'created_at': now
+        } for task in tasks])
+
+    def lease(self, owner: str, limit: int = 1, now: Optional[float] = None) -> List[CrawlTask]:
+        """领取最多 limit 个可执行的任务（优先级高的先领取），租约到期的任务视为可执行
+
+        租约到期时次数已用完的任务（执行它的进程多次异常退出）直接放弃。
+        """
+        now = now or time.time()
+        rows = self.store.lease(owner, limit, now, now + self.lease_seconds, self.max_attempts)
+        return [CrawlTask.from_row(row) for row in rows]
+
+    def renew(self, task: CrawlTask, owner: str) -> bool:
+        """续约，租约已被其他进程接管时返回False"""
+        return self.store.renew(task.id, owner, time.time() + self.lease_seconds)
+
+    def complete(self, task: CrawlTask, owner: str) -> bool:
+        """任务完成"""
+        return self.store.complete(task.id, owner, time.time())
+
+    def retry_delay(self, attempts: int) -> float:
+        """第 attempts 次失败后到下次重试的间隔（秒）"""
+        return Config.TASK_RETRY_MINUTES * 60 * 2 ** (attempts - 1)
+
+    def fail(self, task: CrawlTask, owner: str, error: str = '', now: Optional[float] = None) -> str:
+        """任务失败：次数未用完时退避后重试，返回 'retry' 或 'failed'"""
+        now = now or time.time()
+        error = (error or '')[:500]
+        if task.attempts >= self.max_attempts:
+            self.store.fail(task.id, owner, error, now, None)
+            return 'failed'
+        self.store.fail(task.id, owner, error, now, now + self.retry_delay(task.attempts))
+        return 'retry'
+
+    def release(self, task: CrawlTask, owner: str) -> bool:
+        """归还未执行的任务，不计入失败次数"""
+        return self.store.release(task.id, owner)
+
+    def get_active_keys(self) -> Set[Tuple[str, str, str]]:
+        """等待或执行中的任务的 (crawler, kind, key)"""
+        return self.store.get_active_keys()
+
+    def get_stats(self) -> Dict[str, int]:
+        """按状态统计任务数"""
+        stats = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        stats.update(self.store.count_by_status())
+        return stats
+
+    def purge(self, days: int = Config.TASK_RETENTION_DAYS) -> int:
+        """删除 days 天前结束的任务记录"""
+        return self.store.purge(time.time() - days * 86400)
+
+
+def enqueue_crawl_tasks(queue: TaskQueue, db, families, keywords: List[str] = Config.SEARCH_KEYWORDS,
+                        limit: Optional[int] = None, jitter: float = 0) -> int:
+    """把各爬虫到了访问时间的来源拆分为任务加入队列，返回新加入的任务数
+
+    families 为 (爬虫名称, 日志中的名称, 爬虫类) 列表（见 CrawlerScheduler.CRAWLERS）。
+    limit 限制本次加入的任务数（优先级高的先加入，其余仍处于到期状态，留到下次），jitter 见 TaskQueue.enqueue。
+    """
+    # 重访记录由各工作进程写入数据库，规划前重新加载
+    planner = get_revisit_planner()
+    if planner.db is not None:
+        planner.load_from_database(planner.db)
+    tasks = []
+    for name, label, crawler_class in families:
+        crawler = crawler_class()
+        crawler.dead_letters = DeadLetterQueue(db, name)
+        for task in crawler.plan_tasks(keywords):
+            task.crawler = name
+            tasks.append(task)
+    planned = len(tasks)
+    if limit is not None:
+        active = queue.get_active_keys()
+        tasks = [task for task in tasks if (task.crawler, task.kind, task.key) not in active]
+        tasks = sorted(tasks, key=lambda task: -task.priority)[:max(0, limit)]
+    added = queue.enqueue(tasks, jitter=jitter)
+    logging.info(f"到期的爬取任务 {planned} 个，新加入队列 {added} 个")
+    return added
+
+
+class TaskWorker:
+    """在一个进程中循环领取并执行任务，文章经入库流水线写入数据库"""
+
+    def __init__(self, queue: TaskQueue, db, families, owner: Optional[str] = None,
+                 keywords: List[str] = Config.SEARCH_KEYWORDS):
+        self.queue = queue
+        self.db = db
+        self.families = {name: crawler_class for name, _, crawler_class in families}
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+        self.keywords = keywords
+        self._crawlers = {}
+        self.stats = {'done': 0, 'retried': 0, 'failed': 0, 'articles': 0}
+
+    def _crawler(self, name: str):
+        """各爬虫在本进程中只创建一次，任务之间复用"""
+        if name not in self._crawlers:
+            crawler = self.families[name]()
+            crawler.dead_letters = DeadLetterQueue(self.db, name)
+            self._crawlers[name] = crawler
+        return self._crawlers[name]
+
+    def run(self, stop: Optional[threading.Event] = None, drain: bool = False) -> Dict[str, int]:
+        """领取任务执行，直到 stop 被设置；drain 为True时队列中没有可执行的任务即返回"""
+        stop = stop or threading.Event()
+        paused = False
+        with ArticlePipeline(self.db, get_url_frontier()) as pipeline:
+            while not stop.is_set():
+                # 每个任务在运行锁的共享租约下执行，与整次爬取（run_daily_crawl 等）互斥
+                lock = RunLock(self.db, owner=self.owner, shared=True)
+                if not lock.acquire():
+                    if not paused:
+                        logging.info(f"工作进程 {self.owner}: 整次爬取正在进行或排队，暂停领取任务")
+                        paused = True
+                    stop.wait(Config.TASK_POLL_SECONDS)
+                    continue
+                paused = False
+                with lock:
+                    tasks = self.queue.lease(self.owner)
+                    if tasks:
+                        self.run_task(tasks[0], pipeline, lock)
+                if not tasks:
+                    if drain:
+                        break
+                    stop.wait(Config.TASK_POLL_SECONDS)
+        logging.info(f"工作进程 {self.owner} 结束: 完成 {self.stats['done']} 个任务，重试 {self.stats['retried']} 个，"
+                     f"放弃 {self.stats['failed']} 个，获取 {self.stats['articles']} 篇文章")
+        return self.stats
+
+    def run_task(self, task: CrawlTask, pipeline: ArticlePipeline, lock: Optional[RunLock] = None):
+        """执行一个任务，期间定期续约；文章写入数据库后才标记完成
+
+        lock 为本任务持有的运行锁共享租约，租约失效时停止本任务。
+        """
+        if task.crawler not in self.families:
+            self.stats['failed'] += 1
+            self.queue.fail(task, self.owner, f"未知的爬虫: {task.crawler}")
+            return
+        crawler = self._crawler(task.crawler)
+        crawler.budget = CrawlBudget.from_config(task.crawler)
+        crawler.timed_out = []
+        if lock is not None:
+            lock.on_lost = lambda: crawler.budget.cancel('lock_lost')
+        finished = threading.Event()
+        renewer = threading.Thread(target=self._renew_lease, args=(task, crawler.budget, finished),
+                                   name=f"lease-{task.id}", daemon=True)
+        renewer.start()
+        try:
+            accepted = pipeline.consume(crawler.stream(self.keywords, lambda keywords: crawler.run_task(task, keywords)))
+            pipeline.flush()
+            self.stats['articles'] += accepted
+            if crawler.budget.cancelled:
+                raise RuntimeError(f"任务被取消: {crawler.budget.truncated}")
+            if crawler.timed_out:
+                raise RuntimeError(f"来源访问超时: {'，'.join(crawler.timed_out)}")
+            self.queue.complete(task, self.owner)
+            self.stats['done'] += 1
+        except Exception as e:
+            result = self.queue.fail(task, self.owner, str(e))
+            self.stats['retried' if result == 'retry' else 'failed'] += 1
+            logging.warning(f"任务 {task} 第 {task.attempts} 次执行失败（{result}）: {e}")
+        finally:
+            finished.set()
+            renewer.join()
+
+    def _renew_lease(self, task: CrawlTask, budget: CrawlBudget, finished: threading.Event):
+        """每隔租约时长的三分之一续约一次；租约已被其他进程接管时停止本任务"""
+        while not finished.wait(self.queue.lease_seconds / 3):
+            if not self.queue.renew(task, self.owner):
+                logging.warning(f"任务 {task} 的租约已失效，停止执行")
+                budget.cancel('lease_lost')
+                return
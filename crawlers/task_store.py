@@ -0,0 +1,261 @@
+"""
+任务队列的存储
+TaskQueue 只通过 TaskStore 的接口（加入、领取、续约、完成、失败、归还）改变任务状态，存储负责保证
+同一任务同一时间只被一个工作进程领取。SqliteTaskStore 保存在本机的 SQLite 文件中，供单机和测试使用；
+PostgresTaskStore 保存在 PostgreSQL 中，多台机器的工作进程可以共用一个队列（SQLite 在网络文件系统上加锁不可靠）。
+两种存储使用相同的表结构和语句，只在连接、加锁和占位符上不同。
+"""
+
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import psycopg2
+    import psycopg2.extras
+except ImportError:  # 只有共享队列需要
+    psycopg2 = None
+
+POSTGRES_SCHEMES = ('postgresql://', 'postgres://')
+
+
+class TaskStore(ABC):
+    """任务状态的存储接口，任务以字典表示（字段同 crawl_tasks 表）"""
+
+    @abstractmethod
+    def enqueue(self, rows: List[Dict]) -> int:
+        """加入任务，返回新加入的任务数；同一 (crawler, kind, key) 已在等待或执行中时忽略"""
+
+    @abstractmethod
+    def lease(self, owner: str, limit: int, now: float, lease_expires: float, max_attempts: int) -> List[Dict]:
+        """领取最多 limit 个可执行的任务（租约到期的视为可执行），返回领取后的任务；
+        租约到期且次数已用完的任务直接放弃"""
+
+    @abstractmethod
+    def renew(self, task_id: int, owner: str, lease_expires: float) -> bool:
+        """续约，租约已被其他进程接管时返回False"""
+
+    @abstractmethod
+    def complete(self, task_id: int, owner: str, now: float) -> bool:
+        """标记完成"""
+
+    @abstractmethod
+    def fail(self, task_id: int, owner: str, error: str, now: float, retry_at: Optional[float]) -> bool:
+        """标记失败：retry_at 为 None 时放弃，否则到时重新等待领取"""
+
+    @abstractmethod
+    def release(self, task_id: int, owner: str) -> bool:
+        """归还任务，不计入失败次数"""
+
+    @abstractmethod
+    def get_active_keys(self) -> Set[Tuple[str, str, str]]:
+        """等待或执行中的任务的 (crawler, kind, key)"""
+
+    @abstractmethod
+    def count_by_status(self) -> Dict[str, int]:
+        """按状态统计任务数"""
+
+    @abstractmethod
+    def purge(self, finished_before: float) -> int:
+        """删除在 finished_before 之前结束的任务记录"""
+
+
+class _SqlTaskStore(TaskStore):
+    """SQL 存储的公共实现：语句用 ? 占位，子类提供连接、事务和建表语句"""
+
+    PLACEHOLDER = '?'
+    # 领取时锁定选中的行，PostgreSQL 跳过其他进程正在领取的行
+    LOCK_ROWS = ''
+    CREATE_TABLE = ''
+
+    @abstractmethod
+    def _transaction(self):
+        """上下文管理器：在一个事务中执行，产出游标（行可按列名访问），正常结束时提交"""
+
+    def _execute(self, cursor, sql: str, params: tuple = ()):
+        cursor.execute(sql.replace('?', self.PLACEHOLDER), params)
+        return cursor
+
+    def init_store(self):
+        """初始化任务表"""
+        with self._transaction() as cursor:
+            self._execute(cursor, self.CREATE_TABLE)
+            # 同一任务在等待或执行中时不重复加入
+            self._execute(cursor, '''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_crawl_tasks_active ON crawl_tasks (crawler, kind, key)
+                WHERE status IN ('pending', 'leased')
+            ''')
+            self._execute(cursor, 'CREATE INDEX IF NOT EXISTS idx_crawl_tasks_ready ON crawl_tasks (status, available_at)')
+
+    def enqueue(self, rows: List[Dict]) -> int:
+        added = 0
+        with self._transaction() as cursor:
+            for row in rows:
+                self._execute(cursor, '''
+                    INSERT INTO crawl_tasks (crawler, kind, key, payload, priority, available_at, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT DO NOTHING
+                ''', (row['crawler'], row['kind'], row['key'], row['payload'], row['priority'],
+                      row['available_at'], row['created_at']))
+                added += max(cursor.rowcount, 0)
+        return added
+
+    def lease(self, owner: str, limit: int, now: float, lease_expires: float, max_attempts: int) -> List[Dict]:
+        with self._transaction() as cursor:
+            self._execute(cursor, '''
+                UPDATE crawl_tasks SET status = 'failed', last_error = 'lease expired', finished_at = ?,
+                                       lease_owner = NULL, lease_expires = NULL
+                WHERE status = 'leased' AND lease_expires <= ? AND attempts >= ?
+            ''', (now, now, max_attempts))
+            rows = self._execute(cursor, '''
+                SELECT * FROM crawl_tasks
+                WHERE (status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_expires <= ?)
+                ORDER BY priority DESC, available_at, id
+                LIMIT ?
+            ''' + self.LOCK_ROWS, (now, now, limit)).fetchall()
+            tasks = []
+            for row in rows:
+                self._execute(cursor, '''
+                    UPDATE crawl_tasks SET status = 'leased', attempts = attempts + 1, lease_owner = ?, lease_expires = ?
+                    WHERE id = ?
+                ''', (owner, lease_expires, row['id']))
+                task = dict(row)
+                task.update(status='leased', attempts=task['attempts'] + 1, lease_owner=owner,
+                            lease_expires=lease_expires)
+                tasks.append(task)
+        return tasks
+
+    def _update_leased(self, task_id: int, owner: str, sql: str, params: tuple) -> bool:
+        """只更新仍由 owner 持有租约的任务，返回是否更新"""
+        with self._transaction() as cursor:
+            self._execute(cursor, f"UPDATE crawl_tasks SET {sql} WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                          params + (task_id, owner))
+            return cursor.rowcount > 0
+
+    def renew(self, task_id: int, owner: str, lease_expires: float) -> bool:
+        return self._update_leased(task_id, owner, 'lease_expires = ?', (lease_expires,))
+
+    def complete(self, task_id: int, owner: str, now: float) -> bool:
+        return self._update_leased(task_id, owner, "status = 'done', finished_at = ?, lease_owner = NULL, "
+                                                   "lease_expires = NULL, last_error = NULL", (now,))
+
+    def fail(self, task_id: int, owner: str, error: str, now: float, retry_at: Optional[float]) -> bool:
+        if retry_at is None:
+            return self._update_leased(task_id, owner, "status = 'failed', last_error = ?, finished_at = ?, "
+                                                       "lease_owner = NULL, lease_expires = NULL", (error, now))
+        return self._update_leased(task_id, owner, "status = 'pending', last_error = ?, available_at = ?, "
+                                                   "lease_owner = NULL, lease_expires = NULL", (error, retry_at))
+
+    def release(self, task_id: int, owner: str) -> bool:
+        return self._update_leased(task_id, owner, "status = 'pending', attempts = attempts - 1, "
+                                                   "lease_owner = NULL, lease_expires = NULL", ())
+
+    def get_active_keys(self) -> Set[Tuple[str, str, str]]:
+        with self._transaction() as cursor:
+            rows = self._execute(cursor, "SELECT crawler, kind, key FROM crawl_tasks "
+                                         "WHERE status IN ('pending', 'leased')").fetchall()
+        return {(row['crawler'], row['kind'], row['key']) for row in rows}
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._transaction() as cursor:
+            rows = self._execute(cursor, 'SELECT status, COUNT(*) AS count FROM crawl_tasks GROUP BY status').fetchall()
+        return {row['status']: row['count'] for row in rows}
+
+    def purge(self, finished_before: float) -> int:
+        with self._transaction() as cursor:
+            self._execute(cursor, "DELETE FROM crawl_tasks WHERE status IN ('done', 'failed') AND finished_at < ?",
+                          (finished_before,))
+            return cursor.rowcount
+
+
+class SqliteTaskStore(_SqlTaskStore):
+    """本机 SQLite 文件中的任务表，多个进程之间用 BEGIN IMMEDIATE 互斥"""
+
+    CREATE_TABLE = '''
+        CREATE TABLE IF NOT EXISTS crawl_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            crawler TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            payload TEXT,
+            priority INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            available_at REAL,
+            lease_owner TEXT,
+            lease_expires REAL,
+            last_error TEXT,
+            created_at REAL,
+            finished_at REAL
+        )
+    '''
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.init_store()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        # 手动管理事务：BEGIN IMMEDIATE 在多个进程之间互斥
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn.cursor()
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+
+class PostgresTaskStore(_SqlTaskStore):
+    """PostgreSQL 中的任务表，多台机器共用；领取时用 FOR UPDATE SKIP LOCKED 锁定选中的任务"""
+
+    PLACEHOLDER = '%s'
+    LOCK_ROWS = ' FOR UPDATE SKIP LOCKED'
+    CREATE_TABLE = '''
+        CREATE TABLE IF NOT EXISTS crawl_tasks (
+            id BIGSERIAL PRIMARY KEY,
+            crawler TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            payload TEXT,
+            priority INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            available_at DOUBLE PRECISION,
+            lease_owner TEXT,
+            lease_expires DOUBLE PRECISION,
+            last_error TEXT,
+            created_at DOUBLE PRECISION,
+            finished_at DOUBLE PRECISION
+        )
+    '''
+
+    def __init__(self, dsn: str):
+        if psycopg2 is None:
+            raise RuntimeError("使用 PostgreSQL 任务队列需要安装 psycopg2")
+        self.dsn = dsn
+        self.init_store()
+
+    @contextmanager
+    def _transaction(self) -> Iterator:
+        conn = psycopg2.connect(self.dsn)
+        try:
+            # with conn：正常结束时提交，异常时回滚
+            with conn:
+                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                    yield cursor
+        finally:
+            conn.close()
+
+
+def create_task_store(location: str) -> TaskStore:
+    """按位置创建存储：postgresql:// 连接串使用 PostgreSQL，否则为本机 SQLite 文件路径"""
+    if location.startswith(POSTGRES_SCHEMES):
+        return PostgresTaskStore(location)
+    return SqliteTaskStore(location)
@@ -1,13 +1,29 @@
 import requests
-from typing import List, Dict
+from typing import List, Dict, Optional
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import time
 import json
 from .base_crawler import BaseCrawler
+from .html_parser import parse_html
+from .url_canonical import find_canonical_link
+from .task_queue import CrawlTask
 from config import Config
 
 class TechCrawler(BaseCrawler):
+    TECH_BLOGS = [
+        "https://www.infoq.com/",
+        "https://medium.com/",
+        "https://dev.to/",
+        "https://css-tricks.com/",
+        "https://www.smashingmagazine.com/"
+    ]
+    
+    KEYWORD_SOURCES = {
+        'GitHub': ('_crawl_github', 5),
+        'Stack Overflow': ('_crawl_stackoverflow', 3),
+    }
+    
     def __init__(self):
         super().__init__()
         self.source_type = "tech"
@@ -20,82 +36,68 @@ class TechCrawler(BaseCrawler):
         self._crawl_tech_blogs(keywords)
         
         # 爬取GitHub
-        self._crawl_github(keywords)
+        self.visit_source('GitHub', self._crawl_github, keywords)
         
         # 爬取Stack Overflow
-        self._crawl_stackoverflow(keywords)
+        self.visit_source('Stack Overflow', self._crawl_stackoverflow, keywords)
         
-        print(f"技术文章爬取完成，共获取 {len(self.articles)} 篇文章")
+        print(f"技术文章爬取完成，共获取 {self.article_count} 篇文章")
         return self.articles
     
+    def plan_tasks(self, keywords: List[str]) -> List[CrawlTask]:
+        """每个技术博客首页一个任务，GitHub、Stack Overflow 每个关键词一个任务"""
+        tasks = [CrawlTask('hub', site_url) for site_url in self.TECH_BLOGS if self.revisits.is_due(site_url)]
+        return tasks + super().plan_tasks(keywords)
+    
+    def run_task(self, task: CrawlTask, keywords: List[str]):
+        if task.kind == 'hub':
+            self.visit_source(task.key, self._crawl_tech_blog, task.key, keywords)
+        else:
+            super().run_task(task, keywords)
+    
     def _crawl_tech_blogs(self, keywords: List[str]):
         """爬取技术博客"""
-        tech_sites = [
-            "https://www.infoq.com/",
-            "https://medium.com/",
-            "https://dev.to/",
-            "https://css-tricks.com/",
-            "https://www.smashingmagazine.com/"
-        ]
-        
-        for site_url in tech_sites:
-            try:
-                html = self.get_page(site_url)
-                if not html:
-                    continue
-                
-                soup = BeautifulSoup(html, 'html.parser')
-                article_links = self._find_tech_article_links(soup, site_url)
-                
-                for link in article_links[:15]:  # 限制每个网站的文章数量
-                    try:
-                        article_html = self.get_page(link)
-                        if not article_html:
-                            continue
-                        
-                        article_data = self._extract_tech_article_data(article_html, link, site_url)
-                        if article_data and self._contains_keywords(article_data['title'] + " " + article_data['content'], keywords):
-                            self.add_article(article_data)
-                        
-                        time.sleep(Config.REQUEST_DELAY)
-                        
-                    except Exception as e:
-                        print(f"处理技术文章失败 {link}: {e}")
-                        continue
-                
-            except Exception as e:
-                print(f"爬取技术博客失败 {site_url}: {e}")
-                continue
+        for site_url in self.TECH_BLOGS:
+            self.visit_source(site_url, self._crawl_tech_blog, site_url, keywords)
+    
+    def _crawl_tech_blog(self, site_url: str, keywords: List[str]):
+        """爬取单个技术博客"""
+        try:
+            html = self.get_page(site_url)
+            if not html:
+                return
+            
+            soup = parse_html(html)
+            article_links = self._find_tech_article_links(soup, site_url)
+            
+            # 限制每个网站的文章数量
+            pages = self.get_pages(self.filter_new_urls(article_links, site_url, limit=15))
+            for link, article_data in self.parse_pages(pages, self._extract_tech_article_data, site_url):
+                if article_data and self._contains_keywords(article_data['title'] + " " + article_data['content'], keywords):
+                    self.add_article(article_data)
+            
+        except Exception as e:
+            print(f"爬取技术博客失败 {site_url}: {e}")
     
     def _crawl_github(self, keywords: List[str]):
         """爬取GitHub相关项目"""
         try:
             # 搜索GitHub上的蓝牙相关项目
-            for keyword in keywords[:5]:  # 限制关键词数量
+            for keyword in self.pending_keywords('GitHub', keywords[:5]):  # 限制关键词数量
                 search_url = f"https://github.com/search?q={keyword}&type=repositories"
                 html = self.get_page(search_url)
                 
                 if html:
-                    soup = BeautifulSoup(html, 'html.parser')
+                    soup = parse_html(html)
                     repo_links = soup.select('a[data-testid="result-repo-link"]')
+                    # 限制每个关键词的仓库数量
+                    repo_urls = [urljoin("https://github.com", link.get('href')) for link in repo_links[:5]]
                     
-                    for link in repo_links[:5]:  # 限制每个关键词的仓库数量
-                        repo_url = urljoin("https://github.com", link.get('href'))
-                        
-                        try:
-                            repo_html = self.get_page(repo_url)
-                            if repo_html:
-                                repo_data = self._extract_github_repo_data(repo_html, repo_url, keyword)
-                                if repo_data:
-                                    self.add_article(repo_data)
-                            
-                            time.sleep(Config.REQUEST_DELAY)
-                            
-                        except Exception as e:
-                            print(f"处理GitHub仓库失败 {repo_url}: {e}")
-                            continue
-                
-                time.sleep(Config.REQUEST_DELAY)
+                    pages = self.get_pages(self.filter_new_urls(repo_urls, 'GitHub'))
+                    for repo_url, repo_data in self.parse_pages(pages, self._extract_github_repo_data, keyword):
+                        if repo_data:
+                            self.add_article(repo_data)
+                    self.finish_keyword('GitHub', keyword)
                 
         except Exception as e:
             print(f"爬取GitHub失败: {e}")
@@ -103,31 +105,21 @@ class TechCrawler(BaseCrawler):
     def _crawl_stackoverflow(self, keywords: List[str]):
         """爬取Stack Overflow问答"""
         try:
-            for keyword in keywords[:3]:  # 限制关键词数量
+            for keyword in self.pending_keywords('Stack Overflow', keywords[:3]):  # 限制关键词数量
                 search_url = f"https://stackoverflow.com/search?q={keyword}"
                 html = self.get_page(search_url)
                 
                 if html:
-                    soup = BeautifulSoup(html, 'html.parser')
+                    soup = parse_html(html)
                     question_links = soup.select('.question-hyperlink')
+                    # 限制每个关键词的问题数量
+                    question_urls = [urljoin("https://stackoverflow.com", link.get('href')) for link in question_links[:10]]
                     
-                    for link in question_links[:10]:  # 限制每个关键词的问题数量
-                        question_url = urljoin("https://stackoverflow.com", link.get('href'))
-                        
-                        try:
-                            question_html = self.get_page(question_url)
-                            if question_html:
-                                question_data = self._extract_stackoverflow_data(question_html, question_url, keyword)
-                                if question_data:
-                                    self.add_article(question_data)
-                            
-                            time.sleep(Config.REQUEST_DELAY)
-                            
-                        except Exception as e:
-                            print(f"处理Stack Overflow问题失败 {question_url}: {e}")
-                            continue
-                
-                time.sleep(Config.REQUEST_DELAY)
+                    pages = self.get_pages(self.filter_new_urls(question_urls, 'Stack Overflow'))
+                    for question_url, question_data in self.parse_pages(pages, self._extract_stackoverflow_data, keyword):
+                        if question_data:
+                            self.add_article(question_data)
+                    self.finish_keyword('Stack Overflow', keyword)
                 
         except Exception as e:
             print(f"爬取Stack Overflow失败: {e}")
@@ -162,7 +154,7 @@ class TechCrawler(BaseCrawler):
     
     def _extract_tech_article_data(self, html: str, url: str, source_name: str) -> Dict:
         """提取技术文章数据"""
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # 提取标题
         title = ""
@@ -185,11 +177,11 @@ class TechCrawler(BaseCrawler):
         for selector in content_selectors:
             content_elem = soup.select_one(selector)
             if content_elem:
-                content = self.extract_text(str(content_elem))
+                content = self.extract_text(content_elem)
                 break
         
         if not content:
-            content = self.extract_text(html)
+            content = self.extract_text(soup)
         
         # 提取发布日期
         publish_date = ""
@@ -206,7 +198,7 @@ class TechCrawler(BaseCrawler):
         return {
             'title': title,
             'content': content,
-            'url': url,
+            'url': find_canonical_link(soup, url) or url,
             'source_type': self.source_type,
             'source_name': source_name,
             'publish_date': publish_date,
@@ -214,9 +206,18 @@ class TechCrawler(BaseCrawler):
             'sentiment': 'neutral'
         }
     
+    def reextract(self, html: str, article: Dict) -> Optional[Dict]:
+        """按来源选择提取方法重新提取"""
+        source_name = article.get('source_name', '')
+        if source_name == 'GitHub':
+            return self._extract_github_repo_data(html, article['url'], '')
+        if source_name == 'Stack Overflow':
+            return self._extract_stackoverflow_data(html, article['url'], '')
+        return self._extract_tech_article_data(html, article['url'], source_name)
+    
     def _extract_github_repo_data(self, html: str, url: str, keyword: str) -> Dict:
         """提取GitHub仓库数据"""
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # 提取仓库名称
         title_elem = soup.select_one('h1 strong a')
@@ -228,7 +229,7 @@ class TechCrawler(BaseCrawler):
         
         # 提取README内容
         readme_elem = soup.select_one('#readme .markdown-body')
-        readme_content = self.extract_text(str(readme_elem)) if readme_elem else ""
+        readme_content = self.extract_text(readme_elem) if readme_elem else ""
         
         content = f"{description}\n\n{readme_content}"
         
@@ -245,7 +246,7 @@ class TechCrawler(BaseCrawler):
     
     def _extract_stackoverflow_data(self, html: str, url: str, keyword: str) -> Dict:
         """提取Stack Overflow数据"""
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # 提取问题标题
         title_elem = soup.select_one('.question-hyperlink')
@@ -253,13 +254,13 @@ class TechCrawler(BaseCrawler):
         
         # 提取问题内容
         question_elem = soup.select_one('.question .post-text')
-        question_content = self.extract_text(str(question_elem)) if question_elem else ""
+        question_content = self.extract_text(question_elem) if question_elem else ""
         
         # 提取答案内容
         answers = []
         answer_elems = soup.select('.answer .post-text')
         for answer_elem in answer_elems[:3]:  # 只取前3个答案
-            answer_content = self.extract_text(str(answer_elem))
+            answer_content = self.extract_text(answer_elem)
             if answer_content:
                 answers.append(answer_content)
         
@@ -274,9 +275,4 @@ class TechCrawler(BaseCrawler):
             'publish_date': "",
             'keywords': self.extract_keywords(title + " " + content),
             'sentiment': 'neutral'
-        }
-    
-    def _contains_keywords(self, text: str, keywords: List[str]) -> bool:
-        """检查文本是否包含关键词"""
-        text_lower = text.lower()
-        return any(keyword.lower() in text_lower for keyword in keywords) 
\ No newline at end of file
+        }
\ No newline at end of file
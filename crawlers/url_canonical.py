@@ -0,0 +1,75 @@
+"""
+URL规范化
+统一协议/主机大小写、默认端口、跟踪参数、AMP链接，并支持页面中的 rel=canonical
+"""
+
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# 跟踪参数（完整名称）
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', 'igshid',
+    'spm', 'spm_id_from', 'from_spmid', 'vd_source', 'share_source', 'share_medium',
+    'ref', 'ref_src', 'ref_url', 'cmpid', 'ncid', 'guccounter', 'guce_referrer',
+    'guce_referrer_sig', '_ga', 'amp', 'outputtype'
+}
+
+# 跟踪参数（前缀）
+TRACKING_PREFIXES = ('utm_', 'hmsr', 'sr_share')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """返回URL的规范形式，无法解析时原样返回"""
+    if not url:
+        return ""
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return url
+
+    host = (parts.hostname or '').lower().rstrip('.')
+    if not host:
+        return url
+    # AMP专用子域名；去掉后至少保留两级域名，amp.dev 本身不是子域名
+    if host.startswith('amp.') and host.count('.') >= 2:
+        host = host[4:]
+
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    # http 与 https 视为同一资源，统一使用 https
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    # AMP路径：/amp、/amp/、xxx.amp.html
+    path = re.sub(r'/amp/?$', '', path) or '/'
+    path = re.sub(r'\.amp\.html$', '.html', path)
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunsplit(('https', netloc, path, urlencode(query), ''))
+
+
+def find_canonical_link(soup, page_url: str) -> Optional[str]:
+    """从页面的 <link rel="canonical"> 中取规范URL"""
+    if soup is None:
+        return None
+    for link in soup.find_all('link', href=True):
+        rel = link.get('rel') or []
+        if isinstance(rel, str):
+            rel = rel.split()
+        if 'canonical' in [r.lower() for r in rel]:
+            return canonicalize_url(urljoin(page_url, link['href']))
+    return None
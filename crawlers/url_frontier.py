@@ -0,0 +1,177 @@
+"""
+跨运行的URL前沿
+运行开始时用数据库中已有文章URL构建布隆过滤器，抓取文章页面前先查询，
+已入库的URL除非到了重访周期，否则不再抓取
+"""
+
+import hashlib
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import Config
+from .feed_state import FeedState
+
+
+class BloomFilter:
+    """基于 bytearray 的布隆过滤器"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class UrlFrontier:
+    """抓取前判断文章URL是否需要抓取"""
+
+    def __init__(self, refresh_days: Optional[Dict[str, int]] = None,
+                 capacity: int = Config.FRONTIER_BLOOM_CAPACITY):
+        self.refresh_days = dict(Config.FRONTIER_REFRESH_DAYS if refresh_days is None else refresh_days)
+        self.capacity = capacity
+        self.db = None
+        self._bloom = BloomFilter(capacity)
+        self._seen_this_run = set()
+        self._saved: Dict[str, int] = {}
+        # 未连接数据库时订阅源状态只保存在进程内
+        self._feed_states: Dict[str, FeedState] = {}
+        self._lock = threading.Lock()
+
+    def load_from_database(self, db):
+        """用数据库中的文章URL重建过滤器，每次运行开始时调用"""
+        urls = db.get_article_urls()
+        bloom = BloomFilter(max(self.capacity, len(urls) * 2))
+        for url in urls:
+            bloom.add(url)
+        with self._lock:
+            self.db = db
+            self._bloom = bloom
+            self._seen_this_run = set()
+            self._saved = {}
+        print(f"URL前沿已加载 {len(urls)} 个已入库URL")
+
+    def add(self, url: str):
+        """文章入库或本次运行已抓取后登记"""
+        if not url:
+            return
+        with self._lock:
+            self._bloom.add(url)
+            self._seen_this_run.add(url)
+
+    def should_fetch(self, url: str, source_type: str = '', source: str = '') -> bool:
+        """URL是否需要抓取；跳过时按来源计数"""
+        with self._lock:
+            if url in self._seen_this_run:
+                known = True
+            elif url not in self._bloom:
+                return True
+            else:
+                known = None
+
+        if known is None:
+            # 布隆过滤器命中后到数据库确认，排除误判并取更新时间
+            known = self._is_stored_and_fresh(url, source_type)
+            if not known:
+                return True
+
+        with self._lock:
+            key = source or source_type or 'unknown'
+            self._saved[key] = self._saved.get(key, 0) + 1
+        return False
+
+    def filter_urls(self, urls: List[str], source_type: str = '', source: str = '',
+                    limit: Optional[int] = None) -> List[str]:
+        """过滤出需要抓取的URL（最多 limit 个），并登记为本次运行已处理"""
+        fresh = []
+        for url in urls:
+            if limit is not None and len(fresh) >= limit:
+                break
+            if self.should_fetch(url, source_type, source):
+                fresh.append(url)
+                self.add(url)
+        return fresh
+
+    def count_new(self, urls: List[str]) -> int:
+        """统计尚未入库的URL数量，不登记、不计入节省统计"""
+        count = 0
+        for url in urls:
+            with self._lock:
+                maybe_stored = url in self._bloom
+            if not maybe_stored or self.db is None or self.db.get_article_updated_at(url) is None:
+                count += 1
+        return count
+
+    def _is_stored_and_fresh(self, url: str, source_type: str) -> bool:
+        if self.db is None:
+            return False
+        updated_at = self.db.get_article_updated_at(url)
+        if updated_at is None:
+            return False
+        days = self.refresh_days.get(source_type)
+        if days is None:
+            return True
+        try:
+            return datetime.fromisoformat(updated_at) > datetime.now() - timedelta(days=days)
+        except ValueError:
+            return False
+
+    def get_feed_state(self, feed_url: str) -> FeedState:
+        """获取订阅源增量状态，首次轮询时返回空状态"""
+        if self.db is not None:
+            row = self.db.get_feed_state(feed_url)
+            if row is None:
+                return FeedState(feed_url)
+            return FeedState(feed_url, row['etag'] or '', row['last_modified'] or '',
+                             row['last_published'], row['entry_ids'])
+        with self._lock:
+            return self._feed_states.get(feed_url) or FeedState(feed_url)
+
+    def save_feed_state(self, state: FeedState):
+        """保存订阅源增量状态"""
+        if self.db is not None:
+            self.db.save_feed_state({
+                'feed_url': state.feed_url,
+                'etag': state.etag,
+                'last_modified': state.last_modified,
+                'last_published': state.last_published,
+                'entry_ids': state.entry_ids,
+            })
+            return
+        with self._lock:
+            self._feed_states[state.feed_url] = state
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取各来源节省的抓取次数"""
+        with self._lock:
+            return dict(self._saved)
+
+
+_default_frontier = None
+_default_frontier_lock = threading.Lock()
+
+
+def get_url_frontier() -> UrlFrontier:
+    """获取进程内共享的URL前沿"""
+    global _default_frontier
+    with _default_frontier_lock:
+        if _default_frontier is None:
+            _default_frontier = UrlFrontier()
+        return _default_frontier
@@ -7,9 +7,16 @@ from urllib.parse import urljoin, urlparse, parse_qs
 from datetime import datetime, timedelta
 import time
 from .base_crawler import BaseCrawler
+from .html_parser import parse_html
 from config import Config
 
 class VideoCrawler(BaseCrawler):
+    KEYWORD_SOURCES = {
+        'YouTube': ('_crawl_youtube', None),
+        'Bilibili': ('_crawl_bilibili', None),
+        '优酷': ('_crawl_other_video_sites', None),
+    }
+    
     def __init__(self):
         super().__init__()
         self.source_type = "video"
@@ -20,15 +27,15 @@ class VideoCrawler(BaseCrawler):
         print("开始爬取视频内容...")
         
         # 爬取YouTube
-        self._crawl_youtube(keywords)
+        self.visit_source('YouTube', self._crawl_youtube, keywords)
         
         # 爬取Bilibili
-        self._crawl_bilibili(keywords)
+        self.visit_source('Bilibili', self._crawl_bilibili, keywords)
         
         # 爬取其他视频网站
-        self._crawl_other_video_sites(keywords)
+        self.visit_source('优酷', self._crawl_other_video_sites, keywords)
         
-        print(f"视频爬取完成，共获取 {len(self.articles)} 个视频")
+        print(f"视频爬取完成，共获取 {self.article_count} 个视频")
         return self.articles
     
     def _crawl_youtube(self, keywords: List[str]):
@@ -36,20 +43,15 @@ class VideoCrawler(BaseCrawler):
         print("爬取YouTube视频...")
         
         # YouTube搜索URL
-        for keyword in keywords:
-            search_url = f"https://www.youtube.com/results?search_query={keyword}"
+        search_urls = {f"https://www.youtube.com/results?search_query={keyword}": keyword for keyword in keywords}
+        for search_url, html in self.get_pages(list(search_urls)):
+            keyword = search_urls[search_url]
             try:
-                html = self.get_page(search_url)
-                if not html:
-                    continue
-                
                 # 提取视频信息
                 video_data = self._extract_youtube_videos(html, keyword)
                 for video in video_data:
                     self.add_article(video)
                 
-                time.sleep(Config.REQUEST_DELAY)
-                
             except Exception as e:
                 print(f"爬取YouTube失败 {keyword}: {e}")
                 continue
@@ -112,7 +114,7 @@ class VideoCrawler(BaseCrawler):
         videos = []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = parse_html(html)
             
             # 查找视频链接
             video_links = soup.find_all('a', href=re.compile(r'/watch\?v='))
@@ -143,19 +145,14 @@ class VideoCrawler(BaseCrawler):
         """爬取Bilibili视频"""
         print("爬取Bilibili视频...")
         
-        for keyword in keywords:
-            search_url = f"https://search.bilibili.com/all?keyword={keyword}"
+        search_urls = {f"https://search.bilibili.com/all?keyword={keyword}": keyword for keyword in keywords}
+        for search_url, html in self.get_pages(list(search_urls)):
+            keyword = search_urls[search_url]
             try:
-                html = self.get_page(search_url)
-                if not html:
-                    continue
-                
                 video_data = self._extract_bilibili_videos(html, keyword)
                 for video in video_data:
                     self.add_article(video)
                 
-                time.sleep(Config.REQUEST_DELAY)
-                
             except Exception as e:
                 print(f"爬取Bilibili失败 {keyword}: {e}")
                 continue
@@ -165,7 +162,7 @@ class VideoCrawler(BaseCrawler):
         videos = []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = parse_html(html)
             
             # 查找视频卡片
             video_cards = soup.find_all('li', class_='video-item')
@@ -225,16 +222,13 @@ class VideoCrawler(BaseCrawler):
         # 由于不同网站的结构差异很大，需要针对每个网站单独处理
         
         # 示例：爬取优酷
-        for keyword in keywords:
+        search_urls = {f"https://search.youku.com/search_video/q_{keyword}": keyword for keyword in keywords}
+        for search_url, html in self.get_pages(list(search_urls)):
+            keyword = search_urls[search_url]
             try:
-                search_url = f"https://search.youku.com/search_video/q_{keyword}"
-                html = self.get_page(search_url)
-                if html:
-                    video_data = self._extract_youku_videos(html, keyword)
-                    for video in video_data:
-                        self.add_article(video)
-                
-                time.sleep(Config.REQUEST_DELAY)
+                video_data = self._extract_youku_videos(html, keyword)
+                for video in video_data:
+                    self.add_article(video)
                 
             except Exception as e:
                 print(f"爬取优酷失败 {keyword}: {e}")
@@ -245,7 +239,7 @@ class VideoCrawler(BaseCrawler):
         videos = []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = parse_html(html)
             
             # 查找视频链接（需要根据实际页面结构调整）
             video_links = soup.find_all('a', href=re.compile(r'/v_show/'))
@@ -310,5 +304,4 @@ class VideoCrawler(BaseCrawler):
             return False
         
         # 检查是否包含关键词
-        text = f"{title} {content}".lower()
-        return any(keyword.lower() in text for keyword in Config.SEARCH_KEYWORDS) 
\ No newline at end of file
+        return self._contains_keywords(f"{title} {content}", Config.SEARCH_KEYWORDS) 
\ No newline at end of file
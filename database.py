@@ -1,12 +1,16 @@
 import sqlite3
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import List, Dict, Optional, Tuple
 from config import Config
+from fingerprint import band_keys, hamming_distance, simhash, fingerprint_to_hex, hex_to_fingerprint
 
 class Database:
     def __init__(self, db_path: str = Config.DATABASE_PATH):
         self.db_path = db_path
+        self._fingerprint_lock = threading.Lock()
         self.init_database()
     
     def init_database(self):
@@ -56,38 +60,700 @@ class Database:
                 )
             ''')
             
+            # 文章内容指纹（旧库补充字段）
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(articles)')]
+            if 'fingerprint' not in columns:
+                cursor.execute("ALTER TABLE articles ADD COLUMN fingerprint TEXT DEFAULT ''")
+            
+            # 近似重复文章只记录链接，指向保留的文章
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS article_duplicates (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    article_id INTEGER NOT NULL,
+                    url TEXT UNIQUE,
+                    source_type TEXT,
+                    source_name TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_article_duplicates_article ON article_duplicates (article_id)')
+            
+            # 指纹分段索引：查重时按段值查找候选文章，所有进程共用
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_fingerprint_bands'")
+            has_bands = cursor.fetchone() is not None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS article_fingerprint_bands (
+                    band INTEGER,
+                    band_key INTEGER,
+                    article_id INTEGER,
+                    PRIMARY KEY (band, band_key, article_id)
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_fingerprint_bands_article ON article_fingerprint_bands (article_id)')
+            if not has_bands:
+                cursor.execute("SELECT id, fingerprint FROM articles WHERE fingerprint IS NOT NULL AND fingerprint != ''")
+                for article_id, fingerprint in cursor.fetchall():
+                    self._save_fingerprint_bands(cursor, article_id, hex_to_fingerprint(fingerprint))
+            
+            # 每次运行各爬虫的预算使用情况
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_budget_usage (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_started_at TEXT,
+                    name TEXT,
+                    requests INTEGER,
+                    bytes INTEGER,
+                    seconds REAL,
+                    truncated TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # 各来源的重访计划
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS source_revisits (
+                    source TEXT PRIMARY KEY,
+                    source_type TEXT,
+                    visits REAL,
+                    changes REAL,
+                    mean_interval REAL,
+                    change_rate REAL,
+                    last_new_articles INTEGER DEFAULT 0,
+                    last_visit TEXT,
+                    next_visit TEXT
+                )
+            ''')
+            
+            # 订阅源增量状态
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS feed_state (
+                    feed_url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    last_published REAL,
+                    entry_ids TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # 站点发现结果（robots.txt、站点地图、订阅源）和站点地图处理进度
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS site_discovery (
+                    site TEXT PRIMARY KEY,
+                    robots_txt TEXT,
+                    crawl_delay REAL,
+                    sitemaps TEXT,
+                    feeds TEXT,
+                    sitemap_lastmod REAL,
+                    discovered_at TEXT,
+                    sitemap_pending TEXT
+                )
+            ''')
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(site_discovery)')]
+            if 'sitemap_pending' not in columns:
+                cursor.execute("ALTER TABLE site_discovery ADD COLUMN sitemap_pending TEXT")
+            
+            # 每次运行中各爬虫的运行报告
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_reports (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_started_at TEXT,
+                    name TEXT,
+                    status TEXT,
+                    accepted INTEGER,
+                    seconds REAL,
+                    error TEXT,
+                    truncated TEXT,
+                    dead_letters INTEGER,
+                    timed_out TEXT DEFAULT ''
+                )
+            ''')
+            # 超时的来源（旧库补充字段）
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(crawl_reports)')]
+            if 'timed_out' not in columns:
+                cursor.execute("ALTER TABLE crawl_reports ADD COLUMN timed_out TEXT DEFAULT ''")
+            
+            # 每日任务的运行记录：committed 为暂存文件中已写入数据库的文章数
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_runs (
+                    run_id TEXT PRIMARY KEY,
+                    kind TEXT,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    status TEXT,
+                    committed INTEGER DEFAULT 0
+                )
+            ''')
+            
+            # 运行断点：已完成的爬虫、来源和关键词
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS run_checkpoints (
+                    run_id TEXT,
+                    kind TEXT,
+                    key TEXT,
+                    finished_at TEXT,
+                    PRIMARY KEY (run_id, kind, key)
+                )
+            ''')
+            
+            # 死信队列：抓取失败、等待之后重试的页面
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    url TEXT PRIMARY KEY,
+                    crawler TEXT,
+                    source TEXT,
+                    error TEXT,
+                    attempts INTEGER,
+                    next_retry TEXT,
+                    first_failed TEXT,
+                    last_failed TEXT
+                )
+            ''')
+            
+            # 持续抓取模式下增量统计的进度：已计入统计的最大文章ID
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS statistics_progress (
+                    name TEXT PRIMARY KEY,
+                    last_article_id INTEGER,
+                    updated_at TEXT
+                )
+            ''')
+            
+            # 来源看门狗：各来源访问超过期限的次数
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS source_timeouts (
+                    source TEXT PRIMARY KEY,
+                    crawler TEXT,
+                    trips INTEGER DEFAULT 0,
+                    deadline REAL,
+                    last_timeout_at TEXT
+                )
+            ''')
+            
+            # 运行锁：同一时间只允许一个进程执行整次爬取，持有者定期心跳续约；记录争用次数和接管次数
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_locks (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT,
+                    acquired_at REAL,
+                    heartbeat_at REAL,
+                    expires_at REAL,
+                    progress TEXT,
+                    released_at REAL,
+                    contended INTEGER DEFAULT 0,
+                    last_contender TEXT,
+                    last_contended_at REAL,
+                    takeovers INTEGER DEFAULT 0,
+                    waiting_owner TEXT,
+                    waiting_until REAL
+                )
+            ''')
+            # 排队等待独占锁的请求（旧库补充字段）
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(crawl_locks)')]
+            if 'waiting_owner' not in columns:
+                cursor.execute("ALTER TABLE crawl_locks ADD COLUMN waiting_owner TEXT")
+                cursor.execute("ALTER TABLE crawl_locks ADD COLUMN waiting_until REAL")
+            
+            # 运行锁的共享持有者：任务队列的工作进程执行任务期间持有，彼此不阻挡，但阻挡整次爬取
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_lock_shares (
+                    name TEXT,
+                    owner TEXT,
+                    acquired_at REAL,
+                    heartbeat_at REAL,
+                    expires_at REAL,
+                    PRIMARY KEY (name, owner)
+                )
+            ''')
+            
             conn.commit()
     
+    def _find_duplicate(self, cursor, fingerprint: int) -> Optional[int]:
+        """在分段索引中查找海明距离最近且不超过阈值的已有文章ID"""
+        keys = band_keys(fingerprint)
+        cursor.execute('''
+            SELECT DISTINCT a.id, a.fingerprint FROM article_fingerprint_bands b
+            JOIN articles a ON a.id = b.article_id
+            WHERE ''' + ' OR '.join(['(b.band = ? AND b.band_key = ?)'] * len(keys)),
+            [value for key in keys for value in key])
+        
+        best_id, best_distance = None, Config.FINGERPRINT_MAX_DISTANCE + 1
+        for article_id, candidate in sorted(cursor.fetchall()):
+            distance = hamming_distance(fingerprint, hex_to_fingerprint(candidate))
+            if distance < best_distance:
+                best_id, best_distance = article_id, distance
+        return best_id
+    
+    def _save_fingerprint_bands(self, cursor, article_id: int, fingerprint: Optional[int]):
+        """替换文章在分段索引中的记录"""
+        cursor.execute('DELETE FROM article_fingerprint_bands WHERE article_id = ?', (article_id,))
+        if fingerprint is not None:
+            cursor.executemany(
+                'INSERT INTO article_fingerprint_bands (band, band_key, article_id) VALUES (?, ?, ?)',
+                [(band, key, article_id) for band, key in band_keys(fingerprint)]
+            )
+    
+    def _compute_fingerprint(self, article_data: Dict) -> Optional[int]:
+        """计算文章指纹，内容过短时不计算（短文本的SimHash误判率高）"""
+        content = article_data.get('content', '') or article_data.get('description', '')
+        if len(content) < Config.FINGERPRINT_MIN_LENGTH:
+            return None
+        return simhash(f"{article_data.get('title', '')} {content}")
+    
     def insert_article(self, article_data: Dict) -> bool:
-        """插入文章数据"""
+        """插入文章数据，近似重复的文章只记录到 article_duplicates"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT OR REPLACE INTO articles 
-                    (title, content, summary, url, source_type, source_name, 
-                     publish_date, keywords, sentiment, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    article_data.get('title', ''),
-                    article_data.get('content', ''),
-                    article_data.get('summary', ''),
-                    article_data.get('url', ''),
-                    article_data.get('source_type', ''),
-                    article_data.get('source_name', ''),
-                    article_data.get('publish_date', ''),
-                    json.dumps(article_data.get('keywords', []), ensure_ascii=False),
-                    article_data.get('sentiment', ''),
-                    datetime.now().isoformat()
-                ))
-                
+            with self._fingerprint_lock, sqlite3.connect(self.db_path) as conn:
+                # 查重前先取得写锁，其他进程不能在查重和插入之间写入相似文章
+                conn.execute('BEGIN IMMEDIATE')
+                self._insert_article(conn.cursor(), article_data)
                 conn.commit()
                 return True
         except Exception as e:
             print(f"插入文章失败: {e}")
             return False
     
+    def insert_articles(self, articles: List[Dict]) -> List[str]:
+        """在一个事务中批量插入文章，返回成功写入（含合并为重复）的文章URL
+        
+        整批写入失败时回滚，改为逐篇插入，跳过有问题的文章。
+        """
+        if not articles:
+            return []
+        try:
+            with self._fingerprint_lock, sqlite3.connect(self.db_path) as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                cursor = conn.cursor()
+                for article_data in articles:
+                    self._insert_article(cursor, article_data)
+                conn.commit()
+            return [article_data.get('url', '') for article_data in articles]
+        except Exception as e:
+            print(f"批量插入文章失败，改为逐篇插入: {e}")
+        return [article_data.get('url', '') for article_data in articles if self.insert_article(article_data)]
+    
+    def _insert_article(self, cursor, article_data: Dict):
+        """在调用方的事务中插入一篇文章（调用方已取得写锁）"""
+        url = article_data.get('url', '')
+        
+        cursor.execute('SELECT id FROM articles WHERE url = ?', (url,))
+        existing = cursor.fetchone()
+        is_new = existing is None
+        
+        fingerprint = self._compute_fingerprint(article_data)
+        if is_new and fingerprint is not None:
+            duplicate_of = self._find_duplicate(cursor, fingerprint)
+            if duplicate_of is not None:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO article_duplicates
+                    (article_id, url, source_type, source_name)
+                    VALUES (?, ?, ?, ?)
+                ''', (duplicate_of, url, article_data.get('source_type', ''),
+                      article_data.get('source_name', '')))
+                return
+        
+        values = (
+            article_data.get('title', ''),
+            article_data.get('content', ''),
+            article_data.get('summary', ''),
+            article_data.get('url', ''),
+            article_data.get('source_type', ''),
+            article_data.get('source_name', ''),
+            article_data.get('publish_date', ''),
+            json.dumps(article_data.get('keywords', []), ensure_ascii=False),
+            article_data.get('sentiment', ''),
+            datetime.now().isoformat(),
+            fingerprint_to_hex(fingerprint) if fingerprint is not None else ''
+        )
+        if existing:
+            # 原地更新，文章ID不变，重复记录中的ID仍然有效
+            article_id = existing[0]
+            cursor.execute('''
+                UPDATE articles SET title = ?, content = ?, summary = ?, url = ?, source_type = ?, source_name = ?,
+                    publish_date = ?, keywords = ?, sentiment = ?, updated_at = ?, fingerprint = ?
+                WHERE id = ?
+            ''', values + (article_id,))
+        else:
+            cursor.execute('''
+                INSERT INTO articles 
+                (title, content, summary, url, source_type, source_name, 
+                 publish_date, keywords, sentiment, updated_at, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', values)
+            article_id = cursor.lastrowid
+        self._save_fingerprint_bands(cursor, article_id, fingerprint)
+    
+    def get_article_urls(self) -> List[str]:
+        """获取所有已入库文章的URL（含被合并的重复文章）"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT url FROM articles WHERE url IS NOT NULL AND url != ''
+                UNION SELECT url FROM article_duplicates WHERE url IS NOT NULL AND url != ''
+            """)
+            return [row[0] for row in cursor.fetchall()]
+    
+    def get_article_updated_at(self, url: str) -> Optional[str]:
+        """获取文章最后更新时间，不存在时返回None"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT updated_at FROM articles WHERE url = ?', (url,))
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute('SELECT created_at FROM article_duplicates WHERE url = ?', (url,))
+                row = cursor.fetchone()
+            return row[0] if row else None
+    
+    def get_duplicate_count(self) -> int:
+        """获取被合并的重复文章数量"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM article_duplicates')
+            return cursor.fetchone()[0]
+    
+    def get_feed_state(self, feed_url: str) -> Optional[Dict]:
+        """获取订阅源增量状态，不存在时返回None"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute('SELECT * FROM feed_state WHERE feed_url = ?', (feed_url,)).fetchone()
+            if row is None:
+                return None
+            state = dict(row)
+            state['entry_ids'] = json.loads(state['entry_ids']) if state['entry_ids'] else []
+            return state
+    
+    def save_feed_state(self, state: Dict):
+        """保存订阅源增量状态"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO feed_state
+                (feed_url, etag, last_modified, last_published, entry_ids, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                state['feed_url'],
+                state.get('etag', ''),
+                state.get('last_modified', ''),
+                state.get('last_published'),
+                json.dumps(state.get('entry_ids', []), ensure_ascii=False),
+                datetime.now().isoformat()
+            ))
+            conn.commit()
+    
+    def get_site_discoveries(self) -> List[Dict]:
+        """获取所有站点的发现结果"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute('SELECT * FROM site_discovery').fetchall()
+            sites = []
+            for row in rows:
+                site = dict(row)
+                site['sitemaps'] = json.loads(site['sitemaps']) if site['sitemaps'] else []
+                site['feeds'] = json.loads(site['feeds']) if site['feeds'] else []
+                site['sitemap_pending'] = json.loads(site['sitemap_pending']) if site['sitemap_pending'] else []
+                sites.append(site)
+            return sites
+    
+    def save_site_discovery(self, site: Dict):
+        """保存站点的发现结果"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO site_discovery
+                (site, robots_txt, crawl_delay, sitemaps, feeds, sitemap_lastmod, discovered_at, sitemap_pending)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                site['site'],
+                site.get('robots_txt', ''),
+                site.get('crawl_delay'),
+                json.dumps(site.get('sitemaps', []), ensure_ascii=False),
+                json.dumps(site.get('feeds', []), ensure_ascii=False),
+                site.get('sitemap_lastmod'),
+                site.get('discovered_at'),
+                json.dumps(site.get('sitemap_pending', []), ensure_ascii=False)
+            ))
+            conn.commit()
+    
+    def record_crawl_report(self, run_started_at: str, report: Dict):
+        """记录一次运行中某个爬虫的运行报告"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT INTO crawl_reports (run_started_at, name, status, accepted, seconds, error, truncated,
+                                           dead_letters, timed_out)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (run_started_at, report['name'], report['status'], report['accepted'], report['seconds'],
+                  report.get('error', ''), report.get('truncated', ''), report.get('dead_letters', 0),
+                  ','.join(report.get('timed_out', []))))
+            conn.commit()
+    
+    def get_crawl_reports(self, run_started_at: Optional[str] = None) -> List[Dict]:
+        """获取一次运行（默认最近一次）各爬虫的运行报告"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            if run_started_at is None:
+                row = conn.execute('SELECT MAX(run_started_at) FROM crawl_reports').fetchone()
+                run_started_at = row[0]
+            rows = conn.execute('SELECT * FROM crawl_reports WHERE run_started_at = ? ORDER BY id',
+                                (run_started_at,)).fetchall()
+            return [dict(row) for row in rows]
+    
+    def start_crawl_run(self, run_id: str, kind: str, started_at: str):
+        """登记一次开始的运行"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT OR IGNORE INTO crawl_runs (run_id, kind, started_at, status, committed)
+                VALUES (?, ?, ?, 'running', 0)
+            ''', (run_id, kind, started_at))
+            conn.commit()
+    
+    def get_unfinished_crawl_runs(self, kind: str) -> List[Dict]:
+        """获取未完成（进程中途退出）的运行，按开始时间排序"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute('''
+                SELECT * FROM crawl_runs WHERE kind = ? AND status = 'running' ORDER BY started_at
+            ''', (kind,)).fetchall()
+            return [dict(row) for row in rows]
+    
+    def set_crawl_run_committed(self, run_id: str, committed: int):
+        """记录运行的暂存文件中已写入数据库的文章数"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('UPDATE crawl_runs SET committed = ? WHERE run_id = ?', (committed, run_id))
+            conn.commit()
+    
+    def finish_crawl_run(self, run_id: str, status: str = 'finished'):
+        """结束运行，删除其断点"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('UPDATE crawl_runs SET status = ?, finished_at = ? WHERE run_id = ?',
+                         (status, datetime.now().isoformat(), run_id))
+            conn.execute('DELETE FROM run_checkpoints WHERE run_id = ?', (run_id,))
+            conn.commit()
+    
+    def get_run_checkpoints(self, run_id: str) -> List[Dict]:
+        """获取运行中已完成的项"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute('SELECT kind, key, finished_at FROM run_checkpoints WHERE run_id = ?',
+                                (run_id,)).fetchall()
+            return [dict(row) for row in rows]
+    
+    def add_run_checkpoint(self, run_id: str, kind: str, key: str):
+        """记录运行中完成的一项（爬虫、来源或关键词）"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT OR IGNORE INTO run_checkpoints (run_id, kind, key, finished_at) VALUES (?, ?, ?, ?)
+            ''', (run_id, kind, key, datetime.now().isoformat()))
+            conn.commit()
+    
+    def record_source_timeout(self, source: str, crawler: str, deadline: float, timed_out_at: str):
+        """记录一次来源访问超时"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT INTO source_timeouts (source, crawler, trips, deadline, last_timeout_at) VALUES (?, ?, 1, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET crawler = excluded.crawler, trips = trips + 1,
+                    deadline = excluded.deadline, last_timeout_at = excluded.last_timeout_at
+            ''', (source, crawler, deadline, timed_out_at))
+            conn.commit()
+    
+    def get_source_timeouts(self) -> List[Dict]:
+        """获取各来源的超时次数，按次数从多到少"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute('SELECT * FROM source_timeouts ORDER BY trips DESC, source').fetchall()
+            return [dict(row) for row in rows]
+    
+    def acquire_run_lock(self, name: str, owner: str, lease_seconds: float, now: Optional[float] = None,
+                         shared: bool = False, wait: bool = False) -> Tuple[bool, Optional[Dict]]:
+        """取得运行锁，返回 (是否取得, 此前的锁记录或阻挡本次取得的持有者)
+
+        独占锁（整次爬取）在没有其他有效的独占持有者和共享持有者时取得，租约已过期（持有进程退出或卡死）的可以接管；
+        共享锁（任务队列的工作进程，每个任务取得一次）之间互不阻挡，只在没有独占持有者、也没有排队等待的独占请求时取得。
+        wait 为 True 表示取不到独占锁时排队，期间新的共享请求不再取得，避免工作进程源源不断地执行任务使其一直等待。
+        独占请求未取得时记录一次争用。
+        """
+        now = time.time() if now is None else now
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT * FROM crawl_locks WHERE name = ?', (name,)).fetchone()
+            previous = dict(row) if row else None
+            conn.execute('DELETE FROM crawl_lock_shares WHERE name = ? AND expires_at <= ?', (name, now))
+            blocker = None
+            if previous and previous['owner'] and previous['owner'] != owner and previous['expires_at'] > now:
+                blocker = previous
+            elif shared:
+                if previous and previous['waiting_owner'] and previous['waiting_until'] > now:
+                    blocker = {'owner': previous['waiting_owner'], 'heartbeat_at': now}
+            else:
+                share = conn.execute('''
+                    SELECT * FROM crawl_lock_shares WHERE name = ? AND owner != ? ORDER BY acquired_at LIMIT 1
+                ''', (name, owner)).fetchone()
+                blocker = dict(share) if share else None
+            if blocker is not None:
+                # 工作进程在独占爬取期间反复尝试，不计入争用；排队的独占请求每次尝试时延长排队标记，只计一次争用
+                if not shared:
+                    repeated = bool(previous and previous['waiting_owner'] == owner and previous['waiting_until'] > now)
+                    waiting = (owner, now + lease_seconds) if wait else (None, None)
+                    conn.execute('''
+                        INSERT INTO crawl_locks (name, contended, last_contender, last_contended_at, takeovers,
+                                                 waiting_owner, waiting_until)
+                        VALUES (?, 1, ?, ?, 0, ?, ?)
+                        ON CONFLICT(name) DO UPDATE SET contended = contended + ?,
+                            last_contender = excluded.last_contender, last_contended_at = excluded.last_contended_at,
+                            waiting_owner = COALESCE(excluded.waiting_owner, waiting_owner),
+                            waiting_until = COALESCE(excluded.waiting_until, waiting_until)
+                    ''', (name, owner, now) + waiting + (0 if repeated else 1,))
+                conn.commit()
+                return False, blocker
+            if shared:
+                conn.execute('''
+                    INSERT OR REPLACE INTO crawl_lock_shares (name, owner, acquired_at, heartbeat_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (name, owner, now, now, now + lease_seconds))
+                conn.commit()
+                return True, previous
+            takeover = 1 if previous and previous['owner'] and previous['owner'] != owner else 0
+            conn.execute('''
+                INSERT INTO crawl_locks (name, owner, acquired_at, heartbeat_at, expires_at, progress, takeovers)
+                VALUES (?, ?, ?, ?, ?, NULL, 0)
+                ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, acquired_at = excluded.acquired_at,
+                    heartbeat_at = excluded.heartbeat_at, expires_at = excluded.expires_at, progress = NULL,
+                    released_at = NULL, takeovers = takeovers + ?,
+                    waiting_owner = CASE WHEN waiting_owner = excluded.owner THEN NULL ELSE waiting_owner END,
+                    waiting_until = CASE WHEN waiting_owner = excluded.owner THEN NULL ELSE waiting_until END
+            ''', (name, owner, now, now, now + lease_seconds, takeover))
+            conn.commit()
+            return True, previous
+    
+    def renew_run_lock(self, name: str, owner: str, lease_seconds: float, progress: Optional[Dict] = None,
+                       shared: bool = False) -> bool:
+        """续约运行锁并记录进度；锁已被其他进程接管时返回 False"""
+        now = time.time()
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            if shared:
+                cursor = conn.execute('''
+                    UPDATE crawl_lock_shares SET heartbeat_at = ?, expires_at = ? WHERE name = ? AND owner = ?
+                ''', (now, now + lease_seconds, name, owner))
+            else:
+                cursor = conn.execute('''
+                    UPDATE crawl_locks SET heartbeat_at = ?, expires_at = ?, progress = ?
+                    WHERE name = ? AND owner = ?
+                ''', (now, now + lease_seconds, json.dumps(progress, ensure_ascii=False) if progress else None,
+                      name, owner))
+            conn.commit()
+            return cursor.rowcount == 1
+    
+    def release_run_lock(self, name: str, owner: str, shared: bool = False):
+        """释放运行锁，保留争用和接管的计数"""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            if shared:
+                conn.execute('DELETE FROM crawl_lock_shares WHERE name = ? AND owner = ?', (name, owner))
+            else:
+                conn.execute('''
+                    UPDATE crawl_locks SET owner = NULL, expires_at = 0, released_at = ? WHERE name = ? AND owner = ?
+                ''', (time.time(), name, owner))
+            conn.commit()
+    
+    def get_run_lock(self, name: str) -> Optional[Dict]:
+        """获取运行锁记录，shares 为共享持有者（含租约已过期的）"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute('SELECT * FROM crawl_locks WHERE name = ?', (name,)).fetchone()
+            shares = conn.execute('SELECT * FROM crawl_lock_shares WHERE name = ? ORDER BY acquired_at',
+                                  (name,)).fetchall()
+            if row is None and not shares:
+                return None
+            lock = dict(row) if row else {}
+            lock['shares'] = [dict(share) for share in shares]
+            return lock
+    
+    def get_dead_letters(self, crawler: Optional[str] = None, due_before: Optional[str] = None,
+                         limit: Optional[int] = None) -> List[Dict]:
+        """获取死信队列中的页面，可按爬虫和重试时间筛选，按重试时间排序"""
+        query = 'SELECT * FROM dead_letters WHERE 1 = 1'
+        params = []
+        if crawler is not None:
+            query += ' AND crawler = ?'
+            params.append(crawler)
+        if due_before is not None:
+            query += ' AND next_retry <= ?'
+            params.append(due_before)
+        query += ' ORDER BY next_retry'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+    
+    def save_dead_letter(self, entry: Dict):
+        """保存死信队列中的页面"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT INTO dead_letters
+                (url, crawler, source, error, attempts, next_retry, first_failed, last_failed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    crawler = excluded.crawler, source = excluded.source, error = excluded.error,
+                    attempts = excluded.attempts, next_retry = excluded.next_retry,
+                    first_failed = COALESCE(dead_letters.first_failed, excluded.first_failed),
+                    last_failed = excluded.last_failed
+            ''', (
+                entry['url'],
+                entry.get('crawler', ''),
+                entry.get('source', ''),
+                entry.get('error', ''),
+                entry.get('attempts', 1),
+                entry.get('next_retry'),
+                entry.get('first_failed'),
+                entry.get('last_failed')
+            ))
+            conn.commit()
+    
+    def delete_dead_letter(self, url: str):
+        """从死信队列中移除页面（重试成功或已放弃）"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('DELETE FROM dead_letters WHERE url = ?', (url,))
+            conn.commit()
+    
+    def record_budget_usage(self, run_started_at: str, usage: Dict):
+        """记录一次运行中某个预算的使用情况"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT INTO crawl_budget_usage (run_started_at, name, requests, bytes, seconds, truncated)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (run_started_at, usage['name'], usage['requests'], usage['bytes'],
+                  usage['seconds'], usage['truncated'] or ''))
+            conn.commit()
+    
+    def get_budget_usage(self, run_started_at: str) -> List[Dict]:
+        """获取一次运行的预算使用情况"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute('SELECT * FROM crawl_budget_usage WHERE run_started_at = ? ORDER BY id',
+                                (run_started_at,)).fetchall()
+            return [dict(row) for row in rows]
+    
+    def get_source_revisits(self) -> List[Dict]:
+        """获取所有来源的重访计划，按下次访问时间排序"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute('SELECT * FROM source_revisits ORDER BY next_visit').fetchall()
+            return [dict(row) for row in rows]
+    
+    def save_source_revisit(self, revisit: Dict):
+        """保存来源的重访计划"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO source_revisits
+                (source, source_type, visits, changes, mean_interval, change_rate,
+                 last_new_articles, last_visit, next_visit)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                revisit['source'], revisit.get('source_type', ''), revisit['visits'], revisit['changes'],
+                revisit['mean_interval'], revisit['change_rate'], revisit.get('last_new_articles', 0),
+                revisit.get('last_visit'), revisit.get('next_visit')
+            ))
+            conn.commit()
+    
     def get_recent_articles(self, days: int = 7, limit: int = 100) -> List[Dict]:
         """获取最近的文章"""
         with sqlite3.connect(self.db_path) as conn:
@@ -130,6 +796,51 @@ class Database:
             
             return articles
     
+    def get_articles_by_source_types(self, source_types: List[str]) -> List[Dict]:
+        """获取指定来源类型的全部文章"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            placeholders = ','.join('?' * len(source_types))
+            cursor.execute(f'SELECT * FROM articles WHERE source_type IN ({placeholders}) ORDER BY id',
+                           list(source_types))
+            
+            articles = []
+            for row in cursor.fetchall():
+                article = dict(row)
+                article['keywords'] = json.loads(article['keywords']) if article['keywords'] else []
+                articles.append(article)
+            
+            return articles
+    
+    def update_extracted_fields(self, article_id: int, article_data: Dict) -> bool:
+        """用重新提取的结果更新文章的标题、正文、日期和关键词
+        
+        不修改 updated_at：重新提取不是重新抓取，不应推迟URL前沿的重访
+        """
+        try:
+            with self._fingerprint_lock, sqlite3.connect(self.db_path) as conn:
+                fingerprint = self._compute_fingerprint(article_data)
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE articles SET title = ?, content = ?, publish_date = ?, keywords = ?, fingerprint = ?
+                    WHERE id = ?
+                ''', (
+                    article_data.get('title', ''),
+                    article_data.get('content', ''),
+                    article_data.get('publish_date', ''),
+                    json.dumps(article_data.get('keywords', []), ensure_ascii=False),
+                    fingerprint_to_hex(fingerprint) if fingerprint is not None else '',
+                    article_id
+                ))
+                self._save_fingerprint_bands(cursor, article_id, fingerprint)
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"更新文章失败 {article_id}: {e}")
+            return False
+    
     def update_statistics(self, date: str, stats: Dict):
         """更新统计数据"""
         with sqlite3.connect(self.db_path) as conn:
@@ -150,6 +861,52 @@ class Database:
             
             conn.commit()
     
+    def refresh_statistics(self) -> Dict[str, int]:
+        """把上次刷新之后入库的文章计入关键词频率，并按文章表重新统计涉及日期的当日统计
+        
+        首次调用时只记录进度（此前的文章已由每日任务统计）。返回新计入的文章数和重新统计的日期数
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            row = cursor.execute("SELECT last_article_id FROM statistics_progress WHERE name = 'articles'").fetchone()
+            newest = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM articles').fetchone()[0]
+            rows = []
+            if row is not None:
+                rows = cursor.execute('''
+                    SELECT keywords, DATE(created_at, 'localtime') FROM articles WHERE id > ? AND id <= ?
+                ''', (row[0], newest)).fetchall()
+            
+            frequencies: Dict[str, int] = {}
+            for keywords, _ in rows:
+                for keyword in json.loads(keywords or '[]'):
+                    frequencies[keyword] = frequencies.get(keyword, 0) + 1
+            now = datetime.now().isoformat()
+            for keyword, count in frequencies.items():
+                cursor.execute('''
+                    INSERT OR REPLACE INTO keywords (keyword, frequency, last_updated)
+                    VALUES (?, COALESCE((SELECT frequency FROM keywords WHERE keyword = ?), 0) + ?, ?)
+                ''', (keyword, keyword, count, now))
+            
+            dates = sorted({date for _, date in rows})
+            for date in dates:
+                counts = dict(cursor.execute('''
+                    SELECT source_type, COUNT(*) FROM articles WHERE DATE(created_at, 'localtime') = ?
+                    GROUP BY source_type
+                ''', (date,)).fetchall())
+                cursor.execute('''
+                    INSERT OR REPLACE INTO statistics
+                    (date, total_articles, news_count, tech_count, academic_count, patent_count)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (date, sum(counts.values()), counts.get('news', 0), counts.get('tech', 0),
+                      counts.get('academic', 0), counts.get('patent', 0)))
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO statistics_progress (name, last_article_id, updated_at)
+                VALUES ('articles', ?, ?)
+            ''', (newest, now))
+            conn.commit()
+            return {'articles': len(rows), 'dates': len(dates)}
+    
     def get_statistics(self, days: int = 30) -> List[Dict]:
         """获取统计数据"""
         with sqlite3.connect(self.db_path) as conn:
@@ -202,6 +959,16 @@ class Database:
                 WHERE created_at < datetime('now', '-{} days')
             '''.format(days))
             
+            # 删除指向已删除文章的重复记录
+            cursor.execute('''
+                DELETE FROM article_duplicates 
+                WHERE article_id NOT IN (SELECT id FROM articles)
+            ''')
+            cursor.execute('''
+                DELETE FROM article_fingerprint_bands 
+                WHERE article_id NOT IN (SELECT id FROM articles)
+            ''')
+            
             # 删除旧统计
             cursor.execute('''
                 DELETE FROM statistics 
@@ -0,0 +1,116 @@
+"""
+文章内容指纹
+基于SimHash的64位指纹，配合分段LSH索引在入库时查找近似重复文章
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+FINGERPRINT_BITS = 64
+FINGERPRINT_BANDS = 4
+
+_WORD_PATTERN = re.compile(r'[a-z0-9]+|[一-鿿]+')
+
+
+def _tokenize(text: str) -> List[str]:
+    """英文按单词、中文按相邻两字切分"""
+    tokens = []
+    for piece in _WORD_PATTERN.findall(text.lower()):
+        if '一' <= piece[0] <= '鿿':
+            if len(piece) == 1:
+                tokens.append(piece)
+            else:
+                tokens.extend(piece[i:i + 2] for i in range(len(piece) - 1))
+        else:
+            tokens.append(piece)
+    return tokens
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(text: str) -> int:
+    """计算文本的64位SimHash指纹"""
+    weights = [0] * FINGERPRINT_BITS
+    for token, count in Counter(_tokenize(text)).items():
+        h = _hash64(token)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def fingerprint_to_hex(fingerprint: int) -> str:
+    return f"{fingerprint:016x}"
+
+
+def hex_to_fingerprint(value: str) -> int:
+    return int(value, 16)
+
+
+def band_keys(fingerprint: int, bands: int = FINGERPRINT_BANDS) -> List[Tuple[int, int]]:
+    """把指纹分成 bands 段，返回每段的 (段号, 段值)"""
+    band_bits = FINGERPRINT_BITS // bands
+    mask = (1 << band_bits) - 1
+    return [(band, (fingerprint >> (band * band_bits)) & mask) for band in range(bands)]
+
+
+class SimHashIndex:
+    """分段LSH索引
+
+    把64位指纹分成 bands 段，任意一段完全相同即为候选；
+    海明距离不超过 bands - 1 的指纹一定会成为候选。
+    """
+
+    def __init__(self, max_distance: int = 3, bands: int = FINGERPRINT_BANDS):
+        self.max_distance = max_distance
+        self.bands = bands
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(bands)]
+        self._fingerprints: Dict[int, int] = {}
+
+    def _band_keys(self, fingerprint: int):
+        return band_keys(fingerprint, self.bands)
+
+    def add(self, item_id: int, fingerprint: int):
+        self._fingerprints[item_id] = fingerprint
+        for band, key in self._band_keys(fingerprint):
+            self._buckets[band].setdefault(key, set()).add(item_id)
+
+    def remove(self, item_id: int):
+        """移除条目（文章被删除或内容更新时）"""
+        fingerprint = self._fingerprints.pop(item_id, None)
+        if fingerprint is None:
+            return
+        for band, key in self._band_keys(fingerprint):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def find_duplicate(self, fingerprint: int) -> Optional[int]:
+        """返回海明距离最近且不超过阈值的已有条目ID"""
+        candidates = set()
+        for band, key in self._band_keys(fingerprint):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best_id, best_distance = None, self.max_distance + 1
+        for item_id in candidates:
+            distance = hamming_distance(fingerprint, self._fingerprints[item_id])
+            if distance < best_distance:
+                best_id, best_distance = item_id, distance
+        return best_id
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
@@ -62,7 +62,10 @@ def main():
     print(f"启动时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"配置信息:")
     print(f"  - 数据库: {Config.DATABASE_PATH}")
-    print(f"  - 定时任务: 每天 {Config.SCHEDULE_TIME}")
+    if Config.CRAWL_MODE == 'continuous':
+        print(f"  - 定时任务: 持续抓取（每 {Config.CONTINUOUS_TICK_MINUTES} 分钟加入到期的来源）")
+    else:
+        print(f"  - 定时任务: 每天 {Config.SCHEDULE_TIME}")
     print(f"  - Web服务器: {Config.HOST}:{Config.PORT}")
     print(f"  - 数据保留: {Config.DATA_RETENTION_DAYS} 天")
     print("=" * 60)
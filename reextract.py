@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重新提取文章
+用当前的提取逻辑重新处理原始页面存储中保存的页面，更新文章表；不访问网络。
+选择器修复或改进后运行一次，即可修正已入库的旧文章
+
+用法:
+    python reextract.py
+    python reextract.py --source-types news,tech --workers 4 --dry-run
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List, Optional
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from database import Database
+from crawlers.news_crawler import NewsCrawler
+from crawlers.tech_crawler import TechCrawler
+from crawlers.academic_crawler import AcademicCrawler
+from crawlers.parse_pool import ParsePool
+from crawlers.raw_store import BlobStore, RawPageStore
+
+# 文章从单个页面提取的爬虫（厂商、视频文章来自列表页，无法按页面重新提取）
+REEXTRACT_CRAWLERS = {
+    'news': NewsCrawler,
+    'tech': TechCrawler,
+    'academic': AcademicCrawler,
+}
+
+_EXTRACTED_FIELDS = ('title', 'content', 'publish_date', 'keywords')
+
+_blob_stores: Dict[str, BlobStore] = {}
+
+
+def _reextract_page(crawler, blob_root: str, blob_hash: str, article: Dict) -> Optional[Dict]:
+    """在解析进程中执行：直接从磁盘读取原始页面并重新提取，页面内容不经过主进程"""
+    blobs = _blob_stores.get(blob_root)
+    if blobs is None:
+        blobs = _blob_stores[blob_root] = BlobStore(blob_root)
+    data = blobs.get(blob_hash)
+    if data is None:
+        return None
+    return crawler.reextract(data.decode('utf-8'), article)
+
+
+def reextract_articles(db: Database, store: RawPageStore, source_types: Optional[List[str]] = None,
+                       workers: Optional[int] = None, dry_run: bool = False) -> Dict[str, int]:
+    """重新提取文章，返回统计"""
+    source_types = source_types or list(REEXTRACT_CRAWLERS)
+    crawlers = {source_type: REEXTRACT_CRAWLERS[source_type]() for source_type in source_types}
+    stats = {'articles': 0, 'updated': 0, 'unchanged': 0, 'not_archived': 0,
+             'unsupported': 0, 'invalid': 0, 'failed': 0}
+    articles = {}
+
+    def tasks():
+        for article in db.get_articles_by_source_types(source_types):
+            stats['articles'] += 1
+            latest = store.latest(article['url'])
+            if latest is None:
+                stats['not_archived'] += 1
+                continue
+            articles[article['id']] = article
+            yield article['id'], (crawlers[article['source_type']], store.blobs.root, latest[0], article)
+
+    pool = ParsePool(workers=os.cpu_count() if workers is None else workers)
+    try:
+        for article_id, result, error in pool.map(_reextract_page, tasks()):
+            article = articles.pop(article_id)
+            if error is not None:
+                print(f"重新提取失败 {article['url']}: {error}")
+                stats['failed'] += 1
+            elif result is None:
+                stats['unsupported'] += 1
+            elif not crawlers[article['source_type']].is_valid_article(result.get('title', ''),
+                                                                       result.get('content', '')):
+                # 新的提取结果不完整（例如选择器失效），保留原有数据
+                stats['invalid'] += 1
+            elif all(result.get(field) == article.get(field) for field in _EXTRACTED_FIELDS):
+                stats['unchanged'] += 1
+            elif dry_run or db.update_extracted_fields(article_id, result):
+                stats['updated'] += 1
+            else:
+                stats['failed'] += 1
+    finally:
+        pool.shutdown()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用已保存的原始页面重新提取文章")
+    parser.add_argument('--source-types', default=','.join(REEXTRACT_CRAWLERS),
+                        help="要重新提取的来源类型，逗号分隔")
+    parser.add_argument('--workers', type=int, default=None, help="解析进程数（默认CPU核数）")
+    parser.add_argument('--store', default=Config.RAW_STORE_PATH, help="原始页面存储目录")
+    parser.add_argument('--dry-run', action='store_true', help="只统计，不更新数据库")
+    args = parser.parse_args()
+
+    source_types = [name.strip() for name in args.source_types.split(',') if name.strip()]
+    unknown = set(source_types) - set(REEXTRACT_CRAWLERS)
+    if unknown:
+        parser.error(f"不支持的来源类型: {', '.join(sorted(unknown))}")
+    if not os.path.isdir(args.store):
+        parser.error(f"原始页面存储不存在: {args.store}")
+
+    stats = reextract_articles(Database(), RawPageStore(args.store), source_types,
+                               workers=args.workers, dry_run=args.dry_run)
+    print(f"文章 {stats['articles']} 篇: 更新 {stats['updated']}，未变化 {stats['unchanged']}，"
+          f"无原始页面 {stats['not_archived']}，不支持 {stats['unsupported']}，"
+          f"结果无效 {stats['invalid']}，失败 {stats['failed']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
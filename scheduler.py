@@ -1,8 +1,11 @@
 import schedule
+import os
+import socket
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import Dict, List, Optional
 import logging
 from database import Database
 from crawlers.news_crawler import NewsCrawler
@@ -10,6 +13,20 @@ from crawlers.tech_crawler import TechCrawler
 from crawlers.academic_crawler import AcademicCrawler
 from crawlers.manufacturer_crawler import ManufacturerCrawler
 from crawlers.video_crawler import VideoCrawler
+from crawlers.retry_policy import get_circuit_breaker
+from crawlers.http_client import get_connection_stats
+from crawlers.fetch_engine import get_shared_fetch_engine
+from crawlers.url_frontier import get_url_frontier
+from crawlers.parse_pool import get_parse_pool
+from crawlers.revisit_planner import get_revisit_planner
+from crawlers.source_discovery import get_source_discovery
+from crawlers.source_watchdog import get_source_watchdog
+from crawlers.crawl_budget import CrawlBudget
+from crawlers.article_pipeline import ArticlePipeline
+from crawlers.run_checkpoint import RunCheckpoint
+from crawlers.dead_letters import DeadLetterQueue
+from crawlers.task_queue import TaskQueue, TaskWorker, enqueue_crawl_tasks
+from crawlers.run_lock import RunLock
 from summarizer import Summarizer
 from config import Config
 
@@ -23,22 +40,61 @@ logging.basicConfig(
     ]
 )
 
+def load_crawl_state(db):
+    """加载本进程的URL前沿、重访计划、站点发现结果和来源超时次数（已加载的不再重复加载）"""
+    frontier = get_url_frontier()
+    if frontier.db is None:
+        frontier.load_from_database(db)
+    planner = get_revisit_planner()
+    if planner.db is None:
+        planner.load_from_database(db)
+    discovery = get_source_discovery()
+    if discovery.db is None:
+        discovery.load_from_database(db)
+    watchdog = get_source_watchdog()
+    if watchdog.db is None:
+        watchdog.load_from_database(db)
+
 class CrawlerScheduler:
+    # 每次运行执行的爬虫：(预算名称, 日志中的名称, 爬虫类)；各爬虫访问的主机互不相同，可同时运行
+    CRAWLERS = [
+        ('news', '新闻', NewsCrawler),
+        ('tech', '技术文章', TechCrawler),
+        ('academic', '学术论文和专利', AcademicCrawler),
+        ('manufacturer', '手机厂商和技术公司网站', ManufacturerCrawler),
+        ('video', '视频内容', VideoCrawler),
+    ]
+    
     def __init__(self):
         self.db = Database()
         self.summarizer = Summarizer()
         self.is_running = False
+        # 持续抓取模式的任务队列、进程内工作线程的停止信号和最近一次生成的当日总结
+        self.task_queue: Optional[TaskQueue] = None
+        self._workers_stop = threading.Event()
+        self.latest_summary: Optional[Dict] = None
         
     def start_scheduler(self):
         """启动定时任务调度器"""
         logging.info("启动定时任务调度器...")
         
-        # 设置每天早上8点执行爬取任务
-        schedule.every().day.at(Config.SCHEDULE_TIME).do(self.run_daily_crawl)
-        
         # 设置每天凌晨2点清理旧数据
         schedule.every().day.at("02:00").do(self.cleanup_old_data)
         
+        if Config.CRAWL_MODE == 'continuous':
+            self._schedule_continuous()
+        else:
+            # 设置每天早上8点执行爬取任务
+            schedule.every().day.at(Config.SCHEDULE_TIME).do(self.run_daily_crawl)
+            
+            # RSS源增量轮询，只处理新条目
+            if Config.FEED_POLL_INTERVAL_MINUTES > 0:
+                schedule.every(Config.FEED_POLL_INTERVAL_MINUTES).minutes.do(self.run_feed_poll)
+            
+            # 按重访计划抓取到期的来源（变化快的来源一天内多次访问）
+            if Config.REVISIT_CHECK_MINUTES > 0:
+                schedule.every(Config.REVISIT_CHECK_MINUTES).minutes.do(self.run_due_crawl)
+        
         self.is_running = True
         
         # 启动调度器线程
@@ -46,152 +102,306 @@ class CrawlerScheduler:
         scheduler_thread.daemon = True
         scheduler_thread.start()
         
-        logging.info(f"定时任务调度器已启动，将在每天 {Config.SCHEDULE_TIME} 执行爬取任务")
+        if Config.CRAWL_MODE == 'continuous':
+            logging.info(f"定时任务调度器已启动，持续抓取：每 {Config.CONTINUOUS_TICK_MINUTES} 分钟加入到期的来源")
+        else:
+            logging.info(f"定时任务调度器已启动，将在每天 {Config.SCHEDULE_TIME} 执行爬取任务")
         
         return scheduler_thread
     
+    def _schedule_continuous(self):
+        """持续抓取：各来源按各自的重访间隔到期后加入任务队列，由工作线程（或 crawl_worker.py）执行"""
+        self.task_queue = TaskQueue()
+        self._ensure_crawl_state()
+        self._workers_stop.clear()
+        for index in range(Config.CONTINUOUS_LOCAL_WORKERS):
+            worker = TaskWorker(self.task_queue, self.db, self.CRAWLERS,
+                                owner=f"{socket.gethostname()}-{os.getpid()}-{index}")
+            threading.Thread(target=worker.run, args=(self._workers_stop,), name=f"crawl-worker-{index}",
+                             daemon=True).start()
+        
+        schedule.every(Config.CONTINUOUS_TICK_MINUTES).minutes.do(self.run_continuous_tick)
+        schedule.every(Config.CONTINUOUS_SUMMARY_MINUTES).minutes.do(self.refresh_daily_summary)
+        # 启动时先加入一批任务，并记录增量统计的起点
+        self.run_continuous_tick()
+        self.refresh_daily_summary()
+    
+    def run_continuous_tick(self):
+        """把到了访问时间的来源加入任务队列
+        
+        队列中的任务数不超过 CONTINUOUS_MAX_QUEUED，其余到期来源留到下次检查；
+        可执行时间随机延后，同时到期的来源（如首次启动时的全部来源）分散到之后的几分钟内。
+        """
+        try:
+            stats = self.task_queue.get_stats()
+            room = Config.CONTINUOUS_MAX_QUEUED - stats['pending'] - stats['leased']
+            if room <= 0:
+                logging.info(f"任务队列已满（等待 {stats['pending']}，执行中 {stats['leased']}），本次不加入新任务")
+                return
+            enqueue_crawl_tasks(self.task_queue, self.db, self.CRAWLERS, limit=room,
+                                jitter=Config.CONTINUOUS_JITTER_MINUTES * 60)
+        except Exception as e:
+            logging.error(f"加入到期来源失败: {e}")
+    
+    def refresh_daily_summary(self):
+        """把新入库的文章计入当日统计和关键词频率，有新文章时重新生成当日总结"""
+        try:
+            refreshed = self.db.refresh_statistics()
+            if not refreshed['articles']:
+                return
+            articles = self.db.get_recent_articles(days=1, limit=Config.PIPELINE_SUMMARY_ARTICLES)
+            self.latest_summary = self.summarizer.generate_summary(articles)
+            logging.info(f"当日统计和总结已更新: 新文章 {refreshed['articles']} 篇，今日共 {len(articles)} 篇")
+        except Exception as e:
+            logging.error(f"更新当日统计和总结失败: {e}")
+    
     def _run_scheduler(self):
         """运行调度器循环"""
         while self.is_running:
             schedule.run_pending()
             time.sleep(60)  # 每分钟检查一次
     
-    def run_daily_crawl(self):
-        """执行每日爬取任务"""
+    def _acquire_run_lock(self, label: str, on_busy: str = 'skip') -> Optional[RunLock]:
+        """取得跨进程运行锁；其他进程正在爬取时按 on_busy 处理，未取得锁时返回 None
+        
+        'attach' 跟随正在进行的爬取直到结束；'queue' 等其结束后取得锁；'skip' 直接跳过。
+        """
+        try:
+            lock = RunLock(self.db)
+            if lock.acquire():
+                return lock
+            timeout = Config.RUN_LOCK_WAIT_MINUTES * 60
+            if on_busy == 'attach':
+                if lock.wait_released(timeout):
+                    logging.info(f"{label}: 其他进程的爬取已结束，本次不再重复爬取")
+                else:
+                    logging.warning(f"{label}: 等待其他进程的爬取超时，本次跳过")
+            elif on_busy == 'queue':
+                logging.info(f"{label}: 排在正在进行的爬取之后")
+                if lock.wait_acquire(timeout):
+                    return lock
+                logging.warning(f"{label}: 等待运行锁超时，本次跳过")
+            else:
+                logging.info(f"{label}: 其他进程正在爬取，本次跳过")
+        except Exception as e:
+            logging.error(f"{label}: 取得运行锁失败: {e}")
+        return None
+    
+    def run_daily_crawl(self, on_busy: Optional[str] = None):
+        """执行每日爬取任务（同一时间只有一个进程执行，其他进程正在爬取时按 RUN_LOCK_ON_BUSY 处理）"""
+        lock = self._acquire_run_lock('每日爬取任务', on_busy or Config.RUN_LOCK_ON_BUSY)
+        if lock is None:
+            return
+        with lock:
+            self._run_daily_crawl(lock)
+    
+    def _run_daily_crawl(self, lock: RunLock):
         try:
             logging.info("开始执行每日爬取任务...")
             start_time = datetime.now()
             
-            # 执行爬取任务
-            all_articles = self._crawl_all_sources()
+            # 每日任务开始时清空熔断状态；两次每日任务之间熔断的主机冷却后自行试探恢复
+            circuit_breaker = get_circuit_breaker()
+            circuit_breaker.reset()
             
-            # 生成总结
-            summary = self.summarizer.generate_summary(all_articles)
+            # 用已入库的URL构建URL前沿，抓取前跳过已有文章
+            frontier = get_url_frontier()
+            frontier.load_from_database(self.db)
+            get_revisit_planner().load_from_database(self.db)
+            get_source_discovery().load_from_database(self.db)
+            get_source_watchdog().load_from_database(self.db)
             
-            # 保存到数据库
-            self._save_results(all_articles, summary)
+            # 上次运行中途退出时从断点继续；太久以前中断的运行只把暂存的文章入库
+            checkpoint, stale_runs = RunCheckpoint.open(self.db)
+            for stale in stale_runs:
+                with ArticlePipeline(self.db, frontier) as replay:
+                    replayed = replay.replay(stale)
+                stale.finish('abandoned')
+                logging.warning(f"放弃中断的运行 {stale.run_id}，重放暂存的文章 {replayed} 篇")
             
-            # 更新统计数据
-            self._update_statistics(all_articles)
+            # 执行爬取任务，整次运行受预算限制；文章边爬取边入库，同时更新当日统计
+            # （持续抓取模式下当日统计由 refresh_daily_summary 按文章表增量更新）
+            run_budget = CrawlBudget('run', **Config.CRAWL_RUN_BUDGET)
+            lock.on_lost = lambda: run_budget.cancel('lock_lost')
+            update_statistics = Config.CRAWL_MODE != 'continuous'
+            with ArticlePipeline(self.db, frontier, update_statistics=update_statistics,
+                                 checkpoint=checkpoint) as pipeline:
+                lock.progress = lambda: {'run_id': checkpoint.run_id, 'done': checkpoint.get_done_count(),
+                                         'accepted': pipeline.stats['accepted'], 'saved': pipeline.stats['saved']}
+                if checkpoint.resumed:
+                    replayed = pipeline.replay(checkpoint)
+                    logging.info(f"从断点继续运行 {checkpoint.run_id}: 已完成 {checkpoint.get_done_count()}，"
+                                 f"重放暂存的文章 {replayed} 篇")
+                self._crawl_all_sources(pipeline, run_budget, checkpoint)
+            checkpoint.finish()
+            self._record_budget(run_budget)
+            self._log_pipeline(pipeline)
+            
+            # 生成总结（基于流水线保留的精简文章记录）
+            summary = self.summarizer.generate_summary(pipeline.summary_articles)
+            logging.info("总结生成完成" if summary else "无新文章，未生成总结")
             
             end_time = datetime.now()
             duration = end_time - start_time
             
             logging.info(f"每日爬取任务完成，耗时: {duration}")
-            logging.info(f"共收集到 {len(all_articles)} 篇文章")
+            logging.info(f"共收集到 {pipeline.stats['accepted']} 篇文章")
+            
+            connection_stats = get_connection_stats()
+            logging.info(f"HTTP请求 {connection_stats['requests']} 次，新建连接 {connection_stats['new_connections']} 个，"
+                         f"连接复用率 {connection_stats['reuse_rate']:.0%}")
+            
+            saved_fetches = frontier.get_stats()
+            if saved_fetches:
+                logging.info(f"URL前沿节省的抓取次数（按来源）: {saved_fetches}")
+            
+            logging.info(f"累计合并近似重复文章 {self.db.get_duplicate_count()} 篇")
+            
+            parse_stats = get_parse_pool().get_stats()
+            logging.info(f"解析进程池（{parse_stats['workers']} 个进程）解析 {parse_stats['parsed']} 个页面，失败 {parse_stats['failed']} 个")
+            
+            skip_stats = get_shared_fetch_engine().get_skip_stats()
+            if skip_stats:
+                logging.info(f"按类型/大小跳过的响应: {skip_stats}")
+            
+            for host, info in circuit_breaker.get_status().items():
+                logging.warning(f"主机 {host} 已熔断（连续失败 {info['failures']} 次）: {info['reason']}")
             
         except Exception as e:
             logging.error(f"每日爬取任务失败: {e}")
     
-    def _crawl_all_sources(self) -> List[Dict]:
-        """爬取所有来源的文章"""
-        all_articles = []
-        
-        # 爬取新闻
-        try:
-            logging.info("开始爬取新闻...")
-            news_crawler = NewsCrawler()
-            news_articles = news_crawler.crawl(Config.SEARCH_KEYWORDS)
-            all_articles.extend(news_articles)
-            logging.info(f"新闻爬取完成，获取 {len(news_articles)} 篇文章")
-        except Exception as e:
-            logging.error(f"新闻爬取失败: {e}")
-        
-        # 爬取技术文章
-        try:
-            logging.info("开始爬取技术文章...")
-            tech_crawler = TechCrawler()
-            tech_articles = tech_crawler.crawl(Config.SEARCH_KEYWORDS)
-            all_articles.extend(tech_articles)
-            logging.info(f"技术文章爬取完成，获取 {len(tech_articles)} 篇文章")
-        except Exception as e:
-            logging.error(f"技术文章爬取失败: {e}")
-        
-        # 爬取学术论文和专利
+    def _ensure_crawl_state(self):
+        """两次每日任务之间的增量抓取复用已加载的URL前沿、重访计划和站点发现结果"""
+        load_crawl_state(self.db)
+    
+    def run_due_crawl(self):
+        """抓取到了访问时间的来源并保存（不生成总结、不更新当日统计）"""
+        lock = self._acquire_run_lock('到期来源抓取')
+        if lock is None:
+            return
         try:
-            logging.info("开始爬取学术论文和专利...")
-            academic_crawler = AcademicCrawler()
-            academic_articles = academic_crawler.crawl(Config.SEARCH_KEYWORDS)
-            all_articles.extend(academic_articles)
-            logging.info(f"学术论文和专利爬取完成，获取 {len(academic_articles)} 篇文章")
+            self._ensure_crawl_state()
+            run_budget = CrawlBudget('run', **Config.CRAWL_RUN_BUDGET)
+            lock.on_lost = lambda: run_budget.cancel('lock_lost')
+            with ArticlePipeline(self.db, get_url_frontier()) as pipeline:
+                lock.progress = lambda: {'accepted': pipeline.stats['accepted'], 'saved': pipeline.stats['saved']}
+                self._crawl_all_sources(pipeline, run_budget)
+            self._record_budget(run_budget)
+            self._log_pipeline(pipeline)
+            logging.info(f"到期来源抓取完成，新文章 {pipeline.stats['saved']} 篇")
         except Exception as e:
-            logging.error(f"学术论文和专利爬取失败: {e}")
-        
-        # 爬取手机厂商和技术公司网站
+            logging.error(f"到期来源抓取失败: {e}")
+        finally:
+            lock.release()
+    
+    def run_feed_poll(self):
+        """轮询RSS源的新条目并保存"""
+        lock = self._acquire_run_lock('RSS源轮询')
+        if lock is None:
+            return
         try:
-            logging.info("开始爬取手机厂商和技术公司网站...")
-            manufacturer_crawler = ManufacturerCrawler()
-            
-            # 爬取手机厂商网站
-            manufacturer_articles = manufacturer_crawler.crawl_manufacturer_sites(limit=30)
-            all_articles.extend(manufacturer_articles)
-            logging.info(f"手机厂商网站爬取完成，获取 {len(manufacturer_articles)} 篇文章")
-            
-            # 爬取技术公司网站
-            tech_company_articles = manufacturer_crawler.crawl_tech_company_sites(limit=50)
-            all_articles.extend(tech_company_articles)
-            logging.info(f"技术公司网站爬取完成，获取 {len(tech_company_articles)} 篇文章")
+            self._ensure_crawl_state()
             
+            crawler = NewsCrawler()
+            crawler.budget = CrawlBudget.from_config('news')
+            lock.on_lost = lambda: crawler.budget.cancel('lock_lost')
+            with ArticlePipeline(self.db, get_url_frontier()) as pipeline:
+                pipeline.consume(crawler.stream(Config.SEARCH_KEYWORDS, crawler.poll_feeds))
+            logging.info(f"RSS源轮询完成，新文章 {pipeline.stats['saved']} 篇")
         except Exception as e:
-            logging.error(f"手机厂商和技术公司网站爬取失败: {e}")
+            logging.error(f"RSS源轮询失败: {e}")
+        finally:
+            lock.release()
+    
+    def _record_budget(self, budget: CrawlBudget):
+        """记录预算使用情况，预算用尽导致截断时告警"""
+        usage = budget.get_usage()
+        # 以整次运行预算的开始时间标识本次运行
+        root = budget
+        while root.parent is not None:
+            root = root.parent
+        self.db.record_budget_usage(datetime.fromtimestamp(root.started_at).isoformat(), usage)
+        if usage['truncated']:
+            logging.warning(f"{usage['name']} 预算用尽（{usage['truncated']}），结果已截断: "
+                            f"请求 {usage['requests']} 次，{usage['bytes']} 字节，耗时 {usage['seconds']} 秒")
+        else:
+            logging.info(f"{usage['name']} 预算使用: 请求 {usage['requests']} 次，{usage['bytes']} 字节，"
+                         f"耗时 {usage['seconds']} 秒")
+    
+    def _crawl_all_sources(self, pipeline: ArticlePipeline, run_budget: Optional[CrawlBudget] = None,
+                           checkpoint: Optional[RunCheckpoint] = None) -> List[Dict]:
+        """爬取所有来源的文章，交给入库流水线，返回各爬虫的运行报告
         
-        # 爬取视频内容
-        try:
-            logging.info("开始爬取视频内容...")
-            video_crawler = VideoCrawler()
-            video_articles = video_crawler.crawl(Config.SEARCH_KEYWORDS)
-            all_articles.extend(video_articles)
-            logging.info(f"视频内容爬取完成，获取 {len(video_articles)} 个视频")
-        except Exception as e:
-            logging.error(f"视频内容爬取失败: {e}")
+        各爬虫在线程池中同时运行（CRAWLER_CONCURRENCY 个，1 表示依次运行），互不影响；
+        预算从属于整次运行的预算，先重试到期的失败页面；有运行断点时跳过中断前已完成的爬虫、来源和关键词。
+        """
+        started_at = datetime.fromtimestamp(run_budget.started_at) if run_budget else datetime.now()
+        workers = max(1, min(Config.CRAWLER_CONCURRENCY, len(self.CRAWLERS)))
+        if workers == 1:
+            reports = [self._crawl_family(family, pipeline, run_budget, checkpoint) for family in self.CRAWLERS]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='crawl-family') as executor:
+                futures = [executor.submit(self._crawl_family, family, pipeline, run_budget, checkpoint)
+                           for family in self.CRAWLERS]
+                reports = [future.result() for future in futures]
         
-        return all_articles
+        for report in reports:
+            self.db.record_crawl_report(started_at.isoformat(), report)
+        failed = [report['label'] for report in reports if report['status'] == 'failed']
+        logging.info(f"各爬虫运行完成（{workers} 个同时运行）: "
+                     + "，".join(f"{report['label']} {report['status']} {report['accepted']} 篇/{report['seconds']} 秒"
+                                for report in reports))
+        if failed:
+            logging.warning(f"爬取失败: {'，'.join(failed)}")
+        return reports
     
-    def _save_results(self, articles: List[Dict], summary: Dict):
-        """保存结果到数据库"""
+    def _crawl_family(self, family, pipeline: ArticlePipeline, run_budget: Optional[CrawlBudget],
+                      checkpoint: Optional[RunCheckpoint]) -> Dict:
+        """运行一个爬虫，异常只影响本爬虫，返回运行报告"""
+        name, label, crawler_class = family
+        report = {'name': name, 'label': label, 'status': 'ok', 'accepted': 0, 'seconds': 0.0,
+                  'error': '', 'truncated': '', 'dead_letters': 0, 'timed_out': []}
+        if checkpoint is not None and checkpoint.is_done('crawler', name):
+            logging.info(f"{label}已在中断前完成，跳过")
+            report['status'] = 'skipped'
+            return report
+        
+        start = time.time()
+        crawler = None
         try:
-            # 保存文章
-            saved_count = 0
-            for article in articles:
-                if self.db.insert_article(article):
-                    saved_count += 1
-            
-            logging.info(f"成功保存 {saved_count} 篇文章到数据库")
-            
-            # 保存总结（可以扩展数据库来存储总结）
-            logging.info("总结生成完成")
-            
+            logging.info(f"开始爬取{label}...")
+            crawler = crawler_class()
+            crawler.budget = CrawlBudget.from_config(name, run_budget)
+            crawler.checkpoint = checkpoint
+            crawler.dead_letters = DeadLetterQueue(self.db, name)
+            report['accepted'] = pipeline.consume(crawler.stream(Config.SEARCH_KEYWORDS, crawler.crawl_with_retries))
+            if checkpoint is not None:
+                pipeline.sync()
+                checkpoint.mark_done('crawler', name)
+            report['dead_letters'] = len(crawler.dead_letters)
+            logging.info(f"{label}爬取完成，获取 {report['accepted']} 篇文章，"
+                         f"待重试的失败页面 {report['dead_letters']} 个")
         except Exception as e:
-            logging.error(f"保存结果失败: {e}")
+            report['status'] = 'failed'
+            report['error'] = str(e)
+            logging.error(f"{label}爬取失败: {e}")
+        finally:
+            report['seconds'] = round(time.time() - start, 1)
+            if crawler is not None:
+                report['truncated'] = crawler.budget.truncated or ''
+                report['timed_out'] = list(crawler.timed_out)
+                if crawler.timed_out:
+                    logging.warning(f"{label}访问超时、已放弃的来源: {'，'.join(crawler.timed_out)}")
+                self._record_budget(crawler.budget)
+        return report
     
-    def _update_statistics(self, articles: List[Dict]):
-        """更新统计数据"""
-        try:
-            today = datetime.now().strftime('%Y-%m-%d')
-            
-            # 按来源类型统计
-            stats = {
-                'total_articles': len(articles),
-                'news_count': len([a for a in articles if a.get('source_type') == 'news']),
-                'tech_count': len([a for a in articles if a.get('source_type') == 'tech']),
-                'academic_count': len([a for a in articles if a.get('source_type') == 'academic']),
-                'video_count': len([a for a in articles if a.get('source_type') == 'video'])
-            }
-            
-            self.db.update_statistics(today, stats)
-            
-            # 更新关键词频率
-            all_keywords = []
-            for article in articles:
-                all_keywords.extend(article.get('keywords', []))
-            
-            if all_keywords:
-                self.db.update_keyword_frequency(all_keywords)
-            
-            logging.info(f"统计数据更新完成: {stats}")
-            
-        except Exception as e:
-            logging.error(f"更新统计数据失败: {e}")
+    def _log_pipeline(self, pipeline: ArticlePipeline):
+        """记录入库流水线各阶段的计数"""
+        stats = pipeline.get_stats()
+        logging.info(f"成功保存 {stats['saved']} 篇文章到数据库（{stats['batches']} 批），"
+                     f"无效 {stats['invalid']} 篇，重复 {stats['duplicates']} 篇，写入失败 {stats['failed']} 篇")
+        if pipeline.update_statistics:
+            logging.info(f"统计数据更新完成: {pipeline.get_statistics()}")
     
     def cleanup_old_data(self):
         """清理旧数据"""
@@ -210,6 +420,7 @@ class CrawlerScheduler:
     def stop_scheduler(self):
         """停止调度器"""
         self.is_running = False
+        self._workers_stop.set()
         logging.info("定时任务调度器已停止")
     
     def get_next_run_time(self) -> str:
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式入库测试脚本
+验证爬虫流式交出文章（不在爬虫中累积）、入库流水线的校验/去重/批量写入/统计，
+以及文章在爬取结束前即已入库
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+from crawlers.article_pipeline import ArticlePipeline
+from crawlers.base_crawler import BaseCrawler
+from crawlers.url_frontier import UrlFrontier
+
+_CONTENT = '蓝牙低功耗音频（LE Audio）带来了新的编解码器和广播音频功能，' * 5
+
+
+def _article(index: int, source_type: str = 'news', **fields) -> dict:
+    article = {
+        'title': f"Bluetooth 测试文章 {index:03d}",
+        'content': f"{index} {_CONTENT}",
+        'url': f"https://example.com/articles/{index}",
+        'source_type': source_type,
+        'source_name': 'Example',
+        'keywords': ['蓝牙', 'LE Audio'],
+    }
+    article.update(fields)
+    return article
+
+
+class _StepCrawler(BaseCrawler):
+    """每交出一篇文章后等待消费者确认，用于验证文章是边爬取边交出的"""
+
+    source_type = 'news'
+
+    def __init__(self, count: int):
+        super().__init__()
+        self.frontier = UrlFrontier(refresh_days={})
+        self.count = count
+        self.received = threading.Semaphore(0)
+        self.produced = 0
+
+    def crawl(self, keywords):
+        for index in range(self.count):
+            self.produced += 1
+            self.add_article(_article(index))
+            if not self.received.acquire(timeout=5) or self.budget.exhausted():
+                break
+        return self.articles
+
+
+def _count_rows(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+
+def test_crawler_streams_articles():
+    """测试流式爬取逐篇交出文章，爬虫不累积，提前结束时取消预算"""
+    crawler = _StepCrawler(5)
+    received = []
+    for article in crawler.stream(['蓝牙']):
+        # 交出第 n 篇时爬虫还没有开始产出下一篇
+        assert crawler.produced == len(received) + 1
+        received.append(article['url'])
+        crawler.received.release()
+    assert len(received) == 5 and crawler.articles == [] and crawler.article_count == 5
+
+    crawler = _StepCrawler(100)
+    stream = crawler.stream(['蓝牙'])
+    next(stream)
+    stream.close()
+    crawler.received.release()
+    assert crawler.budget.exhausted() == 'stream_closed'
+    print("✓ 爬虫流式交出文章正常")
+
+
+def test_pipeline_validates_dedups_and_batches():
+    """测试校验、去重、按批写入和当日统计"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        db = Database(db_path)
+        frontier = UrlFrontier(refresh_days={})
+        articles = [_article(i, 'tech' if i % 2 else 'news') for i in range(5)]
+        articles.append(_article(1, url='https://example.com/articles/1?utm_source=rss'))  # 规范URL重复
+        articles.append(_article(7, title=''))  # 缺少标题
+        articles.append(_article(8, url='javascript:void(0)'))
+
+        pipeline = ArticlePipeline(db, frontier, update_statistics=True, batch_size=2, flush_seconds=0,
+                                   summary_limit=3)
+        for index, article in enumerate(articles[:4]):
+            pipeline.process(article)
+            # 每满一批立即写入，不等爬取结束
+            assert _count_rows(db_path) == (index + 1) // 2 * 2
+        pipeline.consume(articles[4:])
+        pipeline.close()
+
+        stats = pipeline.get_stats()
+        assert stats['received'] == 8 and stats['accepted'] == 5
+        assert stats['invalid'] == 2 and stats['duplicates'] == 1
+        assert stats['saved'] == 5 and stats['batches'] == 3 and stats['pending'] == 0
+        assert _count_rows(db_path) == 5
+        assert not frontier.should_fetch('https://example.com/articles/3')
+
+        daily = db.get_statistics(1)[0]
+        assert daily['total_articles'] == 5 and daily['news_count'] == 3 and daily['tech_count'] == 2
+        keywords = {row['keyword']: row['frequency'] for row in db.get_top_keywords()}
+        assert keywords['蓝牙'] == 5
+
+        # 总结只保留有限数量的精简记录
+        assert len(pipeline.summary_articles) == 3
+        assert len(pipeline.summary_articles[0]['content']) <= 500
+    print("✓ 入库流水线校验、去重、批量写入正常")
+
+
+def test_pipeline_flushes_on_interval():
+    """测试爬虫产出很慢时文章在写入间隔内入库"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        with ArticlePipeline(Database(db_path), batch_size=100, flush_seconds=0.1) as pipeline:
+            pipeline.process(_article(1))
+            deadline = time.time() + 5
+            while _count_rows(db_path) == 0 and time.time() < deadline:
+                time.sleep(0.05)
+            assert _count_rows(db_path) == 1
+        assert pipeline.get_stats()['saved'] == 1
+    print("✓ 入库流水线按时间间隔写入")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_crawler_streams_articles, test_pipeline_validates_dedups_and_batches,
+             test_pipeline_flushes_on_interval]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持续抓取测试脚本
+验证到期来源分批、错开加入任务队列，以及当日统计按新入库的文章增量更新
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from database import Database
+from crawlers.base_crawler import BaseCrawler
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.task_queue import TaskQueue
+from crawlers.url_frontier import UrlFrontier
+from scheduler import CrawlerScheduler
+
+_CONTENT = '蓝牙低功耗音频（LE Audio）带来了新的编解码器和广播音频功能，' * 5
+
+
+def _article(index: int, source_type: str = 'news') -> dict:
+    return {
+        'title': f"Bluetooth 测试文章 {index:03d}",
+        'content': f"{index} {_CONTENT}",
+        'url': f"https://example.com/articles/{index}",
+        'source_type': source_type,
+        'source_name': 'Example',
+        'keywords': ['蓝牙', 'LE Audio'],
+    }
+
+
+class _QueryCrawler(BaseCrawler):
+    """每个关键词一个查询任务"""
+
+    source_type = 'tech'
+    KEYWORD_SOURCES = {'Example': ('_crawl_example', None)}
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = UrlFrontier(refresh_days={})
+        self.revisits = RevisitPlanner()
+
+    def crawl(self, keywords):
+        return self.articles
+
+    def _crawl_example(self, keywords):
+        pass
+
+
+def test_tick_enqueues_in_staggered_batches():
+    """测试每次检查最多补满队列上限，任务的可执行时间随机错开"""
+    original = Config.CONTINUOUS_MAX_QUEUED
+    Config.CONTINUOUS_MAX_QUEUED = 4
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            scheduler = CrawlerScheduler.__new__(CrawlerScheduler)
+            scheduler.db = Database(os.path.join(tmp_dir, 'test.db'))
+            scheduler.task_queue = TaskQueue(os.path.join(tmp_dir, 'tasks.db'))
+            scheduler.CRAWLERS = [('example', '示例', _QueryCrawler)]
+
+            start = time.time()
+            scheduler.run_continuous_tick()
+            assert scheduler.task_queue.get_stats()['pending'] == 4
+            with sqlite3.connect(scheduler.task_queue.store.db_path) as conn:
+                available = [row[0] for row in conn.execute('SELECT available_at FROM crawl_tasks')]
+            jitter = Config.CONTINUOUS_JITTER_MINUTES * 60
+            assert all(start <= at <= time.time() + jitter for at in available)
+            assert len(set(available)) == 4
+
+            # 队列已满时不再加入；执行完一部分后补足
+            scheduler.run_continuous_tick()
+            assert scheduler.task_queue.get_stats()['pending'] == 4
+            for task in scheduler.task_queue.lease('worker-1', limit=3, now=time.time() + jitter):
+                scheduler.task_queue.complete(task, 'worker-1')
+            scheduler.run_continuous_tick()
+            assert scheduler.task_queue.get_stats() == {'pending': 4, 'leased': 0, 'done': 3, 'failed': 0}
+    finally:
+        Config.CONTINUOUS_MAX_QUEUED = original
+    print("✓ 到期来源分批错开加入任务队列")
+
+
+def test_refresh_statistics_incrementally():
+    """测试当日统计按文章表重新计算，关键词频率只计入新文章"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'test.db'))
+        db.insert_articles([_article(1)])
+        # 首次刷新只记录起点，此前的文章视为已统计
+        assert db.refresh_statistics() == {'articles': 0, 'dates': 0}
+        assert db.get_top_keywords() == []
+
+        db.insert_articles([_article(2), _article(3, 'tech'), _article(4, 'academic')])
+        assert db.refresh_statistics() == {'articles': 3, 'dates': 1}
+        daily = db.get_statistics(1)[0]
+        assert daily['total_articles'] == 4 and daily['news_count'] == 2
+        assert daily['tech_count'] == 1 and daily['academic_count'] == 1
+        assert {row['keyword']: row['frequency'] for row in db.get_top_keywords()} == {'蓝牙': 3, 'LE Audio': 3}
+
+        assert db.refresh_statistics() == {'articles': 0, 'dates': 0}
+        db.insert_articles([_article(5)])
+        assert db.refresh_statistics()['articles'] == 1
+        assert db.get_statistics(1)[0]['total_articles'] == 5
+        assert db.get_top_keywords()[0]['frequency'] == 4
+    print("✓ 当日统计增量更新正常")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_tick_enqueues_in_staggered_batches, test_refresh_statistics_incrementally]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
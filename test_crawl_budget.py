@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取预算测试脚本
+验证请求数/字节数/耗时上限、嵌套预算，以及抓取引擎和爬虫在预算用尽后的行为
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from crawlers.crawl_budget import CrawlBudget
+from crawlers.fetch_engine import AsyncFetchEngine
+from crawlers.news_crawler import NewsCrawler
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.url_frontier import UrlFrontier
+from test_fetch_engine import _TestHandler, start_test_server
+
+
+def test_budget_limits():
+    """测试各项上限和父预算"""
+    run = CrawlBudget('run', max_requests=5)
+    news = CrawlBudget('news', max_requests=3, parent=run)
+    tech = CrawlBudget('tech', parent=run)
+    assert [news.try_acquire() for _ in range(4)] == [None, None, None, 'news.max_requests']
+    assert tech.try_acquire() is None and tech.try_acquire() is None
+    # 整次运行的预算用完后，其他爬虫也停止
+    assert tech.try_acquire() == 'run.max_requests'
+    assert tech.exhausted() == 'run.max_requests' and tech.truncated == 'run.max_requests'
+    assert run.get_usage()['requests'] == 5
+
+    sized = CrawlBudget('video', max_bytes=100)
+    assert sized.try_acquire() is None
+    sized.add_bytes(150)
+    assert sized.try_acquire() == 'video.max_bytes'
+
+    timed = CrawlBudget('academic', max_seconds=0.05)
+    assert timed.exhausted() is None
+    time.sleep(0.06)
+    assert timed.exhausted() == 'academic.max_seconds'
+    print("✓ 预算上限正常")
+
+
+def test_engine_enforces_budget():
+    """测试抓取引擎在预算用尽后不再发出请求"""
+    server, base_url = start_test_server()
+    engine = AsyncFetchEngine(per_host_concurrency=4)
+    budget = CrawlBudget('test', max_requests=3)
+    _TestHandler.full_responses = 0
+    try:
+        results = list(engine.fetch_many([f"{base_url}/etag/{i}" for i in range(8)], retries=1, budget=budget))
+    finally:
+        engine.close()
+        server.shutdown()
+    fetched = [result for result in results if result.ok]
+    skipped = [result for result in results if result.skip_reason == 'budget']
+    assert len(fetched) == 3 and len(skipped) == 5
+    assert _TestHandler.full_responses == 3
+    assert budget.get_usage()['bytes'] == sum(result.size for result in fetched)
+    assert engine.get_skip_stats().get('budget') == 5
+    print(f"✓ 抓取引擎按预算停止: {budget.get_usage()}")
+
+
+def test_crawler_stops_when_exhausted():
+    """测试预算用尽后爬虫跳过剩余来源，且不把截断的访问计入重访估计"""
+    crawler = NewsCrawler()
+    crawler.frontier = UrlFrontier(refresh_days={})
+    crawler.revisits = RevisitPlanner()
+    crawler.budget = CrawlBudget('news', max_requests=3)
+    visited = []
+
+    def crawl_source(source):
+        # 每个来源需要两次请求
+        visited.append(source)
+        crawler.budget.try_acquire()
+        crawler.budget.try_acquire()
+
+    assert crawler.visit_source('a', crawl_source, 'a')
+    assert crawler.revisits.get_status()[0]['source'] == 'a'
+    # 第二个来源访问中途用尽预算
+    assert crawler.visit_source('b', crawl_source, 'b')
+    assert crawler.budget.truncated == 'news.max_requests'
+    assert not crawler.visit_source('c', crawl_source, 'c')
+    assert visited == ['a', 'b']
+    assert [info['source'] for info in crawler.revisits.get_status()] == ['a']
+    print("✓ 爬虫在预算用尽后停止")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_budget_limits, test_engine_enforces_budget, test_crawler_stops_when_exhausted]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RSS增量轮询测试脚本
+使用本地订阅源服务器，验证条件请求、已处理条目跳过和高水位线
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+from crawlers.article_pipeline import PipelineMarker
+from crawlers.feed_state import FeedState
+from crawlers.fetch_engine import AsyncFetchEngine
+from crawlers.news_crawler import NewsCrawler
+from crawlers.parse_pool import ParsePool
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.url_frontier import UrlFrontier
+
+_BASE_TIME = 1700000000
+
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    """/feed.xml 返回当前条目（带ETag），/article/N 返回文章页面"""
+
+    items = []
+    article_fetches = 0
+    feed_responses = 0
+
+    def do_GET(self):
+        cls = type(self)
+        if self.path.startswith('/feed.xml'):
+            etag = f'"{len(cls.items)}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            cls.feed_responses += 1
+            entries = ''.join(
+                f"<item><title>Bluetooth LE Audio update {i}</title><link>{self._base()}/article/{i}</link>"
+                f"<guid>item-{i}</guid><pubDate>{formatdate(_BASE_TIME + i * 60, usegmt=True)}</pubDate>"
+                f"<description>Bluetooth news {i}</description></item>"
+                for i in reversed(cls.items))
+            self._send(f'<?xml version="1.0"?><rss version="2.0"><channel><title>Test Feed</title>{entries}</channel></rss>',
+                       'application/rss+xml', etag)
+            return
+        cls.article_fetches += 1
+        body = '<p>' + 'Bluetooth 蓝牙音频共享与低功耗连接的测试正文。' * 10 + '</p>'
+        self._send(f"<html><body>{body}</body></html>", 'text/html; charset=utf-8')
+
+    def _base(self):
+        return f"http://{self.headers['Host']}"
+
+    def _send(self, body: str, content_type: str, etag: str = ''):
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _news_crawler(db: Database, feed_url: str) -> NewsCrawler:
+    crawler = NewsCrawler()
+    crawler.RSS_FEEDS = [feed_url]
+    crawler.fetch_engine = AsyncFetchEngine()
+    crawler.frontier = UrlFrontier(refresh_days={})
+    crawler.frontier.load_from_database(db)
+    crawler.parse_pool = ParsePool(workers=0)
+    # 每次都访问订阅源，只验证订阅源自身的增量状态
+    crawler.revisits = RevisitPlanner()
+    return crawler
+
+
+def _poll(db: Database, feed_url: str) -> list:
+    """模拟一次独立的运行：新的爬虫和URL前沿，共用数据库中的订阅源状态"""
+    crawler = _news_crawler(db, feed_url)
+    try:
+        return crawler.poll_feeds(['Bluetooth'])
+    finally:
+        crawler.fetch_engine.close()
+
+
+def test_feed_state_high_water_mark():
+    """测试高水位线识别ID列表之外的旧条目"""
+    entry = lambda i: {'id': f"item-{i}", 'published_parsed': time.gmtime(_BASE_TIME + i * 60)}
+    state = FeedState('https://example.com/feed')
+    state.advance([entry(1), entry(2), entry(3)], {'ETag': '"abc"'}, max_ids=2)
+    assert state.entry_ids == ['item-3', 'item-2']  # 保留最新的条目
+    assert not state.is_new(entry(1)) and not state.is_new(entry(3))
+    assert not state.is_new(entry(0))  # 不在ID列表中，但早于高水位线
+    assert state.is_new(entry(4))
+    assert state.is_new({'id': 'same-time', 'published_parsed': time.gmtime(_BASE_TIME + 180)})
+    assert state.conditional_headers() == {'If-None-Match': '"abc"'}
+    print("✓ 订阅源高水位线正常")
+
+
+def test_incremental_feed_polling():
+    """测试第二次轮询只处理新条目"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    feed_url = f"http://127.0.0.1:{server.server_address[1]}/feed.xml"
+    _FeedHandler.items = [1, 2]
+    _FeedHandler.article_fetches = _FeedHandler.feed_responses = 0
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, 'test.db'))
+
+            articles = _poll(db, feed_url)
+            assert len(articles) == 2 and _FeedHandler.article_fetches == 2
+            state = db.get_feed_state(feed_url)
+            assert state['etag'] == '"2"' and set(state['entry_ids']) == {'item-1', 'item-2'}
+
+            # 订阅源未变化：条件请求返回304，不抓取任何全文
+            assert _poll(db, feed_url) == []
+            assert _FeedHandler.feed_responses == 1 and _FeedHandler.article_fetches == 2
+
+            # 新增一个条目：只抓取它的全文
+            _FeedHandler.items = [1, 2, 3]
+            articles = _poll(db, feed_url)
+            assert [a['title'] for a in articles] == ['Bluetooth LE Audio update 3']
+            assert _FeedHandler.article_fetches == 3
+            assert db.get_feed_state(feed_url)['last_published'] == _BASE_TIME + 180
+            print("✓ RSS增量轮询正常")
+    finally:
+        server.shutdown()
+
+
+def test_feed_state_saved_after_articles():
+    """测试流式爬取时订阅源进度在文章写入暂存后才保存：标记执行前崩溃，下次运行重新处理这些条目"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    feed_url = f"http://127.0.0.1:{server.server_address[1]}/feed.xml"
+    _FeedHandler.items = [1, 2]
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, 'test.db'))
+
+            # 文章已交出，但进程在执行标记（文章写入暂存）之前退出
+            crawler = _news_crawler(db, feed_url)
+            try:
+                items = list(crawler.stream(['Bluetooth'], crawler.poll_feeds))
+            finally:
+                crawler.fetch_engine.close()
+            assert len([item for item in items if not isinstance(item, PipelineMarker)]) == 2
+            assert isinstance(items[-1], PipelineMarker)
+            assert db.get_feed_state(feed_url) is None
+
+            # 下次运行重新处理这两个条目，执行标记后保存进度
+            crawler = _news_crawler(db, feed_url)
+            try:
+                urls = []
+                for item in crawler.stream(['Bluetooth'], crawler.poll_feeds):
+                    if isinstance(item, PipelineMarker):
+                        item.callback()
+                    else:
+                        urls.append(item['url'])
+            finally:
+                crawler.fetch_engine.close()
+            assert len(urls) == 2
+            assert set(db.get_feed_state(feed_url)['entry_ids']) == {'item-1', 'item-2'}
+            print("✓ 订阅源进度在文章写入暂存后保存")
+    finally:
+        server.shutdown()
+
+
+def main():
+    """主测试函数"""
+    tests = [test_feed_state_high_water_mark, test_incremental_feed_polling, test_feed_state_saved_after_articles]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取引擎测试脚本
+使用本地HTTP服务器，不访问外网
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from crawlers.fetch_engine import AsyncFetchEngine
+from crawlers.http_cache import HttpCache
+from crawlers.politeness import PolitenessScheduler
+from crawlers.http_client import create_session, get_connection_stats
+from crawlers.retry_policy import CircuitBreaker, RetryPolicy, parse_retry_after
+
+
+class _TestHandler(BaseHTTPRequestHandler):
+    """按路径返回测试内容，并记录同时在处理的请求数"""
+
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    full_responses = 0
+    throttled = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            if self.path.startswith('/slow'):
+                time.sleep(0.3)
+            if self.path.startswith('/missing'):
+                self.send_response(404)
+                self.end_headers()
+                return
+            if self.path.startswith('/throttled'):
+                cls.throttled += 1
+                self.send_response(429)
+                self.send_header('Retry-After', '0')
+                self.end_headers()
+                return
+            if self.path.startswith('/pdf'):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/pdf')
+                self.send_header('Content-Length', '100')
+                self.end_headers()
+                self.wfile.write(b'%PDF' + b'0' * 96)
+                return
+            if self.path.startswith('/huge'):
+                # 不带 Content-Length，只能边读边判断
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html')
+                self.end_headers()
+                for _ in range(32):
+                    self.wfile.write(b'<p>' + b'x' * 65536 + b'</p>')
+                return
+            if self.path.startswith('/etag'):
+                if self.headers.get('If-None-Match') == '"v1"':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                cls.full_responses += 1
+            body = f"<html><body><h1>{self.path}</h1></body></html>".encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _KeepAliveHandler(_TestHandler):
+    """支持 keep-alive 的测试处理器"""
+
+    protocol_version = 'HTTP/1.1'
+
+
+def start_test_server(handler=_TestHandler):
+    """启动本地测试服务器，返回 (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_fetch_one():
+    """测试单个URL抓取"""
+    server, base_url = start_test_server()
+    engine = AsyncFetchEngine()
+    try:
+        result = engine.fetch_one(f"{base_url}/page")
+        assert result.ok and '/page' in result.text
+        assert result.status_code == 200
+
+        missing = engine.fetch_one(f"{base_url}/missing", retries=1)
+        assert not missing.ok and missing.error
+        print("✓ 单个URL抓取正常")
+    finally:
+        engine.close()
+        server.shutdown()
+
+
+def test_per_host_concurrency():
+    """测试单主机并发上限与按完成顺序返回"""
+    server, base_url = start_test_server()
+    _TestHandler.peak = 0
+    engine = AsyncFetchEngine(max_concurrency=5, per_host_concurrency=2)
+    try:
+        urls = [f"{base_url}/slow/{i}" for i in range(6)] + [f"{base_url}/fast"]
+        start = time.time()
+        results = list(engine.fetch_many(urls))
+        elapsed = time.time() - start
+
+        assert len(results) == len(urls) and all(r.ok for r in results)
+        assert _TestHandler.peak <= 2
+        # 6个慢请求、每次最多2个并发，约3轮
+        assert elapsed < 6 * 0.3
+
+        # 按主机单独设置的并发上限
+        _TestHandler.peak = 0
+        engine.host_concurrency = {'localhost': 3}
+        port = server.server_address[1]
+        assert all(r.ok for r in engine.fetch_many([f"http://localhost:{port}/slow/{i}" for i in range(6)]))
+        assert _TestHandler.peak == 3
+        print(f"✓ 单主机并发上限生效，峰值 {_TestHandler.peak}，耗时 {elapsed:.2f}s")
+    finally:
+        engine.close()
+        server.shutdown()
+
+
+def test_conditional_cache():
+    """测试ETag条件请求缓存与按大小淘汰"""
+    server, base_url = start_test_server()
+    _TestHandler.full_responses = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = HttpCache(os.path.join(tmp_dir, 'cache.db'), max_bytes=10 * 1024, default_ttl=0)
+        engine = AsyncFetchEngine(cache=cache)
+        try:
+            first = engine.fetch_one(f"{base_url}/etag")
+            second = engine.fetch_one(f"{base_url}/etag")
+            assert first.ok and not first.from_cache
+            assert second.from_cache and second.status_code == 304
+            assert second.text == first.text
+            assert _TestHandler.full_responses == 1
+
+            stats = cache.get_stats()
+            assert stats['misses'] == 1 and stats['revalidated'] == 1
+
+            # 有效期内直接命中，不发请求
+            cache.default_ttl = 3600
+            engine.fetch_one(f"{base_url}/etag/fresh")
+            fresh = engine.fetch_one(f"{base_url}/etag/fresh")
+            assert fresh.from_cache and cache.get_stats()['hits'] == 1
+
+            # 订阅源轮询不使用未过期的缓存，总是发出条件请求
+            polled = engine.fetch_one(f"{base_url}/etag/fresh", revalidate=True)
+            assert polled.status_code == 304 and polled.text == fresh.text
+            assert cache.get_stats()['hits'] == 1 and cache.get_stats()['revalidated'] == 2
+
+            # 每次抓取只查一次缓存，命中时不写库，访问时间在写入缓存时一并写入
+            lookups = []
+            cache_get = cache.get
+            cache.get = lambda url: lookups.append(url) or cache_get(url)
+            engine.fetch_one(f"{base_url}/etag")
+            engine.fetch_one(f"{base_url}/etag/fresh")
+            assert lookups == [f"{base_url}/etag", f"{base_url}/etag/fresh"]
+            del cache.get
+            with sqlite3.connect(cache.db_path) as conn:
+                (stale_access,) = conn.execute('SELECT last_access FROM http_cache WHERE url = ?',
+                                               (f"{base_url}/etag",)).fetchone()
+            assert f"{base_url}/etag" in cache._pending_access
+            cache.store(f"{base_url}/other", 'x', {})
+            with sqlite3.connect(cache.db_path) as conn:
+                (access,) = conn.execute('SELECT last_access FROM http_cache WHERE url = ?',
+                                         (f"{base_url}/etag",)).fetchone()
+            assert access > stale_access and not cache._pending_access
+
+            # 超过大小上限时淘汰最久未访问的记录
+            cache.store('http://example.com/big', 'x' * 10200, {})
+            assert cache.get(f"{base_url}/etag") is None
+            assert cache.get_stats()['evictions'] >= 1
+            print(f"✓ 条件请求缓存正常: {cache.get_stats()}")
+        finally:
+            engine.close()
+            server.shutdown()
+
+
+def test_politeness_interleaves_hosts():
+    """测试按主机限速：冷却中的主机不阻塞其他主机"""
+    server, base_url = start_test_server()
+    port = server.server_address[1]
+    politeness = PolitenessScheduler(default_rate=100, domain_rates={'127.0.0.1': 4})
+    engine = AsyncFetchEngine(politeness=politeness)
+    try:
+        slow_host = [f"http://127.0.0.1:{port}/a/{i}" for i in range(4)]
+        fast_host = [f"http://localhost:{port}/b/{i}" for i in range(4)]
+        finished = {}
+        start = time.time()
+        for result in engine.fetch_many(slow_host + fast_host):
+            finished[result.url] = time.time() - start
+
+        # 127.0.0.1 限速每秒4次，4个请求至少需要约0.75秒
+        assert max(finished[url] for url in slow_host) >= 0.7
+        # localhost 不受其影响，很快完成
+        assert max(finished[url] for url in fast_host) < 0.5
+        assert politeness.get_rate('sub.127.0.0.1') == 4
+
+        # 不限速的主机被要求等待时只推迟一次，到期后恢复不限速
+        unlimited = PolitenessScheduler(default_rate=float('inf'), domain_rates={})
+        unlimited.defer('api.example.com', 0.2)
+        assert 0.1 < unlimited.reserve('api.example.com') <= 0.2
+        time.sleep(0.25)
+        assert [unlimited.reserve('api.example.com') for _ in range(5)] == [0.0] * 5
+        print("✓ 按主机限速生效，其他主机请求交错进行")
+    finally:
+        engine.close()
+        server.shutdown()
+
+
+def test_retry_and_circuit_breaker():
+    """测试错误分类、Retry-After 与主机熔断"""
+    assert parse_retry_after('5') == 5.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('garbage') is None
+
+    server, base_url = start_test_server()
+    _TestHandler.throttled = 0
+    breaker = CircuitBreaker(failure_threshold=3)
+    engine = AsyncFetchEngine(retry_policy=RetryPolicy(base_delay=0.01, max_delay=0.05),
+                              circuit_breaker=breaker)
+    try:
+        # 404 不重试，也不计入熔断；主机能正常响应，中断连续失败
+        host = '127.0.0.1:%d' % server.server_address[1]
+        breaker.record_failure(host, 'HTTP 503')
+        breaker.record_failure(host, 'HTTP 503')
+        missing = engine.fetch_one(f"{base_url}/missing", retries=3)
+        assert missing.status_code == 404 and breaker.allow(host)
+        breaker.record_failure(host, 'HTTP 503')
+        breaker.record_failure(host, 'HTTP 503')
+        assert breaker.allow(host) and breaker.get_status() == {}
+        breaker.reset()
+
+        # 429 按 Retry-After 重试，连续失败后熔断
+        throttled = engine.fetch_one(f"{base_url}/throttled", retries=5)
+        assert not throttled.ok and throttled.status_code == 429
+        assert _TestHandler.throttled == 3
+
+        assert not breaker.allow(host) and '429' in breaker.get_status()[host]['reason']
+        blocked = engine.fetch_one(f"{base_url}/page")
+        assert not blocked.ok and '熔断' in blocked.error
+        assert _TestHandler.throttled == 3
+
+        # 冷却结束后只放行一个试探请求：失败则重新熔断，成功则恢复
+        later = time.time() + breaker.cooldown_seconds + 1
+        assert breaker.allow(host, now=later) and not breaker.allow(host, now=later)
+        breaker.record_failure(host, 'HTTP 503', now=later)
+        assert not breaker.allow(host, now=later + 1) and breaker.get_status()[host]['reason'] == 'HTTP 503'
+        later += breaker.cooldown_seconds + 1
+        assert breaker.allow(host, now=later)
+        breaker.record_success(host)
+        assert breaker.allow(host) and breaker.get_status() == {}
+
+        # 半开状态下试探请求返回404，同样说明主机已恢复
+        for _ in range(3):
+            breaker.record_failure(host, 'HTTP 503')
+        breaker._open[host]['opened_ts'] -= breaker.cooldown_seconds + 1
+        assert engine.fetch_one(f"{base_url}/missing", retries=1).status_code == 404
+        assert breaker.allow(host) and breaker.get_status() == {}
+        print("✓ 重试分类与主机熔断正常")
+    finally:
+        engine.close()
+        server.shutdown()
+
+
+def test_shared_pool_reuses_connections():
+    """测试共享连接池复用 keep-alive 连接"""
+    server, base_url = start_test_server(_KeepAliveHandler)
+    engine = AsyncFetchEngine(create_session(), max_concurrency=1, per_host_concurrency=1)
+    try:
+        before = get_connection_stats()['hosts'].get('127.0.0.1', {'requests': 0, 'new_connections': 0})
+        for i in range(5):
+            assert engine.fetch_one(f"{base_url}/page/{i}").ok
+        after = get_connection_stats()['hosts']['127.0.0.1']
+        assert after['requests'] - before['requests'] == 5
+        assert after['new_connections'] - before['new_connections'] == 1
+        print(f"✓ 连接复用正常: {get_connection_stats()['reuse_rate']:.0%}")
+    finally:
+        engine.close()
+        server.shutdown()
+
+
+def test_streaming_limits():
+    """测试按内容类型提前放弃和流式下载大小上限"""
+    server, base_url = start_test_server()
+    engine = AsyncFetchEngine(max_response_bytes=512 * 1024)
+    try:
+        pdf = engine.fetch_one(f"{base_url}/pdf")
+        assert not pdf.ok and pdf.skip_reason == 'content_type'
+
+        huge = engine.fetch_one(f"{base_url}/huge")
+        assert not huge.ok and huge.skip_reason == 'too_large'
+
+        page = engine.fetch_one(f"{base_url}/page")
+        assert page.ok and page.size > 0
+        assert engine.get_skip_stats() == {'content_type': 1, 'too_large': 1}
+        print(f"✓ 流式下载限制生效: {engine.get_skip_stats()}")
+    finally:
+        engine.close()
+        server.shutdown()
+
+
+def main():
+    """主测试函数"""
+    tests = [test_fetch_one, test_per_host_concurrency, test_conditional_cache,
+             test_politeness_interleaves_hosts, test_retry_and_circuit_breaker,
+             test_shared_pool_reuses_connections, test_streaming_limits]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
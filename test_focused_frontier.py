@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+聚焦抓取测试脚本
+使用本地站点，验证链接打分、最优优先出队，以及不相关链接不会被抓取
+"""
+
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from crawlers.fetch_engine import AsyncFetchEngine
+from crawlers.focused_frontier import FocusedFrontier, LinkScorer, ScoredLink, extract_scored_links
+from crawlers.html_parser import parse_html
+from crawlers.manufacturer_crawler import ManufacturerCrawler
+from crawlers.news_crawler import NewsCrawler
+from crawlers.parse_pool import ParsePool
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.url_frontier import UrlFrontier
+
+_HUB = """<html><body>
+<ul>
+  <li><a href="/news/bluetooth-le-audio">Bluetooth LE Audio 正式发布</a></li>
+  <li><a href="/news/2024/12345">新一代蓝牙耳机评测</a></li>
+  <li><a href="/news/phone-launch">新手机发布会</a></li>
+  <li><a href="/news/gpu-review">显卡评测</a></li>
+  <li><a href="/news/car-sales">汽车销量</a></li>
+  <li><p>支持蓝牙 5.4 的芯片 <a href="/news/chip-1">详情</a></p></li>
+</ul>
+<div><a href="/topics/bluetooth">更多</a></div>
+<a href="https://other.example.net/bluetooth">外站 Bluetooth</a>
+<a href="mailto:news@example.com">联系我们</a>
+</body></html>"""
+
+_TOPIC = """<html><body>
+<h2><a href="/news/bluetooth-mesh">Bluetooth Mesh 组网实践</a></h2>
+<h2><a href="/news/weather">天气预报</a></h2>
+</body></html>"""
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    """/ 为首页，/topics/bluetooth 为栏目页，其余为文章页；记录被请求的路径"""
+
+    requested = []
+
+    def do_GET(self):
+        type(self).requested.append(self.path)
+        if self.path == '/':
+            body = _HUB
+        elif self.path.startswith('/topics/'):
+            body = _TOPIC
+        else:
+            text = 'Bluetooth 蓝牙低功耗音频与连接技术的测试正文。' * 10
+            body = f"<html><body><h1>Bluetooth article {self.path}</h1><article><p>{text}</p></article></body></html>"
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_site():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _SiteHandler.requested = []
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def _prepare(crawler):
+    crawler.fetch_engine = AsyncFetchEngine()
+    crawler.frontier = UrlFrontier(refresh_days={})
+    crawler.parse_pool = ParsePool(workers=0)
+    crawler.revisits = RevisitPlanner()
+    return crawler
+
+
+def test_link_scoring():
+    """测试锚文本、URL路径和周围文本的打分"""
+    scorer = LinkScorer(['蓝牙', 'Bluetooth'])
+    assert scorer.score('https://a.com/x', anchor='Bluetooth 耳机') == 3.0
+    assert scorer.score('https://a.com/topics/bluetooth') == 2.0
+    assert scorer.score('https://a.com/x', context='蓝牙 芯片') == 1.0
+    assert scorer.score('https://a.com/x', anchor='汽车', article_like=True) == 0.5
+
+    links = {link.url: link for link in extract_scored_links(parse_html(_HUB), 'https://example.com/', scorer)}
+    assert 'https://other.example.net/bluetooth' not in links  # 只保留本站链接
+    assert links['https://example.com/news/bluetooth-le-audio'].score == 3.0 + 2.0 + 0.5
+    assert links['https://example.com/news/chip-1'].score == 1.0 + 0.5  # 周围文本提到蓝牙
+    assert links['https://example.com/news/car-sales'].score == 0.5
+    assert '蓝牙' in links['https://example.com/news/chip-1'].context
+
+    frontier = FocusedFrontier(min_score=1.0)
+    frontier.add_links(links.values(), depth=1)
+    assert frontier.get_stats()['irrelevant'] == 3
+    batch = frontier.pop_batch(2)
+    assert batch[0][0].url == 'https://example.com/news/bluetooth-le-audio' and batch[0][1] == 1
+    # 同一URL不重复入队
+    assert frontier.add_links([ScoredLink('https://example.com/news/bluetooth-le-audio', 9.0)], depth=1) == 0
+    print("✓ 链接打分和最优优先出队正常")
+
+
+def test_news_site_fetches_only_relevant_links():
+    """测试新闻网站只抓取相关链接，并经栏目页展开到第二层"""
+    server, site_url = _start_site()
+    crawler = _prepare(NewsCrawler())
+    try:
+        crawler._crawl_news_site(site_url, ['蓝牙', 'Bluetooth'])
+    finally:
+        crawler.fetch_engine.close()
+        server.shutdown()
+    requested = set(_SiteHandler.requested)
+    assert {'/news/phone-launch', '/news/gpu-review', '/news/car-sales', '/news/weather'}.isdisjoint(requested)
+    assert {'/', '/topics/bluetooth', '/news/bluetooth-mesh'} <= requested
+    assert len(crawler.articles) == 4  # 首页3篇 + 栏目页1篇，栏目页本身无正文
+    print(f"✓ 新闻网站聚焦抓取正常: 请求 {len(requested)} 次，文章 {len(crawler.articles)} 篇")
+
+
+def test_fetch_limit_prefers_best_links():
+    """测试页面数上限内优先抓取得分最高的链接"""
+    server, site_url = _start_site()
+    crawler = _prepare(NewsCrawler())
+    try:
+        results = list(crawler.crawl_focused(site_url, LinkScorer(['蓝牙', 'Bluetooth']),
+                                             crawler._extract_article_data, site_url, max_pages=1))
+    finally:
+        crawler.fetch_engine.close()
+        server.shutdown()
+    assert _SiteHandler.requested == ['/', '/news/bluetooth-le-audio']
+    assert [url for url, _ in results] == [f"{site_url}news/bluetooth-le-audio"]
+    print("✓ 页面数上限内优先抓取最相关的链接")
+
+
+def test_manufacturer_generic_site_expands_hubs():
+    """测试厂商通用策略会展开到蓝牙相关的栏目页"""
+    server, site_url = _start_site()
+    crawler = _prepare(ManufacturerCrawler())
+    try:
+        articles = crawler._crawl_generic_site(site_url, limit=10)
+    finally:
+        crawler.fetch_engine.close()
+        server.shutdown()
+    urls = {article['url'] for article in articles}
+    assert f"{site_url}news/bluetooth-le-audio" in urls
+    assert f"{site_url}news/bluetooth-mesh" in urls  # 来自栏目页
+    assert '/topics/bluetooth' in _SiteHandler.requested and '/news/car-sales' not in _SiteHandler.requested
+    print(f"✓ 厂商网站聚焦抓取正常: {len(articles)} 个链接")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_link_scoring, test_news_site_fetches_only_relevant_links,
+             test_fetch_limit_prefers_best_links, test_manufacturer_generic_site_expands_hubs]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
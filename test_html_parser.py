@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML解析后端测试脚本
+验证 lxml 与 html.parser 在录制的页面上提取出相同的标题、正文和日期
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bs4 import BeautifulSoup
+from config import Config
+from crawlers.html_parser import SUPPORTED_PARSERS, get_parser_backend, parse_html
+from crawlers.news_crawler import NewsCrawler
+from crawlers.tech_crawler import TechCrawler
+from crawlers.academic_crawler import AcademicCrawler
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_corpus')
+
+
+def _load(name: str) -> str:
+    with open(os.path.join(CORPUS_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def _extract_all(parser: str) -> dict:
+    """用指定后端跑一遍各爬虫的提取逻辑"""
+    original = Config.HTML_PARSER
+    Config.HTML_PARSER = parser
+    try:
+        news, tech, academic = NewsCrawler(), TechCrawler(), AcademicCrawler()
+        results = {
+            'news': news._extract_article_data(_load('news_article.html'), 'https://www.ithome.com/0/812/345.htm', 'IT之家'),
+            'blog': tech._extract_tech_article_data(_load('tech_blog.html'), 'https://dev.to/ble', 'dev.to'),
+            'github': tech._extract_github_repo_data(_load('github_repo.html'), 'https://github.com/espressif/esp-idf', 'ble'),
+            'stackoverflow': tech._extract_stackoverflow_data(_load('stackoverflow_question.html'), 'https://stackoverflow.com/q/1', 'ble'),
+            'patent': academic._extract_patent_data(_load('patent.html'), 'https://patents.google.com/patent/US11234567B2', 'ble'),
+        }
+    finally:
+        Config.HTML_PARSER = original
+    return {name: {key: data[key] for key in ('title', 'content', 'publish_date', 'url')}
+            for name, data in results.items()}
+
+
+def _legacy_extract_text(html: str) -> str:
+    """原实现：序列化子树后用 html.parser 重新解析"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    lines = (line.strip() for line in soup.get_text().splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def test_backend_selection():
+    """测试后端选择与回退"""
+    assert get_parser_backend('html.parser') == 'html.parser'
+    assert get_parser_backend() in SUPPORTED_PARSERS
+    try:
+        get_parser_backend('regex')
+        assert False, "未知后端应报错"
+    except ValueError:
+        pass
+    assert parse_html('<p>蓝牙</p>').select_one('p').get_text() == '蓝牙'
+    print(f"✓ 当前解析后端: {get_parser_backend()}")
+
+
+def test_backend_parity():
+    """测试各后端提取结果一致"""
+    baseline = _extract_all('html.parser')
+    for parser in SUPPORTED_PARSERS:
+        results = _extract_all(parser)
+        for name, fields in baseline.items():
+            assert results[name] == fields, f"{parser} 与 html.parser 在 {name} 上不一致: {results[name]} != {fields}"
+    assert baseline['news']['publish_date'] == '2024-09-04 09:12'
+    assert baseline['blog']['publish_date'] == 'May 12, 2024'
+    assert 'loadAd' not in baseline['news']['content'] and '广告位' not in baseline['news']['content']
+    assert 'overflow' not in baseline['blog']['content']
+    print(f"✓ {', '.join(SUPPORTED_PARSERS)} 提取结果一致")
+
+
+def test_extract_text_on_node():
+    """测试直接在节点上提取正文，与原来的序列化再解析结果一致"""
+    crawler = NewsCrawler()
+    for name in ('news_article.html', 'tech_blog.html', 'github_repo.html', 'stackoverflow_question.html'):
+        html = _load(name)
+        soup = parse_html(html)
+        for selector in ('.article-content', '.post-content', '#readme .markdown-body', '.question .post-text', 'body'):
+            node = soup.select_one(selector)
+            if node is not None:
+                assert crawler.extract_text(node) == _legacy_extract_text(str(node)), (name, selector)
+        assert crawler.extract_text(html) == _legacy_extract_text(html), name
+    print("✓ 节点正文提取与原实现一致")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_backend_selection, test_backend_parity, test_extract_text_on_node]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP录制/回放测试脚本
+先从本地HTTP服务器录制WARC归档，关闭服务器后从归档回放
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from crawlers.fetch_engine import AsyncFetchEngine
+from crawlers.http_archive import HttpArchive, WarcWriter, install_replay_adapter, read_warc
+from crawlers.http_client import create_session
+from crawlers.parse_pool import ParsePool
+from crawlers.url_frontier import UrlFrontier
+from crawlers.academic_crawler import AcademicCrawler
+from test_fetch_engine import start_test_server
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_corpus')
+
+
+def test_record_and_replay():
+    """测试录制的正常、错误和被拒绝响应在回放时表现一致"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive_path = os.path.join(tmp_dir, 'crawl.warc.gz')
+        server, base_url = start_test_server()
+        paths = ['/page/1', '/page/蓝牙', '/missing', '/pdf']
+        engine = AsyncFetchEngine(recorder=WarcWriter(archive_path))
+        try:
+            recorded = {result.url: result for result in engine.fetch_many([base_url + p for p in paths], retries=1)}
+        finally:
+            engine.close()
+            server.shutdown()
+
+        records = list(read_warc(archive_path))
+        assert [r.type for r in records].count('response') == 4
+        assert [r.type for r in records].count('request') == 4
+        assert engine.recorder.get_stats()['responses'] == 4
+
+        # 服务器已关闭，所有响应来自归档
+        session = create_session()
+        adapter = install_replay_adapter(session, HttpArchive.load(archive_path), latency=0.2)
+        engine = AsyncFetchEngine(session, per_host_concurrency=4)
+        try:
+            start = time.time()
+            replayed = {result.url: result for result in engine.fetch_many([base_url + p for p in paths], retries=1)}
+            elapsed = time.time() - start
+            unknown = engine.fetch_one(f"{base_url}/never-recorded", retries=1)
+        finally:
+            engine.close()
+
+        for url, result in recorded.items():
+            assert replayed[url].text == result.text, url
+            assert replayed[url].skip_reason == result.skip_reason, url
+        assert '/page/%E8%93%9D%E7%89%99' in replayed[base_url + '/page/蓝牙'].text
+        assert replayed[base_url + '/missing'].status_code == 404
+        assert replayed[base_url + '/pdf'].skip_reason == 'content_type'
+        assert unknown.status_code == 404
+        # 四个请求并发，注入的延迟只叠加一次
+        assert 0.2 <= elapsed < 0.6, elapsed
+        stats = adapter.get_stats()
+        assert stats['requests'] == 5 and stats['misses'] == 1
+        print(f"✓ 录制/回放正常: {stats}")
+
+
+def test_crawler_offline():
+    """测试爬虫在回放模式下端到端运行"""
+    with open(os.path.join(CORPUS_DIR, 'patent.html'), 'rb') as f:
+        patent_html = f.read()
+    search_html = b'<html><body><a data-result="patent" href="/patent/US11234567B2/en">US11234567B2</a></body></html>'
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive_path = os.path.join(tmp_dir, 'patents.warc.gz')
+        writer = WarcWriter(archive_path)
+        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        writer.write_response("https://patents.google.com/?q=蓝牙&language=ENGLISH", 200, 'OK', headers, search_html)
+        writer.write_response("https://patents.google.com/patent/US11234567B2/en", 200, 'OK', headers, patent_html)
+
+        session = create_session()
+        adapter = install_replay_adapter(session, HttpArchive.load(archive_path))
+        engine = AsyncFetchEngine(session)
+        crawler = AcademicCrawler()
+        crawler.fetch_engine = engine
+        crawler.frontier = UrlFrontier(refresh_days={})
+        crawler.parse_pool = ParsePool(workers=0)
+        try:
+            crawler._crawl_patents(['蓝牙'])
+        finally:
+            engine.close()
+
+        assert len(crawler.articles) == 1
+        article = crawler.articles[0]
+        assert article['title'].startswith('专利: Method for synchronizing Bluetooth audio')
+        assert article['publish_date'] == '2021-03-18'
+        assert adapter.get_stats() == {'requests': 2, 'bytes': len(search_html) + len(patent_html), 'misses': 0}
+        print("✓ 爬虫离线回放正常")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_record_and_replay, test_crawler_offline]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
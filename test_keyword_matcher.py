@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词匹配测试脚本
+验证编译后的多关键词匹配器与原有逐个关键词判断结果一致
+"""
+
+import sys
+import os
+import random
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from crawlers.keyword_matcher import KeywordMatcher, get_keyword_matcher
+
+
+def _naive_positions(text: str, keyword: str):
+    text_lower, keyword_lower = text.lower(), keyword.lower()
+    return [i for i in range(len(text_lower)) if text_lower.startswith(keyword_lower, i)]
+
+
+def test_positions_and_overlaps():
+    """测试重叠关键词的位置与次数"""
+    matcher = KeywordMatcher(['蓝牙', '蓝牙耳机', '耳机', 'Bluetooth', 'ble', 'tooth', 'abcd', 'cdx'])
+    text = '新款蓝牙耳机支持 BLUETOOTH 5.4，蓝牙耳机盒 BlE；abcdx'
+    matches = matcher.matches(text)
+    for keyword in matcher.keywords:
+        assert matches.get(keyword, []) == _naive_positions(text, keyword), keyword
+    assert matcher.counts(text)['蓝牙'] == 2
+    assert matcher.contains_any(text, ['cdx'])
+    assert not matcher.contains_any('无关内容', None)
+    print(f"✓ 命中位置正确: {matcher.counts(text)}")
+
+
+def test_case_folding():
+    """测试中英文与全角字母的大小写折叠"""
+    matcher = KeywordMatcher(['Bluetooth', '蓝牙'])
+    assert matcher.matches('全角ＢＬＵＥＴＯＯＴＨ耳机') == {'Bluetooth': [2]}
+    # İ 小写后变成两个字符，位置仍对应原文
+    assert matcher.matches('İİ bluetooth 蓝牙') == {'Bluetooth': [3], '蓝牙': [13]}
+    print("✓ 大小写折叠正常")
+
+
+def test_parity_with_loops():
+    """测试与原有 any(keyword in text) 判断结果一致"""
+    matcher = get_keyword_matcher()
+    keywords = list(Config.SEARCH_KEYWORDS) + list(Config.BLUETOOTH_RELATED_KEYWORDS)
+    vocabulary = keywords + ['手机', 'phone', 'chip', ' ', '，', 'Blue', 'tooth', '蓝', '牙', 'able', 'BR/', 'EDR']
+    rng = random.Random(42)
+    for _ in range(500):
+        text = ''.join(rng.choice(vocabulary) for _ in range(rng.randint(0, 12)))
+        expected = {keyword for keyword in Config.SEARCH_KEYWORDS if keyword.lower() in text.lower()}
+        assert set(matcher.matched_keywords(text, Config.SEARCH_KEYWORDS)) == expected, text
+        assert matcher.contains_any(text, Config.SEARCH_KEYWORDS) == bool(expected), text
+        related = any(keyword in text.lower() for keyword in Config.BLUETOOTH_RELATED_KEYWORDS)
+        assert matcher.contains_any(text, Config.BLUETOOTH_RELATED_KEYWORDS) == related, text
+        for keyword, starts in matcher.matches(text).items():
+            assert starts == _naive_positions(text, keyword), (text, keyword)
+
+    # 未编译的关键词单独建匹配器
+    assert get_keyword_matcher(['WiFi']).contains_any('wifi 7', ['WiFi'])
+    assert get_keyword_matcher(Config.SEARCH_KEYWORDS) is matcher
+    print("✓ 与逐个关键词判断结果一致")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_positions_and_overlaps, test_case_folding, test_parity_with_loops]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
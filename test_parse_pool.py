@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析进程池测试脚本
+验证进程池解析结果与线程内解析一致，并且在途任务数受队列深度限制
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from crawlers.parse_pool import ParsePool
+from crawlers.news_crawler import NewsCrawler
+from crawlers.tech_crawler import TechCrawler
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_corpus')
+
+
+def _slow_square(value: int) -> int:
+    time.sleep(0.05)
+    if value < 0:
+        raise ValueError("负数")
+    return value * value
+
+
+def _load(name: str) -> str:
+    with open(os.path.join(CORPUS_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_backpressure():
+    """测试队列满时不再从上游取任务，异常任务单独返回"""
+    pool = ParsePool(workers=2, queue_depth=3)
+    pulled = []
+
+    def tasks():
+        for value in [3, -1] + list(range(10)):
+            pulled.append(value)
+            yield value, (value,)
+
+    try:
+        results = {}
+        for key, result, error in pool.map(_slow_square, tasks()):
+            results[key] = error if error is not None else result
+            # 上游最多领先已交付结果 queue_depth 个
+            assert len(pulled) - len(results) <= pool.queue_depth
+    finally:
+        pool.shutdown()
+
+    assert isinstance(results.pop(-1), ValueError)
+    assert results == {value: value * value for value in range(10)}
+    assert pool.get_stats() == {'parsed': 11, 'failed': 1, 'workers': 2}
+    print(f"✓ 背压正常: {pool.get_stats()}")
+
+
+def test_crawler_extractors_in_pool():
+    """测试爬虫提取方法在解析进程中的结果与线程内一致"""
+    pages = [
+        ('https://www.ithome.com/0/812/345.htm', _load('news_article.html')),
+        ('https://dev.to/ble', _load('tech_blog.html')),
+    ]
+    news, tech = NewsCrawler(), TechCrawler()
+    inline = ParsePool(workers=0)
+    pool = ParsePool(workers=2, queue_depth=2)
+    try:
+        for crawler, extractor_name in ((news, '_extract_article_data'), (tech, '_extract_tech_article_data')):
+            expected, actual = {}, {}
+            crawler.parse_pool = inline
+            for url, data in crawler.parse_pages(iter(pages), getattr(crawler, extractor_name), 'source'):
+                expected[url] = data
+            crawler.parse_pool = pool
+            for url, data in crawler.parse_pages(iter(pages), getattr(crawler, extractor_name), 'source'):
+                actual[url] = data
+            assert actual == expected and len(actual) == 2
+        # 发送到子进程不影响爬虫自身状态
+        assert news.fetch_engine is not None and news.articles == []
+    finally:
+        pool.shutdown()
+    print(f"✓ 进程池解析结果一致: {pool.get_stats()}")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_backpressure, test_crawler_extractors_in_pool]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原始页面存储测试脚本
+验证内容寻址的压缩存储、按URL/抓取时间的索引，以及不访问网络的重新提取
+"""
+
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+from crawlers.fetch_engine import AsyncFetchEngine
+from crawlers.raw_store import BlobStore, RawPageStore
+from reextract import reextract_articles
+from test_fetch_engine import start_test_server
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_corpus')
+PATENT_URL = "https://patents.google.com/patent/US11234567B2/en"
+
+
+def test_blob_store():
+    """测试相同内容只保存一份，读取结果与写入一致"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        blobs = BlobStore(tmp_dir)
+        data = ('<html><body>' + '蓝牙 Bluetooth LE Audio ' * 2000 + '</body></html>').encode('utf-8')
+        digest, written = blobs.put(data)
+        assert 0 < written < len(data) // 10
+        assert blobs.put(data) == (digest, 0)
+        assert digest in blobs
+        assert blobs.get(digest) == data
+        assert blobs.get('0' * 64) is None
+        files = [name for _, _, names in os.walk(tmp_dir) for name in names]
+        assert files == [digest + '.zst'], files
+        print(f"✓ 内容寻址存储正常: {len(data)} -> {written} 字节")
+
+
+def test_raw_page_index():
+    """测试按规范URL索引，内容不变时只更新抓取时间"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = RawPageStore(tmp_dir)
+        url = "https://example.com/article/1"
+        store.store(url + "?utm_source=rss", "<p>v1</p>")
+        store.store(url, "<p>v1</p>")
+        assert len(store.history(url)) == 1
+        store.store(url, "<p>v2</p>")
+        store.store("https://example.com/article/2", "<p>v1</p>")
+        assert len(store.history(url)) == 2
+        assert store.get_html(url) == "<p>v2</p>"
+        assert store.get_html("https://example.com/missing") is None
+        stats = store.get_stats()
+        assert stats['stored'] == 3 and stats['unchanged'] == 1 and stats['deduplicated'] == 1, stats
+        print(f"✓ 原始页面索引正常: {stats}")
+
+
+def test_engine_stores_pages():
+    """测试抓取引擎保存抓取到的页面"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = RawPageStore(tmp_dir)
+        server, base_url = start_test_server()
+        engine = AsyncFetchEngine(raw_store=store)
+        try:
+            results = list(engine.fetch_many([f"{base_url}/page/1", f"{base_url}/missing"], retries=1))
+        finally:
+            engine.close()
+            server.shutdown()
+        page = next(result for result in results if result.ok)
+        assert store.get_html(page.url) == page.text
+        assert store.latest(f"{base_url}/missing") is None
+        print("✓ 抓取引擎保存原始页面正常")
+
+
+def test_reextract_articles():
+    """测试用保存的页面重新提取并更新文章"""
+    with open(os.path.join(CORPUS_DIR, 'patent.html'), encoding='utf-8') as f:
+        patent_html = f.read()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'test.db'))
+        store = RawPageStore(os.path.join(tmp_dir, 'raw_pages'))
+        # 模拟旧版选择器提取出的不完整数据
+        db.insert_article({
+            'title': '专利: ', 'content': '摘要: \n\n申请人: \n发明人: ', 'url': PATENT_URL,
+            'source_type': 'academic', 'source_name': 'Google Patents', 'keywords': []
+        })
+        db.insert_article({
+            'title': 'arXiv: Bluetooth mesh', 'content': '蓝牙 Bluetooth', 'url': 'http://arxiv.org/abs/2401.00001',
+            'source_type': 'academic', 'source_name': 'arXiv', 'keywords': []
+        })
+        store.store(PATENT_URL, patent_html)
+
+        stats = reextract_articles(db, store, ['academic'], workers=1)
+        assert stats == {'articles': 2, 'updated': 1, 'unchanged': 0, 'not_archived': 1,
+                         'unsupported': 0, 'invalid': 0, 'failed': 0}, stats
+        article = db.get_articles_by_source_types(['academic'])[0]
+        assert article['title'].startswith('专利: Method for synchronizing Bluetooth audio')
+        assert article['publish_date'] == '2021-03-18'
+        assert 'Bluetooth' in article['keywords']
+
+        # 再次运行时结果不变
+        stats = reextract_articles(db, store, ['academic'], workers=0)
+        assert stats['unchanged'] == 1 and stats['updated'] == 0, stats
+        print("✓ 重新提取正常")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_blob_store, test_raw_page_index, test_engine_stores_pages, test_reextract_articles]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应重访计划测试脚本
+验证变化频率估计、访问预算和持久化
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.news_crawler import NewsCrawler
+from crawlers.url_frontier import UrlFrontier
+
+
+def _simulate(planner: RevisitPlanner, source: str, changes, start: datetime) -> datetime:
+    """按计划访问 len(changes) 次，changes[i] 为第 i 次访问是否有新文章"""
+    now = start
+    for changed in changes:
+        state = planner.record_visit(source, 'news', 3 if changed else 0, now=now)
+        now = state.next_visit
+    return now
+
+
+def test_change_rate_adapts():
+    """测试变化快的来源间隔缩短、长期不变的来源间隔拉长"""
+    planner = RevisitPlanner(min_hours=1, max_hours=168, daily_budget=1000, decay=0.8, tolerance_minutes=0)
+    start = datetime(2024, 1, 1)
+    _simulate(planner, 'fast', [True] * 20, start)
+    _simulate(planner, 'slow', [False] * 20, start)
+    status = {info['source']: info for info in planner.get_status()}
+    assert status['fast']['interval_hours'] < 4, status['fast']
+    assert status['slow']['interval_hours'] > 100, status['slow']
+
+    # 新来源以每天一次为先验，一次访问不会跳到极端值
+    state = planner.record_visit('new', 'news', 0, now=start)
+    assert 12 < (state.next_visit - start).total_seconds() / 3600 < 72
+    print(f"✓ 变化频率估计正常: fast {status['fast']['interval_hours']:.1f}h, slow {status['slow']['interval_hours']:.1f}h")
+
+
+def test_daily_budget():
+    """测试来源总访问次数超过预算时按比例拉长间隔"""
+    start = datetime(2024, 1, 1)
+    unlimited = RevisitPlanner(min_hours=1, max_hours=168, daily_budget=10000, tolerance_minutes=0)
+    limited = RevisitPlanner(min_hours=1, max_hours=168, daily_budget=24, tolerance_minutes=0)
+    for planner in (unlimited, limited):
+        for i in range(10):
+            _simulate(planner, f"source-{i}", [True] * 10, start)
+    # 最后一个来源安排时其他来源都已有记录
+    last = lambda planner: next(info for info in planner.get_status() if info['source'] == 'source-9')
+    fast = last(unlimited)['interval_hours']
+    budgeted = last(limited)['interval_hours']
+    # 10 个来源、每天预算 24 次：平均每个来源约 10 小时访问一次
+    assert budgeted > fast * 2 and budgeted >= 9, (fast, budgeted)
+    print(f"✓ 访问预算正常: {fast:.1f}h -> {budgeted:.1f}h")
+
+
+def test_due_and_persistence():
+    """测试到期判断和从数据库恢复计划"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'test.db'))
+        planner = RevisitPlanner(tolerance_minutes=30)
+        planner.load_from_database(db)
+        now = datetime.now()
+        state = planner.record_visit('https://example.com/', 'news', 0, now=now)
+        assert planner.is_due('https://unknown.example.com/')
+        assert not planner.is_due('https://example.com/', now=now)
+        assert planner.is_due('https://example.com/', now=state.next_visit - timedelta(minutes=10))
+
+        restored = RevisitPlanner(tolerance_minutes=30)
+        restored.load_from_database(db)
+        assert not restored.is_due('https://example.com/', now=now)
+        rows = db.get_source_revisits()
+        assert rows[0]['source'] == 'https://example.com/' and rows[0]['next_visit'] == state.next_visit.isoformat()
+        print("✓ 到期判断和持久化正常")
+
+
+def test_crawler_skips_sources_not_due():
+    """测试爬虫跳过未到访问时间的来源"""
+    crawler = NewsCrawler()
+    crawler.frontier = UrlFrontier(refresh_days={})
+    crawler.revisits = RevisitPlanner()
+    visited = []
+    crawl = lambda: visited.append(1) or crawler.emit_article({'url': 'https://example.com/a/1'})
+
+    assert crawler.visit_source('https://example.com/', crawl)
+    assert not crawler.visit_source('https://example.com/', crawl)
+    assert visited == [1]
+    assert crawler.revisits.get_status()[0]['last_new_articles'] == 1
+    print("✓ 爬虫按重访计划跳过来源")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_change_rate_adapts, test_daily_budget, test_due_and_persistence, test_crawler_skips_sources_not_due]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
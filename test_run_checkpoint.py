@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+断点续跑测试脚本
+验证文章暂存文件的重放、已完成来源的跳过、过期中断运行的处理，以及死信队列的退避重试
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from database import Database
+from crawlers.article_pipeline import ArticlePipeline, PipelineMarker
+from crawlers.base_crawler import BaseCrawler
+from crawlers.dead_letters import DeadLetterQueue
+from crawlers.fetch_engine import AsyncFetchEngine
+from crawlers.news_crawler import NewsCrawler
+from crawlers.parse_pool import ParsePool
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.run_checkpoint import RunCheckpoint
+from crawlers.url_frontier import UrlFrontier
+
+_CONTENT = '蓝牙低功耗音频（LE Audio）带来了新的编解码器和广播音频功能，' * 5
+
+
+def _article(index: int) -> dict:
+    return {
+        'title': f"Bluetooth 测试文章 {index:03d}",
+        'content': f"{index} {_CONTENT}",
+        'url': f"https://example.com/articles/{index}",
+        'source_type': 'news',
+        'source_name': 'Example',
+        'keywords': ['蓝牙'],
+    }
+
+
+def _count_rows(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+
+class _SourcesCrawler(BaseCrawler):
+    """依次访问两个来源，每个来源交出一篇文章"""
+
+    source_type = 'news'
+
+    def __init__(self, checkpoint):
+        super().__init__()
+        self.frontier = UrlFrontier(refresh_days={})
+        self.revisits = RevisitPlanner()
+        self.checkpoint = checkpoint
+        self.visited = []
+
+    def crawl(self, keywords):
+        for index, source in enumerate(['https://a.example.com/', 'https://b.example.com/']):
+            self.visit_source(source, self._visit, source, index)
+        return self.articles
+
+    def _visit(self, source, index):
+        self.visited.append(source)
+        self.add_article(_article(index))
+
+
+def test_resume_replays_spool():
+    """测试中断后重新运行：已入库的文章只恢复统计，未入库的从暂存文件重放，已完成的来源跳过"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        db = Database(db_path)
+        spool_dir = os.path.join(tmp_dir, 'spool')
+
+        checkpoint, stale = RunCheckpoint.open(db, spool_dir=spool_dir)
+        assert not checkpoint.resumed and stale == []
+        pipeline = ArticlePipeline(db, checkpoint=checkpoint, batch_size=2, flush_seconds=0)
+        for index in range(3):
+            pipeline.process(_article(index))
+        pipeline.process(PipelineMarker(lambda: checkpoint.mark_done('source', 'https://a.example.com/')))
+        # 进程在第三篇文章入库前退出（不调用 close）
+        assert _count_rows(db_path) == 2 and checkpoint.committed == 2
+
+        resumed, stale = RunCheckpoint.open(db, spool_dir=spool_dir)
+        assert resumed.resumed and resumed.run_id == checkpoint.run_id and stale == []
+        assert resumed.is_done('source', 'https://a.example.com/') and resumed.committed == 2
+        with ArticlePipeline(db, checkpoint=resumed, update_statistics=True, flush_seconds=0) as pipeline:
+            assert pipeline.replay(resumed) == 1
+            crawler = _SourcesCrawler(resumed)
+            pipeline.consume(crawler.stream(['蓝牙']))
+        assert crawler.visited == ['https://b.example.com/']
+        assert pipeline.get_stats()['duplicates'] == 1  # b 站的文章与中断前已入库的第二篇URL相同
+        assert _count_rows(db_path) == 3
+        assert db.get_statistics(1)[0]['total_articles'] == 3
+        assert resumed.is_done('source', 'https://b.example.com/')
+
+        resumed.finish()
+        assert not os.path.exists(resumed.spool.path)
+        assert db.get_unfinished_crawl_runs('daily') == [] and db.get_run_checkpoints(resumed.run_id) == []
+    print("✓ 断点续跑和暂存文件重放正常")
+
+
+def test_stale_run_is_replayed_not_resumed():
+    """测试很久以前中断的运行不再继续，只重放其暂存的文章"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        db = Database(db_path)
+        spool_dir = os.path.join(tmp_dir, 'spool')
+        old_start = datetime.now() - timedelta(hours=Config.CHECKPOINT_RESUME_HOURS + 1)
+        old, _ = RunCheckpoint.open(db, spool_dir=spool_dir, now=old_start)
+        ArticlePipeline(db, checkpoint=old, flush_seconds=0).process(_article(1))
+
+        checkpoint, stale = RunCheckpoint.open(db, spool_dir=spool_dir)
+        assert not checkpoint.resumed and [run.run_id for run in stale] == [old.run_id]
+        with ArticlePipeline(db, flush_seconds=0) as replay:
+            assert replay.replay(stale[0]) == 1
+        stale[0].finish('abandoned')
+        assert _count_rows(db_path) == 1
+        assert [run['run_id'] for run in db.get_unfinished_crawl_runs('daily')] == [checkpoint.run_id]
+    print("✓ 过期的中断运行只重放暂存文章")
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """前 failures 次请求返回503，之后返回文章页面"""
+
+    failures = 0
+
+    def do_GET(self):
+        cls = type(self)
+        if cls.failures > 0:
+            cls.failures -= 1
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        text = 'Bluetooth 蓝牙低功耗音频与连接技术的测试正文。' * 10
+        body = f"<html><body><h1>Bluetooth LE Audio 测试文章</h1><article><p>{text}</p></article></body></html>"
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_dead_letter_retry_with_backoff():
+    """测试失败页面进入死信队列，按退避时间重试，成功后移除；超过次数后放弃"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    site_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    page_url = f"{site_url}news/le-audio"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'test.db'))
+        crawler = NewsCrawler()
+        crawler.fetch_engine = AsyncFetchEngine()
+        crawler.frontier = UrlFrontier(refresh_days={})
+        crawler.parse_pool = ParsePool(workers=0)
+        crawler.dead_letters = DeadLetterQueue(db, 'news')
+        try:
+            _FlakyHandler.failures = 1
+            crawler._current_source = site_url
+            assert list(crawler.get_pages([page_url], retries=1)) == []
+            entry = db.get_dead_letters('news')[0]
+            assert entry['url'] == page_url and entry['attempts'] == 1 and entry['source'] == site_url
+            # 退避时间未到不重试
+            assert crawler.dead_letters.due() == []
+            assert crawler.retry_dead_letters() == 0
+            later = datetime.now() + timedelta(minutes=Config.DEAD_LETTER_RETRY_MINUTES + 1)
+            assert [row['url'] for row in crawler.dead_letters.due(now=later)] == [page_url]
+
+            # 第二次失败后间隔翻倍
+            crawler.dead_letters.record_failure(page_url, site_url, '503', now=datetime.now() - timedelta(hours=2))
+            entry = db.get_dead_letters('news')[0]
+            assert entry['attempts'] == 2 and entry['first_failed'] != entry['last_failed']
+            assert crawler.dead_letters.retry_delay(2) == timedelta(minutes=2 * Config.DEAD_LETTER_RETRY_MINUTES)
+
+            # 到期后重试成功：重新提取文章并移出队列
+            assert crawler.retry_dead_letters() == 1
+            assert [article['title'] for article in crawler.articles] == ['Bluetooth LE Audio 测试文章']
+            assert db.get_dead_letters('news') == [] and len(crawler.dead_letters) == 0
+        finally:
+            crawler.fetch_engine.close()
+            server.shutdown()
+
+        queue = DeadLetterQueue(db, 'tech')
+        for _ in range(Config.DEAD_LETTER_MAX_ATTEMPTS + 1):
+            queue.record_failure('https://example.com/broken', 'GitHub', 'timeout')
+        assert db.get_dead_letters('tech') == []
+    print("✓ 死信队列退避重试正常")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_resume_replays_spool, test_stale_run_is_replayed_not_resumed, test_dead_letter_retry_with_backoff]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
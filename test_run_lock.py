@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行锁测试脚本
+验证同一时间只有一个进程取得运行锁、心跳续约和进度、过期锁被接管，调度器遇到正在进行的爬取时跟随、排队或跳过，
+以及任务队列的工作进程与整次爬取互斥
+"""
+
+import sys
+import os
+import multiprocessing
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from database import Database
+from crawlers.base_crawler import BaseCrawler
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.run_lock import RunLock, get_run_lock_status
+from crawlers.task_queue import CrawlTask, TaskQueue, TaskWorker
+from crawlers.url_frontier import UrlFrontier
+from scheduler import CrawlerScheduler
+
+
+def test_lock_contention_and_takeover():
+    """测试锁的争用计数、心跳写入进度、过期后接管以及原持有者停止"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'test.db'))
+        first = RunLock(db, owner='proc-1', lease_seconds=60, heartbeat_seconds=0.05)
+        first.progress = lambda: {'saved': 3}
+        assert first.acquire()
+        second = RunLock(db, owner='proc-2', lease_seconds=60)
+        assert not second.acquire() and not second.acquire()
+
+        time.sleep(0.2)
+        status = get_run_lock_status(db)
+        assert status['state'] == 'running' and status['owner'] == 'proc-1'
+        assert status['progress'] == {'saved': 3} and status['heartbeat_age'] < 1
+        assert status['contended'] == 2 and status['last_contender'] == 'proc-2'
+
+        # 持有进程卡死（心跳停止）超过租约时长后，锁被接管，原持有者的心跳发现后停止爬取
+        lost = threading.Event()
+        first.on_lost = lost.set
+        first._stopped.set()
+        first._heartbeat.join()
+        assert get_run_lock_status(db, now=time.time() + 61)['state'] == 'stale'
+        acquired, previous = db.acquire_run_lock('crawl', 'proc-2', 60, now=time.time() + 61)
+        assert acquired and previous['owner'] == 'proc-1'
+        first._stopped.clear()
+        first._heartbeat_loop()
+        assert first.lost and lost.is_set()
+        first.release()
+        status = get_run_lock_status(db)
+        assert status['owner'] == 'proc-2' and status['takeovers'] == 1
+
+        db.release_run_lock('crawl', 'proc-2')
+        assert get_run_lock_status(db)['state'] == 'idle'
+        assert second.acquire()
+        second.release()
+    print("✓ 运行锁争用、心跳和接管正常")
+
+
+def _try_lock(db_path: str, owner: str, start, results):
+    """子进程：同时尝试取得运行锁，取得后持有一段时间"""
+    lock = RunLock(Database(db_path), owner=owner)
+    start.wait()
+    acquired = lock.acquire()
+    results.put(acquired)
+    if acquired:
+        time.sleep(1)
+        lock.release()
+
+
+def test_processes_acquire_once():
+    """测试多个进程同时尝试，只有一个取得运行锁"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'test.db')
+        Database(db_path)
+        context = multiprocessing.get_context('spawn')
+        start = context.Event()
+        results = context.Queue()
+        processes = [context.Process(target=_try_lock, args=(db_path, f"proc-{index}", start, results))
+                     for index in range(4)]
+        for process in processes:
+            process.start()
+        start.set()
+        acquired = [results.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join()
+        assert acquired.count(True) == 1
+        assert get_run_lock_status(Database(db_path))['contended'] == 3
+    print("✓ 多个进程同时触发只有一个取得运行锁")
+
+
+def test_scheduler_attach_queue_and_skip():
+    """测试调度器遇到正在进行的爬取时跟随、排队或跳过"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        scheduler = CrawlerScheduler.__new__(CrawlerScheduler)
+        scheduler.db = Database(os.path.join(tmp_dir, 'test.db'))
+        runs = []
+        scheduler._run_daily_crawl = lambda lock: runs.append(lock.owner)
+
+        holder = RunLock(scheduler.db, owner='other-process', heartbeat_seconds=0.05)
+        assert holder.acquire()
+        scheduler.run_daily_crawl(on_busy='skip')
+        scheduler.run_due_crawl()
+        assert runs == []
+
+        # 跟随：等到正在进行的爬取结束，不再重复爬取；排队：结束后再执行一次
+        original = Config.RUN_LOCK_POLL_SECONDS
+        Config.RUN_LOCK_POLL_SECONDS = 0.05
+        try:
+            for on_busy, expected in (('attach', 0), ('queue', 1)):
+                if not holder.held:
+                    assert holder.acquire()
+                threading.Timer(0.3, holder.release).start()
+                started = time.time()
+                scheduler.run_daily_crawl(on_busy=on_busy)
+                assert time.time() - started >= 0.3
+                assert len(runs) == expected
+        finally:
+            Config.RUN_LOCK_POLL_SECONDS = original
+        assert get_run_lock_status(scheduler.db)['state'] == 'idle'
+    print("✓ 调度器跟随、排队或跳过正在进行的爬取")
+
+
+class _SlowCrawler(BaseCrawler):
+    """每个关键词查询耗时0.3秒，记录开始和结束"""
+
+    source_type = 'tech'
+    KEYWORD_SOURCES = {'Example': ('_crawl_example', None)}
+    events = []
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = UrlFrontier(refresh_days={})
+        self.revisits = RevisitPlanner()
+
+    def crawl(self, keywords):
+        return self.articles
+
+    def _crawl_example(self, keywords):
+        self.events.append(f"start-{keywords[0]}")
+        time.sleep(0.3)
+        self.events.append(f"end-{keywords[0]}")
+
+
+def _wait_for(condition, timeout: float = 10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.02)
+
+
+def test_workers_and_daily_crawl_exclude_each_other():
+    """测试任务队列的工作进程与每日任务互斥：整次爬取期间不领取任务，工作进程执行任务时每日任务跳过或排队"""
+    originals = Config.RUN_LOCK_POLL_SECONDS, Config.TASK_POLL_SECONDS
+    Config.RUN_LOCK_POLL_SECONDS = Config.TASK_POLL_SECONDS = 0.05
+    events = _SlowCrawler.events = []
+    stop = threading.Event()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, 'test.db'))
+            queue = TaskQueue(os.path.join(tmp_dir, 'tasks.db'))
+            queue.enqueue(CrawlTask('keyword', f"Example|{keyword}", {'source': 'Example', 'keyword': keyword},
+                                    crawler='example') for keyword in ('a', 'b'))
+            scheduler = CrawlerScheduler.__new__(CrawlerScheduler)
+            scheduler.db = db
+            scheduler._run_daily_crawl = lambda lock: events.append('daily')
+
+            # 其他进程正在整次爬取时，工作进程不领取任务
+            holder = RunLock(db, owner='run_crawler.py')
+            assert holder.acquire()
+            worker = TaskWorker(queue, db, [('example', '示例', _SlowCrawler)], owner='crawl_worker.py')
+            worker_thread = threading.Thread(target=worker.run, args=(stop,), daemon=True)
+            worker_thread.start()
+            time.sleep(0.3)
+            assert events == [] and queue.get_stats()['pending'] == 2
+            holder.release()
+
+            # 工作进程执行任务时，每日任务跳过；排队时等当前任务完成，期间工作进程不再开始新任务
+            _wait_for(lambda: events == ['start-a'])
+            assert get_run_lock_status(db)['shared_holders'] == ['crawl_worker.py']
+            scheduler.run_daily_crawl(on_busy='skip')
+            assert 'daily' not in events
+            scheduler.run_daily_crawl(on_busy='queue')
+            _wait_for(lambda: queue.get_stats()['done'] == 2)
+            assert events == ['start-a', 'end-a', 'daily', 'start-b', 'end-b']
+            assert get_run_lock_status(db)['contended'] >= 2
+            stop.set()
+            worker_thread.join()
+    finally:
+        stop.set()
+        Config.RUN_LOCK_POLL_SECONDS, Config.TASK_POLL_SECONDS = originals
+    print("✓ 工作进程与每日任务互斥")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_lock_contention_and_takeover, test_processes_acquire_once, test_scheduler_attach_queue_and_skip,
+             test_workers_and_daily_crawl_exclude_each_other]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
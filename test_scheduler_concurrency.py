@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬虫并发运行测试脚本
+验证各爬虫同时运行、单个爬虫失败不影响其他爬虫、运行报告的记录，以及依次运行的开关
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from database import Database
+from crawlers.article_pipeline import ArticlePipeline
+from crawlers.base_crawler import BaseCrawler
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.url_frontier import UrlFrontier
+from scheduler import CrawlerScheduler
+
+_CONTENT = '蓝牙低功耗音频（LE Audio）带来了新的编解码器和广播音频功能，' * 5
+
+
+class _SlowCrawler(BaseCrawler):
+    """等待一段时间后交出一篇文章，记录同时运行的爬虫数"""
+
+    source_type = 'news'
+    delay = 0.5
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = UrlFrontier(refresh_days={})
+        self.revisits = RevisitPlanner()
+
+    def crawl(self, keywords):
+        cls = _SlowCrawler
+        with cls.lock:
+            cls.running += 1
+            cls.peak = max(cls.peak, cls.running)
+        try:
+            time.sleep(self.delay)
+            name = type(self).__name__
+            self.add_article({'title': f"Bluetooth 测试文章 {name}", 'content': _CONTENT,
+                              'url': f"https://example.com/{name}", 'source_type': self.source_type})
+        finally:
+            with cls.lock:
+                cls.running -= 1
+        return self.articles
+
+
+class _NewsCrawler(_SlowCrawler):
+    pass
+
+
+class _TechCrawler(_SlowCrawler):
+    source_type = 'tech'
+
+
+class _VideoCrawler(_SlowCrawler):
+    source_type = 'video'
+
+
+class _BrokenCrawler(_SlowCrawler):
+    def crawl(self, keywords):
+        raise RuntimeError('站点结构变化')
+
+
+def _scheduler(db: Database) -> CrawlerScheduler:
+    scheduler = CrawlerScheduler.__new__(CrawlerScheduler)
+    scheduler.db = db
+    scheduler.CRAWLERS = [('news', '新闻', _NewsCrawler), ('tech', '技术文章', _TechCrawler),
+                          ('academic', '学术论文和专利', _BrokenCrawler), ('video', '视频内容', _VideoCrawler)]
+    return scheduler
+
+
+def _run(concurrency: int):
+    original = Config.CRAWLER_CONCURRENCY
+    Config.CRAWLER_CONCURRENCY = concurrency
+    _SlowCrawler.peak = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, 'test.db'))
+            scheduler = _scheduler(db)
+            start = time.time()
+            with ArticlePipeline(db, flush_seconds=0) as pipeline:
+                reports = scheduler._crawl_all_sources(pipeline)
+            return reports, time.time() - start, pipeline.get_stats(), db.get_crawl_reports()
+    finally:
+        Config.CRAWLER_CONCURRENCY = original
+
+
+def test_families_run_concurrently():
+    """测试各爬虫同时运行，失败的爬虫只记录在报告中"""
+    reports, elapsed, stats, saved = _run(4)
+    assert _SlowCrawler.peak == 3 and elapsed < 3 * _SlowCrawler.delay
+    assert [report['status'] for report in reports] == ['ok', 'ok', 'failed', 'ok']
+    assert reports[2]['error'] == '站点结构变化'
+    assert [report['accepted'] for report in reports] == [1, 1, 0, 1] and stats['saved'] == 3
+    assert [(report['name'], report['status']) for report in saved] == [(report['name'], report['status'])
+                                                                         for report in reports]
+    assert all(report['seconds'] >= _SlowCrawler.delay for report in reports if report['status'] == 'ok')
+    print(f"✓ 爬虫并发运行正常: 耗时 {elapsed:.1f} 秒")
+
+
+def test_sequential_switch():
+    """测试并发数为1时依次运行"""
+    reports, elapsed, stats, _ = _run(1)
+    assert _SlowCrawler.peak == 1 and elapsed >= 3 * _SlowCrawler.delay
+    assert stats['saved'] == 3 and reports[2]['status'] == 'failed'
+    print(f"✓ 依次运行开关正常: 耗时 {elapsed:.1f} 秒")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_families_run_concurrently, test_sequential_switch]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
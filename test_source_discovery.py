@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+站点发现测试脚本
+使用本地厂商站点，验证 robots.txt、站点地图索引（含gzip）、订阅源声明的发现与持久化，
+按 lastmod 的增量抓取，以及大站点地图的流式解析
+"""
+
+import sys
+import os
+import gzip
+import io
+import tempfile
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+from crawlers.fetch_engine import AsyncFetchEngine
+from crawlers.manufacturer_crawler import ManufacturerCrawler
+from crawlers.parse_pool import ParsePool
+from crawlers.politeness import PolitenessScheduler
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.source_discovery import SourceDiscovery, iter_sitemap, parse_lastmod
+from crawlers.url_frontier import UrlFrontier
+
+
+class _VendorHandler(BaseHTTPRequestHandler):
+    """模拟厂商站点：robots.txt 声明站点地图索引，首页声明订阅源"""
+
+    requested = []
+    new_pages = []
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requested.append(self.path)
+        base = f"http://{self.headers['Host']}"
+        if self.path == '/robots.txt':
+            self._send(f"User-agent: *\nCrawl-delay: 2\nDisallow: /private/\nSitemap: {base}/sitemap_index.xml\n",
+                       'text/plain')
+        elif self.path == '/':
+            self._send('<html><head><link rel="alternate" type="application/rss+xml" href="/feed.xml">'
+                       '</head><body><a href="/about">About</a></body></html>', 'text/html')
+        elif self.path == '/sitemap_index.xml':
+            newest = '2024-03-01' if cls.new_pages else '2024-02-01'
+            self._send('<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                       f'<sitemap><loc>{base}/sitemap-old.xml.gz</loc><lastmod>2023-01-01</lastmod></sitemap>'
+                       f'<sitemap><loc>{base}/sitemap-new.xml</loc><lastmod>{newest}</lastmod></sitemap>'
+                       '</sitemapindex>', 'application/xml')
+        elif self.path == '/sitemap-old.xml.gz':
+            body = gzip.compress(_urlset(base, [('/bluetooth/archive', '2023-01-01')]).encode('utf-8'))
+            self._send_bytes(body, 'application/x-gzip')
+        elif self.path == '/sitemap-new.xml':
+            pages = [('/bluetooth/le-audio', '2024-02-01T08:00:00Z'), ('/bluetooth/mesh', '2024-01-15'),
+                     ('/private/bluetooth-roadmap', '2024-02-01'), ('/company/careers', '2024-02-01')]
+            self._send(_urlset(base, pages + cls.new_pages), 'application/xml')
+        elif self.path == '/feed.xml':
+            self._send('<?xml version="1.0"?><rss version="2.0"><channel><title>Vendor News</title>'
+                       f'<item><title>Bluetooth 6.0 channel sounding</title><link>{base}/news/cs</link>'
+                       '<guid>cs</guid><description>Bluetooth news</description></item>'
+                       f'<item><title>Quarterly results</title><link>{base}/news/q1</link><guid>q1</guid></item>'
+                       '</channel></rss>', 'application/rss+xml')
+        else:
+            name = self.path.rsplit('/', 1)[-1]
+            self._send(f'<html><head><title>Bluetooth {name} guide</title>'
+                       '<meta name="description" content="蓝牙开发指南"></head><body></body></html>', 'text/html')
+
+    def _send(self, body: str, content_type: str):
+        self._send_bytes(body.encode('utf-8'), content_type)
+
+    def _send_bytes(self, data: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _BusyFeedHandler(BaseHTTPRequestHandler):
+    """订阅源一次发布多篇蓝牙文章，夹杂无关条目"""
+
+    def do_GET(self):
+        items = [('ble-1', 'Bluetooth LE 1', 1), ('misc', 'Quarterly results', 2), ('ble-2', 'Bluetooth LE 2', 3),
+                 ('ble-3', 'Bluetooth LE 3', 4), ('ble-4', 'Bluetooth LE 4', 5)]
+        body = ''.join(f"<item><title>{title}</title><link>http://{self.headers['Host']}/news/{guid}</link>"
+                       f"<guid>{guid}</guid><pubDate>0{day} Mar 2024 08:00:00 GMT</pubDate>"
+                       f'<description>{title}</description></item>' for guid, title, day in items)
+        data = f'<?xml version="1.0"?><rss version="2.0"><channel><title>Busy</title>{body}</channel></rss>'.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml')
+        self.send_header('ETag', '"busy"')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _NoSourcesHandler(BaseHTTPRequestHandler):
+    """robots.txt 没有声明站点地图的站点：默认位置返回“页面不存在”的HTML页面（状态码200）或与蓝牙无关的站点地图"""
+
+    sitemap = ''
+
+    def do_GET(self):
+        if self.path == '/robots.txt':
+            body, content_type = 'User-agent: *\nDisallow:\n', 'text/plain'
+        elif self.path == '/sitemap.xml' and self.sitemap:
+            body, content_type = self.sitemap, 'application/xml'
+        else:
+            body, content_type = '<html><body><h1>Page not found</h1></body></html>', 'text/html'
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _urlset(base: str, pages) -> str:
+    entries = ''.join(f"<url><loc>{base}{path}</loc><lastmod>{lastmod}</lastmod></url>" for path, lastmod in pages)
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+
+class _GeneratedSitemap(io.RawIOBase):
+    """按需生成的超大站点地图，不在内存中保存完整内容"""
+
+    def __init__(self, count: int):
+        self.count = count
+        self.index = 0
+        self.buffer = b'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        self.size = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self.buffer) < len(buffer) and self.index <= self.count:
+            if self.index == self.count:
+                self.buffer += b'</urlset>'
+            else:
+                self.buffer += (f"<url><loc>https://example.com/products/item-{self.index}/overview</loc>"
+                                f"<lastmod>2024-01-01</lastmod><changefreq>weekly</changefreq></url>").encode()
+            self.index += 1
+        data, self.buffer = self.buffer[:len(buffer)], self.buffer[len(buffer):]
+        buffer[:len(data)] = data
+        self.size += len(data)
+        return len(data)
+
+
+def _crawler(db: Database) -> ManufacturerCrawler:
+    """模拟一次独立的运行：新的爬虫、URL前沿和站点发现，共用数据库"""
+    crawler = ManufacturerCrawler()
+    crawler.fetch_engine = AsyncFetchEngine()
+    crawler.frontier = UrlFrontier(refresh_days={})
+    crawler.frontier.load_from_database(db)
+    crawler.parse_pool = ParsePool(workers=0)
+    crawler.revisits = RevisitPlanner()
+    crawler.discovery = SourceDiscovery()
+    crawler.discovery.load_from_database(db)
+    return crawler
+
+
+def test_streaming_sitemap_parse():
+    """测试超大站点地图流式解析，内存占用与文件大小无关"""
+    stream = _GeneratedSitemap(50000)
+    tracemalloc.start()
+    count = 0
+    for kind, loc, lastmod in iter_sitemap(io.BufferedReader(stream)):
+        assert kind == 'url' and lastmod == parse_lastmod('2024-01-01')
+        count += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert count == 50000 and stream.size > 5 * 1024 * 1024
+    assert peak < stream.size / 10, peak
+    print(f"✓ 站点地图流式解析正常: {stream.size // (1024 * 1024)}MB，内存峰值 {peak // 1024}KB")
+
+
+def test_discovery_and_incremental_sitemaps():
+    """测试发现结果持久化，以及第二次运行只抓取新增或修改的页面"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _VendorHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    site_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    _VendorHandler.requested = []
+    _VendorHandler.new_pages = []
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, 'test.db'))
+
+            crawler = _crawler(db)
+            crawler._prefetch([site_url])
+            crawler.fetch_engine.politeness = PolitenessScheduler(default_rate=10)
+            info = crawler.discovery.discover(site_url, crawler.fetch_engine, crawler._prefetched[site_url].text)
+            assert crawler.fetch_engine.politeness.get_rate('127.0.0.1') == 0.5  # Crawl-delay: 2
+            crawler.fetch_engine.politeness = None
+            assert info.feeds == [f"{site_url}feed.xml"] and info.sitemaps == [f"{site_url}sitemap_index.xml"]
+
+            articles = crawler._crawl_discovered_sources(site_url, 10, 'manufacturer')
+            crawler._save_source_progress()
+            crawler.fetch_engine.close()
+            urls = {article['url'] for article in articles}
+            assert urls == {site_url + path for path in ('news/cs', 'bluetooth/le-audio', 'bluetooth/mesh', 'bluetooth/archive')}
+            # robots.txt 禁止的页面和URL与蓝牙无关的页面不抓取
+            assert '/private/bluetooth-roadmap' not in _VendorHandler.requested
+            assert '/company/careers' not in _VendorHandler.requested
+            saved = db.get_site_discoveries()[0]
+            assert saved['sitemap_lastmod'] == parse_lastmod('2024-02-01T08:00:00Z')
+
+            # 第二次运行：站点信息来自数据库，未修改的子站点地图不下载，只抓取新页面
+            _VendorHandler.requested = []
+            _VendorHandler.new_pages = [('/bluetooth/auracast', '2024-03-01')]
+            crawler = _crawler(db)
+            try:
+                articles = crawler._crawl_discovered_sources(site_url, 10, 'manufacturer')
+                crawler._save_source_progress()
+            finally:
+                crawler.fetch_engine.close()
+            assert [article['url'].rsplit('/', 1)[-1] for article in articles] == ['auracast']
+            assert '/robots.txt' not in _VendorHandler.requested
+            assert '/sitemap-old.xml.gz' not in _VendorHandler.requested
+            assert _VendorHandler.requested.count('/bluetooth/auracast') == 1
+            assert '/bluetooth/le-audio' not in _VendorHandler.requested
+            print(f"✓ 站点发现和增量站点地图正常: 第二次运行请求 {len(_VendorHandler.requested)} 次")
+    finally:
+        server.shutdown()
+
+
+def test_sitemap_pages_beyond_limit_are_kept():
+    """测试超出数量限制未抓取的已修改页面留到下次运行，不随处理进度跳过"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _VendorHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    site_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    _VendorHandler.new_pages = []
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, 'test.db'))
+            runs = []
+            for _ in range(3):
+                _VendorHandler.requested = []
+                crawler = _crawler(db)
+                try:
+                    articles = crawler._crawl_discovered_sources(site_url, 2, 'manufacturer')
+                    crawler._save_source_progress()
+                finally:
+                    crawler.fetch_engine.close()
+                runs.append({article['url'].rsplit('/', 1)[-1] for article in articles})
+            # 每次抓取剩余页面中最新的2个，第一次运行越过的页面在第二次运行中抓取
+            assert runs == [{'le-audio', 'mesh'}, {'archive'}, set()]
+            assert not any(path.startswith('/bluetooth/') for path in _VendorHandler.requested)
+            saved = db.get_site_discoveries()[0]
+            assert saved['sitemap_lastmod'] == parse_lastmod('2024-02-01T08:00:00Z')
+            assert saved['sitemap_pending'] == []
+            print("✓ 超出数量限制的站点地图页面留到下次运行")
+    finally:
+        server.shutdown()
+
+
+def test_vendor_feed_entries_beyond_limit_are_kept():
+    """测试订阅源中超出数量限制的相关条目不记为已处理，下次运行按从早到晚继续返回"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _BusyFeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    feed_url = f"http://127.0.0.1:{server.server_address[1]}/feed.xml"
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, 'test.db'))
+            runs = []
+            for _ in range(3):
+                crawler = _crawler(db)
+                try:
+                    articles = crawler._crawl_vendor_feed(feed_url, 'manufacturer', 2)
+                    crawler._save_source_progress()
+                finally:
+                    crawler.fetch_engine.close()
+                runs.append([article['url'].rsplit('/', 1)[-1] for article in articles])
+            assert runs == [['ble-1', 'ble-2'], ['ble-3', 'ble-4'], []]
+            # 全部处理完后才保存校验信息
+            assert db.get_feed_state(feed_url)['etag'] == '"busy"'
+            print("✓ 订阅源超出数量限制的条目留到下次运行")
+    finally:
+        server.shutdown()
+
+
+def test_unusable_sources_fall_back_to_page_strategies():
+    """测试猜测的站点地图不可用时被移除，订阅源和站点地图都没有可用内容时改用页面解析策略（返回None）"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _NoSourcesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    site_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, 'test.db'))
+
+            # 默认位置返回200的HTML页面：不是站点地图，移除
+            _NoSourcesHandler.sitemap = ''
+            crawler = _crawler(db)
+            try:
+                assert crawler._crawl_discovered_sources(site_url, 3, 'manufacturer') is None
+            finally:
+                crawler.fetch_engine.close()
+            assert db.get_site_discoveries()[0]['sitemaps'] == []
+
+            # 站点地图可以读取，但没有与蓝牙相关的页面
+            _NoSourcesHandler.sitemap = _urlset(site_url.rstrip('/'), [('/company/careers', '2024-02-01')])
+            crawler = _crawler(db)
+            crawler.discovery.refresh_days = 0
+            try:
+                assert crawler._crawl_discovered_sources(site_url, 3, 'manufacturer') is None
+            finally:
+                crawler.fetch_engine.close()
+            assert db.get_site_discoveries()[0]['sitemaps'] == [f"{site_url}sitemap.xml"]
+            print("✓ 订阅源和站点地图不可用时改用页面解析")
+    finally:
+        server.shutdown()
+
+
+def main():
+    """主测试函数"""
+    tests = [test_streaming_sitemap_parse, test_discovery_and_incremental_sitemaps,
+             test_sitemap_pages_beyond_limit_are_kept, test_vendor_feed_entries_beyond_limit_are_kept,
+             test_unusable_sources_fall_back_to_page_strategies]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+来源看门狗测试脚本
+验证卡住的来源超过期限后被放弃、其余来源照常爬取，被放弃的线程恢复后不再交出文章，以及超时次数按来源累计
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from database import Database
+from crawlers.article_pipeline import ArticlePipeline, PipelineMarker
+from crawlers.base_crawler import BaseCrawler
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.source_watchdog import SourceWatchdog, source_deadline
+from crawlers.url_frontier import UrlFrontier
+from scheduler import CrawlerScheduler
+
+_CONTENT = '蓝牙低功耗音频（LE Audio）带来了新的编解码器和广播音频功能，' * 5
+
+
+class _HangingCrawler(BaseCrawler):
+    """“卡住”来源一直等待（模拟没有超时的 feedparser.parse），“正常”来源交出一篇文章"""
+
+    source_type = 'news'
+    release = threading.Event()
+    watchdog_db = None
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = UrlFrontier(refresh_days={})
+        self.revisits = RevisitPlanner()
+        self.watchdog = SourceWatchdog()
+        if self.watchdog_db is not None:
+            self.watchdog.load_from_database(self.watchdog_db)
+
+    def crawl(self, keywords):
+        self.visit_source('卡住', self._crawl_hanging)
+        self.visit_source('正常', self._crawl_fast)
+        return self.articles
+
+    def _crawl_hanging(self):
+        self.release.wait()
+        self.add_article(self._article('hang'))
+
+    def _crawl_fast(self):
+        self.add_article(self._article('fast'))
+
+    def _article(self, name):
+        return {'title': f"Bluetooth 测试文章 {name}", 'content': _CONTENT,
+                'url': f"https://example.com/{name}", 'source_type': self.source_type}
+
+
+def _with_deadline(test_func):
+    def run():
+        original = dict(Config.SOURCE_DEADLINES)
+        Config.SOURCE_DEADLINES['_HangingCrawler'] = 0.3
+        _HangingCrawler.release.clear()
+        try:
+            test_func()
+        finally:
+            _HangingCrawler.release.set()
+            Config.SOURCE_DEADLINES.clear()
+            Config.SOURCE_DEADLINES.update(original)
+    run.__name__ = test_func.__name__
+    return run
+
+
+@_with_deadline
+def test_hung_source_is_abandoned():
+    """测试卡住的来源超时后跳过，其余来源照常访问，恢复后的线程不再交出文章"""
+    assert source_deadline(_HangingCrawler) == 0.3
+    assert source_deadline(BaseCrawler) == Config.SOURCE_DEADLINE_SECONDS
+
+    crawler = _HangingCrawler()
+    start = time.time()
+    urls = []
+    for item in crawler.stream(['蓝牙']):
+        if isinstance(item, PipelineMarker):
+            item.callback()
+        else:
+            urls.append(item['url'])
+    assert time.time() - start < 2
+    assert urls == ['https://example.com/fast']
+    assert crawler.timed_out == ['卡住'] and crawler.watchdog.get_trips() == {'卡住': 1}
+    # 超时的来源不记录访问结果，下次运行时重新访问
+    assert crawler.revisits.is_due('卡住') and not crawler.revisits.is_due('正常')
+
+    # 被放弃的线程恢复后在交出文章时退出，不改动爬虫状态
+    _HangingCrawler.release.set()
+    time.sleep(0.2)
+    assert crawler.articles == [] and crawler.article_count == 1
+    assert crawler._current_source == '' and crawler._visit_new_articles is None
+    print("✓ 卡住的来源超时后被放弃")
+
+
+@_with_deadline
+def test_report_and_trip_counts():
+    """测试运行报告记录超时的来源，超时次数按来源在数据库中累计"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'test.db'))
+        _HangingCrawler.watchdog_db = db
+        try:
+            scheduler = CrawlerScheduler.__new__(CrawlerScheduler)
+            scheduler.db = db
+            scheduler.CRAWLERS = [('news', '测试', _HangingCrawler)]
+            for _ in range(2):
+                with ArticlePipeline(db, UrlFrontier(refresh_days={}), flush_seconds=0) as pipeline:
+                    report, = scheduler._crawl_all_sources(pipeline)
+                assert report['status'] == 'ok' and report['accepted'] == 1
+                assert report['timed_out'] == ['卡住']
+        finally:
+            _HangingCrawler.watchdog_db = None
+        assert db.get_crawl_reports()[0]['timed_out'] == '卡住'
+        timeouts = db.get_source_timeouts()
+        assert [(row['source'], row['crawler'], row['trips']) for row in timeouts] == [('卡住', '_HangingCrawler', 2)]
+        # 重新加载时恢复累计次数
+        watchdog = SourceWatchdog()
+        watchdog.load_from_database(db)
+        assert watchdog.get_trips() == {'卡住': 2}
+    print("✓ 运行报告和超时次数正常")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_hung_source_is_abandoned, test_report_and_trip_counts]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取任务队列测试脚本
+验证任务的优先级、租约、到期接管、失败退避重试，多个进程领取任务不重复，以及工作进程执行任务入库
+"""
+
+import sys
+import os
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from database import Database
+from crawlers.base_crawler import BaseCrawler
+from crawlers.revisit_planner import RevisitPlanner
+from crawlers.task_queue import CrawlTask, TaskQueue, TaskWorker, enqueue_crawl_tasks
+from crawlers import task_store
+from crawlers.task_store import PostgresTaskStore, SqliteTaskStore, create_task_store
+from crawlers.url_frontier import UrlFrontier
+
+_CONTENT = '蓝牙低功耗音频（LE Audio）带来了新的编解码器和广播音频功能，' * 5
+
+
+def test_lease_priority_and_retry():
+    """测试按优先级领取、租约归属、失败退避重试、租约到期接管和次数上限"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        queue = TaskQueue(os.path.join(tmp_dir, 'tasks.db'), lease_seconds=60, max_attempts=2)
+        tasks = [CrawlTask('hub', 'https://a.example.com/', crawler='news'),
+                 CrawlTask('feed', 'https://a.example.com/feed', crawler='news'),
+                 CrawlTask('keyword', 'GitHub|蓝牙', {'source': 'GitHub', 'keyword': '蓝牙'}, crawler='tech')]
+        assert queue.enqueue(tasks) == 3
+        # 等待中的任务不重复加入
+        assert queue.enqueue([CrawlTask('feed', 'https://a.example.com/feed', crawler='news')]) == 0
+
+        feed, = queue.lease('worker-1')
+        keyword, hub = queue.lease('worker-2', limit=5)
+        assert (feed.kind, keyword.kind, hub.kind) == ('feed', 'keyword', 'hub')
+        assert keyword.payload == {'source': 'GitHub', 'keyword': '蓝牙'} and keyword.attempts == 1
+        assert queue.lease('worker-3') == []
+
+        # 只有持有租约的进程能更新任务
+        assert not queue.complete(feed, 'worker-2')
+        assert queue.complete(feed, 'worker-1')
+        assert queue.get_stats() == {'pending': 0, 'leased': 2, 'done': 1, 'failed': 0}
+
+        # 失败后退避，到时间才能再次领取
+        assert queue.fail(keyword, 'worker-2', '503') == 'retry'
+        assert queue.lease('worker-3') == []
+        later = time.time() + queue.retry_delay(1) + 1
+        retried, = queue.lease('worker-3', now=later)
+        assert retried.key == keyword.key and retried.attempts == 2
+        assert queue.fail(retried, 'worker-3', '503') == 'failed'
+
+        # 租约到期后被其他进程接管，原进程的结果不再生效
+        taken, = queue.lease('worker-4', now=time.time() + 61)
+        assert taken.key == hub.key and taken.attempts == 2
+        assert not queue.complete(hub, 'worker-2')
+        # 次数已用完的任务租约再次到期时放弃
+        assert queue.lease('worker-5', now=time.time() + 200) == []
+        assert queue.get_stats() == {'pending': 0, 'leased': 0, 'done': 1, 'failed': 2}
+        # 结束的任务可以再次加入
+        assert queue.enqueue([CrawlTask('feed', 'https://a.example.com/feed', crawler='news')]) == 1
+    print("✓ 任务优先级、租约和重试正常")
+
+
+def _lease_all(queue_path: str, owner: str, results):
+    """子进程：领取并完成任务直到队列为空"""
+    queue = TaskQueue(queue_path)
+    leased = []
+    while True:
+        tasks = queue.lease(owner, limit=2)
+        if not tasks:
+            break
+        for task in tasks:
+            leased.append(task.id)
+            queue.complete(task, owner)
+    results.put(leased)
+
+
+def test_processes_lease_each_task_once():
+    """测试多个进程同时领取任务，每个任务只被领取一次"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        queue_path = os.path.join(tmp_dir, 'tasks.db')
+        queue = TaskQueue(queue_path)
+        queue.enqueue(CrawlTask('article', f"https://example.com/{index}", crawler='news') for index in range(200))
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        processes = [context.Process(target=_lease_all, args=(queue_path, f"worker-{index}", results))
+                     for index in range(4)]
+        for process in processes:
+            process.start()
+        leased = [task_id for _ in processes for task_id in results.get(timeout=60)]
+        for process in processes:
+            process.join()
+        assert sorted(leased) == list(range(1, 201))
+        assert queue.get_stats()['done'] == 200
+    print("✓ 多个进程领取任务不重复")
+
+
+class _QueryCrawler(BaseCrawler):
+    """每个关键词查询交出一篇文章，关键词为“故障”时抛出异常"""
+
+    source_type = 'tech'
+    KEYWORD_SOURCES = {'Example': ('_crawl_example', 2)}
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = UrlFrontier(refresh_days={})
+        self.revisits = RevisitPlanner()
+
+    def crawl(self, keywords):
+        self.visit_source('Example', self._crawl_example, keywords)
+        return self.articles
+
+    def _crawl_example(self, keywords):
+        for keyword in keywords:
+            if keyword == '故障':
+                raise RuntimeError('查询接口错误')
+            self.add_article({'title': f"Bluetooth 测试文章 {keyword}", 'content': _CONTENT,
+                              'url': f"https://example.com/search/{keyword}", 'source_type': self.source_type})
+
+
+def test_worker_runs_tasks():
+    """测试规划任务、工作进程执行任务并入库，失败的任务等待重试"""
+    families = [('example', '示例', _QueryCrawler)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'test.db'))
+        queue = TaskQueue(os.path.join(tmp_dir, 'tasks.db'))
+        # 关键词数上限为2，第三个关键词不拆分
+        assert enqueue_crawl_tasks(queue, db, families, ['LE Audio', '故障', '蓝牙']) == 2
+
+        worker = TaskWorker(queue, db, families, owner='worker-1')
+        stats = worker.run(drain=True)
+        assert stats['done'] == 1 and stats['retried'] == 1 and stats['articles'] == 1
+        assert queue.get_stats() == {'pending': 1, 'leased': 0, 'done': 1, 'failed': 0}
+        with sqlite3.connect(db.db_path) as conn:
+            assert [row[0] for row in conn.execute('SELECT url FROM articles')] == ['https://example.com/search/LE Audio']
+        # 每个关键词查询单独记录重访结果
+        crawler = worker._crawlers['example']
+        assert not crawler.revisits.is_due('Example|LE Audio') and crawler.revisits.is_due('Example|故障')
+    print("✓ 工作进程执行任务并入库")
+
+
+def test_store_selection():
+    """测试按配置选择队列存储：文件路径使用本机SQLite，PostgreSQL连接串使用共享存储"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'tasks.db')
+        assert isinstance(create_task_store(path), SqliteTaskStore)
+        original = Config.TASK_QUEUE_URL
+        Config.TASK_QUEUE_URL = ''
+        try:
+            assert TaskQueue().location == Config.TASK_QUEUE_PATH
+        finally:
+            Config.TASK_QUEUE_URL = original
+
+        # 同一个存储可由多个队列对象共用
+        store = SqliteTaskStore(path)
+        assert TaskQueue(store=store).enqueue([CrawlTask('feed', 'https://a.example.com/feed', crawler='news')]) == 1
+        task, = TaskQueue(path).lease('worker-1')
+        assert TaskQueue(store=store).release(task, 'worker-1')
+        assert TaskQueue(path).get_stats()['pending'] == 1
+
+    url = 'postgresql://crawler@db.example.com/crawler'
+    if task_store.psycopg2 is None:
+        try:
+            create_task_store(url)
+            assert False, "未安装 psycopg2 时应报错"
+        except RuntimeError as e:
+            assert 'psycopg2' in str(e)
+    else:
+        assert PostgresTaskStore.LOCK_ROWS.strip() == 'FOR UPDATE SKIP LOCKED'
+    print("✓ 队列存储按配置选择")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_lease_priority_and_retry, test_processes_lease_each_task_once, test_worker_runs_tasks,
+             test_store_selection]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+URL去重测试脚本
+验证URL前沿在抓取前跳过已入库文章，URL规范化与近似重复文章合并
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import Database
+from crawlers.url_frontier import BloomFilter, UrlFrontier
+from crawlers.url_canonical import canonicalize_url, find_canonical_link
+from fingerprint import SimHashIndex, hamming_distance, simhash
+from bs4 import BeautifulSoup
+
+
+def _make_article(url: str, source_type: str = 'news') -> dict:
+    return {
+        'title': '蓝牙测试文章标题',
+        'content': '蓝牙 Bluetooth 测试内容',
+        'url': url,
+        'source_type': source_type,
+        'source_name': '测试来源',
+        'keywords': ['蓝牙']
+    }
+
+
+def test_bloom_filter():
+    """测试布隆过滤器无漏判"""
+    bloom = BloomFilter(1000)
+    urls = [f"https://example.com/article/{i}" for i in range(1000)]
+    for url in urls:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+    false_positives = sum(f"https://example.com/other/{i}" in bloom for i in range(1000))
+    assert false_positives < 20
+    print(f"✓ 布隆过滤器正常，误判 {false_positives}/1000")
+
+
+def test_url_frontier():
+    """测试已入库URL被跳过、重访周期与按来源统计"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'test.db'))
+        db.insert_article(_make_article('https://example.com/old'))
+        db.insert_article(_make_article('https://github.com/owner/repo', 'tech'))
+
+        frontier = UrlFrontier(refresh_days={'tech': 7})
+        frontier.load_from_database(db)
+
+        urls = ['https://example.com/old', 'https://example.com/new', 'https://example.com/new']
+        assert frontier.filter_urls(urls, 'news', 'example.com') == ['https://example.com/new']
+        assert frontier.get_stats() == {'example.com': 2}
+
+        # 未到重访周期的tech文章跳过，过期后重新抓取
+        assert not frontier.should_fetch('https://github.com/owner/repo', 'tech', 'GitHub')
+        stale = (datetime.now() - timedelta(days=30)).isoformat()
+        with sqlite3.connect(db.db_path) as conn:
+            conn.execute('UPDATE articles SET updated_at = ?', (stale,))
+        assert frontier.should_fetch('https://github.com/owner/repo', 'tech', 'GitHub')
+        assert not frontier.should_fetch('https://example.com/old', 'news')
+
+        # limit 只登记实际要抓取的URL
+        links = [f"https://example.com/a/{i}" for i in range(5)]
+        assert frontier.filter_urls(links, 'news', limit=2) == links[:2]
+        assert frontier.should_fetch(links[3], 'news')
+        print(f"✓ URL前沿正常: {frontier.get_stats()}")
+
+
+def test_canonicalize_url():
+    """测试跟踪参数、AMP、协议与主机大小写的规范化"""
+    expected = 'https://example.com/news/bluetooth-6?id=42&page=2'
+    variants = [
+        'https://example.com/news/bluetooth-6?id=42&page=2',
+        'http://Example.COM:80/news/bluetooth-6?page=2&id=42&utm_source=rss&utm_medium=feed',
+        'https://amp.example.com/news/bluetooth-6/amp?id=42&page=2#comments',
+        'https://example.com//news/bluetooth-6?fbclid=abc&id=42&page=2',
+    ]
+    assert {canonicalize_url(url) for url in variants} == {expected}
+    assert canonicalize_url('https://example.com:8443/a') == 'https://example.com:8443/a'
+    assert canonicalize_url('https://amp.dev/x') == 'https://amp.dev/x'
+    assert canonicalize_url('https://amp.example.co.uk/x') == 'https://example.co.uk/x'
+    assert canonicalize_url('mailto:someone@example.com') == 'mailto:someone@example.com'
+
+    soup = BeautifulSoup('<head><link rel="canonical" href="/news/bluetooth-6?id=42&page=2"></head>',
+                         'html.parser')
+    assert find_canonical_link(soup, 'https://m.example.com/x?utm_campaign=a') == 'https://m.example.com/news/bluetooth-6?id=42&page=2'
+    print("✓ URL规范化正常")
+
+
+def test_near_duplicate_articles():
+    """测试转载文章只记录重复链接，不重复入库"""
+    body = ('Bluetooth SIG 今日发布蓝牙核心规范 6.0 版本，新增信道探测功能，可在设备之间实现厘米级测距，'
+            '同时改进了广播与连接的能效。首批支持新规范的芯片预计将在明年上市，'
+            '多家手机厂商表示将在旗舰机型中率先搭载。') * 3
+    index = SimHashIndex(max_distance=3)
+    index.add(1, simhash(body))
+    assert hamming_distance(simhash(body), simhash(body + ' 来源：某新闻网')) <= 3
+    assert index.find_duplicate(simhash(body + ' 来源：某新闻网')) == 1
+    index.remove(1)
+    assert index.find_duplicate(simhash(body)) is None and len(index) == 0
+    index.add(1, simhash(body))
+    assert index.find_duplicate(simhash('Wi-Fi 7 路由器评测，吞吐量与覆盖范围全面提升。' * 10)) is None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, 'test.db'))
+        original = dict(_make_article('https://example.com/news/1'), content=body)
+        syndicated = dict(_make_article('https://mirror.example.org/a/99'), content=body + ' 来源：某新闻网')
+        assert db.insert_article(original)
+        assert db.insert_article(syndicated)
+        assert db.get_duplicate_count() == 1
+        assert len(db.get_recent_articles()) == 1
+
+        # 原文重新入库后重复记录仍指向它；重复链接也会被URL前沿跳过
+        assert db.insert_article(original)
+        with sqlite3.connect(db.db_path) as conn:
+            (orphans,) = conn.execute(
+                'SELECT COUNT(*) FROM article_duplicates WHERE article_id NOT IN (SELECT id FROM articles)'
+            ).fetchone()
+        assert orphans == 0
+        # 重新入库后文章ID不变，之后的近似重复文章指向仍存在的原文
+        (original_id,) = [article['id'] for article in db.get_recent_articles()]
+        second_copy = dict(_make_article('https://mirror.example.net/b/7'), content=body + ' 转载自某新闻网')
+        assert db.insert_article(second_copy)
+        with sqlite3.connect(db.db_path) as conn:
+            linked = [row[0] for row in conn.execute('SELECT article_id FROM article_duplicates')]
+        assert linked == [original_id, original_id]
+        assert len(db.get_recent_articles()) == 1
+        frontier = UrlFrontier(refresh_days={})
+        frontier.load_from_database(db)
+        assert not frontier.should_fetch('https://mirror.example.org/a/99', 'news')
+
+        # 短内容不参与指纹比较
+        assert db.insert_article(_make_article('https://example.com/short-1'))
+        assert db.insert_article(_make_article('https://example.com/short-2'))
+        assert len(db.get_recent_articles()) == 3
+
+        # 指纹索引保存在数据库中：另一个进程写入的文章同样参与查重
+        other_body = ('Wi-Fi 7 路由器评测：多链路操作让吞吐量和时延全面改善，'
+                      '四款旗舰机型在穿墙覆盖和多设备并发场景下的表现差异明显。') * 4
+        worker_a, worker_b = Database(db.db_path), Database(db.db_path)
+        assert worker_b.insert_article(_make_article('https://example.com/short-3'))
+        assert worker_a.insert_article(dict(_make_article('https://example.com/news/2'), content=other_body))
+        assert worker_b.insert_article(dict(_make_article('https://mirror.example.org/a/100'),
+                                            content=other_body + ' 来源：某新闻网'))
+        assert db.get_duplicate_count() == 3
+        assert len(db.get_recent_articles()) == 5
+    print("✓ 近似重复文章合并正常")
+
+
+def main():
+    """主测试函数"""
+    tests = [test_bloom_filter, test_url_frontier, test_canonicalize_url, test_near_duplicate_articles]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except Exception as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
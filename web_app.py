@@ -1,6 +1,8 @@
 from flask import Flask, render_template, jsonify, request, redirect, url_for
 from database import Database
 from summarizer import Summarizer
+from crawlers.task_queue import TaskQueue
+from crawlers.run_lock import get_run_lock_status
 from datetime import datetime, timedelta
 import json
 import logging
@@ -225,6 +227,106 @@ def api_summary():
             'error': str(e)
         }), 500
 
+@app.route('/api/revisits')
+def api_revisits():
+    """API: 各来源的变化频率估计和下次访问时间"""
+    try:
+        revisits = db.get_source_revisits()
+        return jsonify({
+            'success': True,
+            'data': revisits,
+            'total': len(revisits)
+        })
+    except Exception as e:
+        logging.error(f"API获取重访计划失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/discovery')
+def api_discovery():
+    """API: 各站点发现的站点地图、订阅源和 Crawl-delay"""
+    try:
+        sites = db.get_site_discoveries()
+        for site in sites:
+            site.pop('robots_txt', None)
+        return jsonify({
+            'success': True,
+            'data': sites,
+            'total': len(sites)
+        })
+    except Exception as e:
+        logging.error(f"API获取站点发现结果失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/crawl_report')
+def api_crawl_report():
+    """API: 最近一次运行中各爬虫的结果、耗时和错误"""
+    try:
+        reports = db.get_crawl_reports()
+        return jsonify({
+            'success': True,
+            'data': reports,
+            'total': len(reports)
+        })
+    except Exception as e:
+        logging.error(f"API获取运行报告失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/source_timeouts')
+def api_source_timeouts():
+    """API: 各来源访问超过看门狗期限的次数"""
+    try:
+        timeouts = db.get_source_timeouts()
+        return jsonify({
+            'success': True,
+            'data': timeouts,
+            'total': len(timeouts)
+        })
+    except Exception as e:
+        logging.error(f"API获取来源超时记录失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/task_queue')
+def api_task_queue():
+    """API: 爬取任务队列中各状态的任务数"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': TaskQueue().get_stats()
+        })
+    except Exception as e:
+        logging.error(f"API获取任务队列状态失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/crawl_lock')
+def api_crawl_lock():
+    """API: 运行锁的持有者、心跳、进度以及争用和接管次数"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': get_run_lock_status(db)
+        })
+    except Exception as e:
+        logging.error(f"API获取运行锁状态失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/search')
 def search():
     """搜索页面"""